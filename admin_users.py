@@ -0,0 +1,112 @@
+"""
+admin_users.py — PAINEL ADMIN AGREGADO NO BANCO (SEM CARREGAR TODOS OS USUÁRIOS) 👥
+==================================================================================
+O /admin fazia User.query.all() e contava ativos / expirados num loop em
+Python: a página crescia linearmente com a base de clientes e trazia todas
+as linhas do Postgres. Aqui:
+
+  - summary(): total / ativos / expirados em UMA query agregada, cacheada
+    até (a) o próximo vencimento de assinatura ou (b) uma mudança de
+    usuário em qualquer worker (user_cache.generation(): renew, webhook,
+    reset de senha, cadastro) — sem TTL arbitrário e sem contagem velha
+  - list_users(): página por cursor (id decrescente, índice da PK), com
+    busca por email e filtro active / expired; só a página atual sai do banco
+  - ensure_indexes(): índice em user.subscription_end (contagem de ativos e
+    próximo vencimento por range scan) também em bancos já existentes
+
+O custo do /admin fica O(página), independente do número de usuários.
+"""
+
+import datetime
+import threading
+
+from sqlalchemy import case, func, or_, and_, text
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+ADMIN_DAYS_LEFT = 9999  # what the page shows for admins (never expire)
+
+_summary = {"value": None, "generation": None, "valid_until": None}
+_summary_lock = threading.Lock()
+
+
+def ensure_indexes(db):
+    """Index on subscription_end for databases created before the model declared it."""
+    db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_user_subscription_end ON "user" (subscription_end)'))
+    db.session.commit()
+
+
+def _active_clause(User, now):
+    return or_(User.role == 'admin', User.subscription_end > now)
+
+
+def _compute_summary(now):
+    from payment_system import db, User
+    active = _active_clause(User, now)
+    total, active_count = db.session.query(
+        func.count(User.id), func.coalesce(func.sum(case((active, 1), else_=0)), 0)).one()
+    # Earliest upcoming expiry: the summary is exact until then (range scan on the index)
+    next_expiry = db.session.query(func.min(User.subscription_end)).filter(
+        User.subscription_end > now, User.role != 'admin').scalar()
+    return {"total": total, "active": int(active_count), "expired": total - int(active_count)}, next_expiry
+
+
+def summary():
+    """{"total", "active", "expired"} — cached until the next expiry or any user change."""
+    import user_cache
+    now = datetime.datetime.utcnow()
+    generation = user_cache.generation()
+    with _summary_lock:
+        valid_until = _summary["valid_until"]
+        if (_summary["value"] is not None and _summary["generation"] == generation
+                and (valid_until is None or now < valid_until)):
+            return dict(_summary["value"])
+    value, next_expiry = _compute_summary(now)
+    with _summary_lock:
+        _summary.update(value=value, generation=generation, valid_until=next_expiry)
+    return dict(value)
+
+
+def _row(user, now):
+    if user.role == 'admin':
+        active, days_left = True, ADMIN_DAYS_LEFT
+    elif user.subscription_end and user.subscription_end > now:
+        active, days_left = True, (user.subscription_end - now).days
+    else:
+        active, days_left = False, 0
+    return {
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "subscription_active": active,
+        "days_left": days_left,
+        "subscription_end": user.subscription_end,
+    }
+
+
+def list_users(cursor=None, limit=DEFAULT_LIMIT, q=None, status=None):
+    """
+    One page of users, newest first → {"items", "next_cursor"}. `cursor` is the
+    last id of the previous page; `q` matches part of the email; `status` is
+    "active" / "expired".
+    """
+    from payment_system import User
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    now = datetime.datetime.utcnow()
+    query = User.query
+    if cursor is not None:
+        query = query.filter(User.id < cursor)
+    if q:
+        pattern = "%" + q.strip().lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.filter(User.email.like(pattern, escape="\\"))
+    if status == "active":
+        query = query.filter(_active_clause(User, now))
+    elif status == "expired":
+        query = query.filter(and_(User.role != 'admin',
+                                  or_(User.subscription_end.is_(None), User.subscription_end <= now)))
+    users = query.order_by(User.id.desc()).limit(limit + 1).all()
+    page = users[:limit]
+    return {
+        "items": [_row(u, now) for u in page],
+        "next_cursor": page[-1].id if len(users) > limit else None,
+    }
@@ -99,11 +99,14 @@ def query_cloud_intelligence(prompt):
 # 3. Contextual Awareness (Derby/Title Race weighting)
 # 4. Monte Carlo Simulation (10,000 runs)
 
-try:
-    from knowledge_base import SPORTS_KNOWLEDGE
-except ImportError:
-    # Fallback minimal knowledge if file missing
-    SPORTS_KNOWLEDGE = {}
+def _sports_knowledge():
+    """knowledge_base.SPORTS_KNOWLEDGE, imported on first use (large literal)."""
+    try:
+        from knowledge_base import SPORTS_KNOWLEDGE
+    except ImportError:
+        # Fallback minimal knowledge if file missing
+        SPORTS_KNOWLEDGE = {}
+    return SPORTS_KNOWLEDGE
 
 
 
@@ -1081,6 +1084,10 @@ def neural_cortex_omega(basic_probs, home_team_data, away_team_data, odd_home, o
         funnel_log_pass.append(meta_reason)
 
         # --- BRAINS 43-49: SPECIALIZED MODULES INJECTION (FEB 2026) ---
+        from specialized_modules import (
+            tracker_sharp_money, narrative_override, referee_profile_strictness,
+            scraper_lineup_leaks, chemistry_gap_analysis,
+        )
         
         # 43. SHARP MONEY TRACKER
         # Simulating public % based on popularity
@@ -1319,14 +1326,14 @@ def analyze_multiple_risk(ocr_text, current_bankroll):
             # Avoid duplicates if multiple keywords for same team
             if not any(t['master'] == master_key for t in teams_in_order):
                 pos = text_blob.find(team_key)
-                teams_in_order.append({"pos": pos, "name": master_key.upper(), "master": master_key, "data": SPORTS_KNOWLEDGE.get(master_key)})
+                teams_in_order.append({"pos": pos, "name": master_key.upper(), "master": master_key, "data": _sports_knowledge().get(master_key)})
     
     # Sort by appearance
     teams_in_order = sorted(teams_in_order, key=lambda x: x['pos'])
 
     # Step 2: Fallback to global knowledge if fuzzy fails
     if not teams_in_order:
-        for team_key, data in SPORTS_KNOWLEDGE.items():
+        for team_key, data in _sports_knowledge().items():
             if team_key in text_blob:
                 teams_in_order.append({"name": team_key.upper(), "data": data})
 
@@ -1557,21 +1564,31 @@ def analyze_match(game_id):
     }
 
 # --- NEW MODULES ADDED (USER REQUEST - FEB 10, 2026) ---
-# Separated into specialized_modules.py for modularity
-
-from specialized_modules import (
-    architect_parlays,
-    specialist_corners,
-    specialist_goals,
-    analyst_nba_totals,
-    specialist_throwins,
-    analyst_player_props,
-    sniper_handicaps,
-    tracker_sharp_money,
-    narrative_override,
-    referee_profile_strictness,
-    scraper_lineup_leaks,
-    chemistry_gap_analysis,
-    live_momentum_swing,
-    self_correction_loop
+# Separated into specialized_modules.py for modularity.
+# Re-exported lazily (PEP 562) so importing ai_engine does not load them.
+
+_SPECIALIZED_EXPORTS = (
+    "architect_parlays",
+    "specialist_corners",
+    "specialist_goals",
+    "analyst_nba_totals",
+    "specialist_throwins",
+    "analyst_player_props",
+    "sniper_handicaps",
+    "tracker_sharp_money",
+    "narrative_override",
+    "referee_profile_strictness",
+    "scraper_lineup_leaks",
+    "chemistry_gap_analysis",
+    "live_momentum_swing",
+    "self_correction_loop",
 )
+
+
+def __getattr__(name):
+    if name in _SPECIALIZED_EXPORTS:
+        import specialized_modules
+        return getattr(specialized_modules, name)
+    if name == "SPORTS_KNOWLEDGE":
+        return _sports_knowledge()
+    raise AttributeError(f"module 'ai_engine' has no attribute '{name}'")
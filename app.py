@@ -1,24 +1,39 @@
-import data_fetcher
-import result_checker
-import ai_engine
+import payload_cache
+import slate_versions
+import live_feed
+import scheduler
+import warmup
+import user_cache
+import webhook_queue
+import admin_users
+import build_assets
+import metrics
+import profiler
+import log_config
+# Heavy analytic modules load on first use (see lazy_modules.py / startup_profile.py)
+from lazy_modules import lazy_module
+data_fetcher = lazy_module("data_fetcher")
+history_index = lazy_module("history_index")
+result_checker = lazy_module("result_checker")
+ai_engine = lazy_module("ai_engine")
 # user_manager deprecated - replaced by payment_system
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, g
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, g, Response, send_file
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import os
+import sys
 import time
 import datetime
-import requests
 import traceback
 import re
-import threading
-import importlib
+import json
 # Payment System Integration
 from payment_system import init_payment_system, db, User, Payment, PaymentManager
 # 🛡️ Security Layer
 from security import (
     rate_limit, check_blocked_ip, register_honeypots, 
     register_security_middleware, log_failed_login,
-    log_suspicious_activity, get_security_report, _get_client_ip
+    log_suspicious_activity, log_rate_limited, get_security_report, _get_client_ip,
+    limiter, login_tarpit, event_sink
 )
 
 try:
@@ -51,15 +66,30 @@ login_manager.init_app(app)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Per-process TTL snapshot (user_cache.py): most requests skip the DB round-trip
+    return user_cache.load(int(user_id), User.query.get)
 
 # Mercado Pago SDK
 mp_manager = PaymentManager(os.getenv('MP_ACCESS_TOKEN', 'YOUR_ACCESS_TOKEN_HERE'))
 
 # --- MIDDLEWARE & SECURITY ---
+# Outbound HTTP (ESPN, 365Scores, Odds API, News, Supabase, Mercado Pago) timed per host
+metrics.instrument_requests()
+
 @app.before_request
 def start_timer():
     g.start = time.time()
+    metrics.request_started()
+    # Stack sampling only while an admin armed slow-request profiling (profiler.py)
+    g.profiling = profiler.request_started(f"{request.method} {request.path}")
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'start' in g:
+        metrics.request_finished()
+    if g.pop('profiling', False):
+        profiler.request_finished({"method": request.method, "path": request.path,
+                                   "error": repr(exc) if exc else None})
 
 @app.after_request
 def add_security_headers(response):
@@ -87,9 +117,13 @@ def add_security_headers(response):
     if request.is_secure or os.environ.get('RENDER'):
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
     
-    # Latency tracking
-    diff = time.time() - g.start
-    response.headers['X-Neural-Latency'] = f"{diff:.4f}s"
+    # Latency tracking (g.start is missing when a security gate short-circuited the request)
+    diff = None
+    if 'start' in g:
+        diff = time.time() - g.start
+        response.headers['X-Neural-Latency'] = f"{diff:.4f}s"
+    metrics.observe_request(request.method, request.url_rule.rule if request.url_rule else None,
+                            response.status_code, diff)
     
     # Cache Control
     if request.path.startswith('/api'):
@@ -110,7 +144,7 @@ def not_found(e):
         return redirect(url_for('login_page'))
     if not current_user.is_active_subscriber:
         return redirect(url_for('subscription_page'))
-    return render_template('index.html'), 200
+    return _index_response()
 
 @app.errorhandler(500)
 def internal_error(e):
@@ -120,71 +154,135 @@ def internal_error(e):
     return jsonify({"status": "critical_error", "message": "Falha no Núcleo de Processamento"}), 500
 
 # --- JOB AUTOMATION ---
-
-def run_update_job():
-    """Runs the daily update in a background thread."""
-    print("⏳ Starting Background Update Job...")
-    try:
-        # Re-import to ensure fresh execution context
-        # We need to run the actual script logic.
-        # Ideally, we call data_fetcher directly to populate files
-        # AND THEN sync to cloud if needed.
-        
-        # HACK: Execute the existing script file as a subprocess or import logic
-        # Using import logic is safer for memory in this context but script relies on __main__
-        # Let's use data_fetcher directly to refresh cache
-        
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        print(f"🔄 Refreshing data for {today}...")
-        data_fetcher.get_games_for_date(today, force_refresh=True)
-        print("✅ Data Fetcher Complete.")
-        
-        # Auto-check results from ESPN
-        print("🔍 Checking game results via ESPN...")
-        result_summary = result_checker.check_and_update_results()
-        print(f"✅ Result Check Complete: {result_summary}")
-        
-        print("✅ Background Update Job All Done.")
-    except Exception as e:
-        print(f"❌ Background Update Job Failed: {e}")
-        traceback.print_exc()
-
-@app.route('/api/cron/update', methods=['GET', 'POST'])
-def cron_update():
-    """
-    Trigger this endpoint to start the daily update process asynchronously.
-    Accepts key via query param OR Authorization header.
-    """
+# Background work runs as named jobs (scheduler.py): cron endpoints only enqueue.
+job_scheduler = scheduler.get_scheduler()
+# Mercado Pago notifications: the webhook only persists them, this job applies them
+job_scheduler.register(
+    "mp_webhooks", lambda: webhook_queue.drain(webhook_queue.get_queue(), mp_manager, app),
+    scheduler.Interval(webhook_queue.POLL_SECONDS, run_at_start=True), leader_only=False)
+if os.environ.get('SCHEDULER_ENABLED', '1') == '1':
+    job_scheduler.start()
+
+def _cron_authorized(endpoint):
+    """Accepts the key via query param OR X-Cron-Key header."""
     key = request.args.get('key') or request.headers.get('X-Cron-Key', '')
     authorized_key = os.environ.get('CRON_KEY', '')
-    
     if not authorized_key or key != authorized_key:
-        log_suspicious_activity(_get_client_ip(), f"Cron access denied: /api/cron/update")
+        log_suspicious_activity(_get_client_ip(), f"Cron access denied: {endpoint}")
+        return False
+    return True
+
+@app.route('/api/cron/update', methods=['GET', 'POST'])
+def cron_update():
+    """Enqueues the daily update (refresh today + result check); overlapping hits are coalesced."""
+    if not _cron_authorized('/api/cron/update'):
         return jsonify({"status": "error", "message": "Unauthorized"}), 401
 
-    # Run in thread to avoid timeout
-    thread = threading.Thread(target=run_update_job)
-    thread.start()
-    
+    state = job_scheduler.enqueue("update_today")
     return jsonify({
         "status": "accepted", 
-        "message": "Update process started in background.", 
+        "job": "update_today",
+        "state": state,
+        "message": "Update process started in background." if state == "started" else "Update already running; queued once more.",
         "timestamp": datetime.datetime.now().isoformat()
     }), 202
 
 @app.route('/api/cron/results', methods=['GET', 'POST'])
 def cron_results():
-    """Dedicated endpoint to check & update game results from ESPN."""
-    key = request.args.get('key') or request.headers.get('X-Cron-Key', '')
-    authorized_key = os.environ.get('CRON_KEY', '')
-    if not authorized_key or key != authorized_key:
-        log_suspicious_activity(_get_client_ip(), f"Cron access denied: /api/cron/results")
+    """Enqueues the ESPN result check."""
+    if not _cron_authorized('/api/cron/results'):
         return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    state = job_scheduler.enqueue("check_results")
+    return jsonify({"status": "accepted", "job": "check_results", "state": state,
+                    "timestamp": datetime.datetime.now().isoformat()}), 202
+
+# --- INDEX SHELL ---
+# index.html is split into hashed CSS/JS and rendered once per role at boot (build_assets.py)
+index_shell = build_assets.get_shell(app.jinja_env)
+
+# --- WARM START ---
+# Under gunicorn each worker warms up in post_fork (gunicorn.conf.py) before accepting traffic.
+if os.environ.get('WARMUP_ENABLED', '1') == '1' and not warmup.started():
+    warmup.warm_up_async()
+
+@app.route('/api/health')
+def health():
+    """Readiness probe: 503 while this worker is still warming its caches, 200 once ready."""
+    state = warmup.status()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+@app.route('/api/admin/jobs')
+@login_required
+def admin_jobs():
+    """Scheduler state: jobs, next runs, overlap counters and run history (this worker)."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(job_scheduler.status())
+
+# Component stats exported by /api/admin/metrics (read at scrape time)
+def _turbo_cache_stats():
+    turbo = sys.modules.get('turbo_fetcher')  # not imported yet → nothing cached yet
+    return turbo.performance_report()["cache"] if turbo else {}
+
+import db_config
+metrics.register_collector("payload_cache", payload_cache.stats)
+metrics.register_collector("turbo_cache", _turbo_cache_stats)
+metrics.register_collector("user_cache", user_cache.stats)
+metrics.register_collector("db_pool", db_config.stats)
+metrics.register_collector("webhook_queue", lambda: webhook_queue.get_queue().stats()["counters"])
+metrics.register_collector("log_queue", log_config.stats)
+metrics.register_collector("security_events", lambda: {
+    **event_sink.stats(), **{f"type_{name.lower()}": n for name, n in event_sink.counts().items()}})
+
+@app.route('/api/admin/metrics')
+@login_required
+def admin_metrics():
+    """Route latency histograms, status counts, upstream / stage timings and cache stats (Prometheus text)."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# --- PROFILER (admin only) ---
+@app.route('/api/admin/profiler')
+@login_required
+def admin_profiler():
+    """Arm state + stored profiles (newest first)."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profiler.status())
+
+@app.route('/api/admin/profiler/arm', methods=['POST'])
+@login_required
+def admin_profiler_arm():
+    """{"pipeline_runs": N, "slow_ms": ms, "minutes": m} — profiles the next N pipeline runs and slow requests."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    body = request.get_json(silent=True) or {}
     try:
-        summary = result_checker.check_and_update_results()
-        return jsonify({"status": "ok", **summary})
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        state = profiler.get_state().arm(body.get('pipeline_runs', 0), body.get('slow_ms'),
+                                         body.get('minutes', 15), armed_by=current_user.email)
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid pipeline_runs/slow_ms/minutes"}), 400
+    return jsonify({"armed": state})
+
+@app.route('/api/admin/profiler/disarm', methods=['POST'])
+@login_required
+def admin_profiler_disarm():
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    profiler.get_state().disarm()
+    return jsonify({"armed": None})
+
+@app.route('/api/admin/profiler/files/<name>')
+@login_required
+def admin_profiler_file(name):
+    """Downloads a profile artifact (.prof for pstats/snakeviz, .folded for flame graphs, .json summary)."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    path = profiler.artifact_path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
 
 # --- DEBUG ENDPOINT (admin only) ---
 @app.route('/api/debug')
@@ -193,7 +291,9 @@ def debug_endpoint():
     """Internal diagnostics — admin only."""    
     if getattr(current_user, 'role', 'user') != 'admin':
         return jsonify({"error": "Forbidden"}), 403
-    results = {"status": "running", "checks": {}}
+    import db_config
+    results = {"status": "running", "checks": {}, "user_cache": user_cache.stats(), "db": db_config.stats(),
+               "webhook_queue": webhook_queue.get_queue().stats()}
     
     # Check 1: Can we import data_fetcher?
     try:
@@ -240,41 +340,29 @@ def admin_dashboard():
     if getattr(current_user, 'role', 'user') != 'admin':
         return "Acesso Negado: Requer privilégios de Administrador.", 403
         
-    users = User.query.all()
-    active_count = 0
-    expired_count = 0
-    
-    # Process user data for template
-    processed_users = []
-    now = datetime.datetime.utcnow()
-    
-    for u in users:
-        is_active = False
-        days_left = 0
-        
-        if u.role == 'admin':
-            is_active = True
-            days_left = 9999
-        elif u.subscription_end and u.subscription_end > now:
-            is_active = True
-            delta = u.subscription_end - now
-            days_left = delta.days
-        else:
-            is_active = False
-            days_left = 0
-            
-        if is_active:
-            active_count += 1
-        else:
-            expired_count += 1
-            
-        # Attach temporary attributes for template rendering
-        # (We can't modify the SQLAlch object directly easily, so we use a wrapper or just setattr if it allows)
-        setattr(u, 'subscription_active', is_active)
-        setattr(u, 'days_left', days_left)
-        processed_users.append(u)
-        
-    return render_template('admin.html', users=processed_users, active_count=active_count, expired_count=expired_count)
+    # Aggregate counts + first page only (admin_users.py): cost independent of user count
+    page = admin_users.list_users()
+    return render_template('admin.html', users=page["items"], next_cursor=page["next_cursor"],
+                           summary=admin_users.summary())
+
+@app.route('/api/admin/users')
+@login_required
+def admin_users_api():
+    """Cursor-paginated user search for /admin: ?cursor=<last id>&q=<email part>&status=active|expired"""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        limit = int(request.args.get('limit', admin_users.DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "invalid cursor/limit"}), 400
+    page = admin_users.list_users(cursor=cursor, limit=limit, q=request.args.get('q'),
+                                  status=request.args.get('status') or None)
+    html = render_template('_admin_user_rows.html', users=page["items"])
+    for item in page["items"]:
+        end = item["subscription_end"]
+        item["subscription_end"] = end.isoformat() if end else None
+    return jsonify({"items": page["items"], "next_cursor": page["next_cursor"], "html": html})
 
 @app.route('/admin/renew/<int:user_id>', methods=['POST'])
 @login_required
@@ -289,6 +377,7 @@ def admin_renew_user(user_id):
     # Renew for 7 days from NOW
     user.subscription_end = datetime.datetime.utcnow() + datetime.timedelta(days=7)
     db.session.commit()
+    user_cache.invalidate(user.id)
     
     return redirect('/admin')
 
@@ -300,7 +389,26 @@ def admin_renew_user(user_id):
 def home():
     if not current_user.is_active_subscriber:
         return redirect(url_for('subscription_page'))
-    return render_template('index.html')
+    return _index_response()
+
+def _index_response():
+    """Pre-rendered index shell (revalidated by ETag); per-request render if the build failed."""
+    if index_shell is None:
+        return render_template('index.html')
+    resp = _payload_response(index_shell.shell_for(current_user))
+    resp.headers['Cache-Control'] = build_assets.SHELL_CACHE_CONTROL
+    return resp
+
+@app.route('/static/dist/<path:filename>')
+@login_required
+def dist_asset(filename):
+    """Content-hashed index CSS/JS from memory: the URL changes with the content, so cache forever."""
+    entry = index_shell.assets.get(filename) if index_shell is not None else None
+    if entry is None:
+        return Response(status=404)
+    resp = _payload_response(entry)
+    resp.headers['Cache-Control'] = build_assets.ASSET_CACHE_CONTROL
+    return resp
 
 @app.route('/login', methods=['GET'])
 def login_page():
@@ -317,6 +425,20 @@ def subscription_page():
 
 # --- API ENDPOINTS (DATA) ---
 
+def _payload_response(entry):
+    """Serves a payload_cache entry: Accept-Encoding negotiation, strong ETag, 304."""
+    encoding = payload_cache.negotiate(request.headers.get('Accept-Encoding'))
+    if payload_cache.etag_matches(request.headers.get('If-None-Match'), entry):
+        resp = Response(status=304)
+    else:
+        resp = Response(entry.variants[encoding], mimetype=entry.mimetype)
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+        payload_cache.record_sent(entry, encoding)
+    resp.headers['ETag'] = entry.variant_etag(encoding)
+    resp.headers['Vary'] = 'Accept-Encoding'
+    return resp
+
 @app.route('/api/games')
 @login_required
 @rate_limit(30, 60)  # 30 req/min
@@ -327,9 +449,18 @@ def games():
     # 🛡️ Validate date format to prevent injection
     if date and not re.match(r'^\d{4}-\d{2}-\d{2}$', date):
         return jsonify({"error": "Invalid date format"}), 400
+    since = request.args.get('since')
+    if since is not None and not since.isdigit():
+        return jsonify({"error": "Invalid since version"}), 400
     try:
         updates = data_fetcher.get_games_for_date(date)
-        return jsonify(updates)
+        slate_versions.record(date, updates)
+        if since is not None:
+            # Delta mode: only added/changed/removed games since that version
+            changes = slate_versions.delta(date, int(since))
+            if changes is not None:
+                return jsonify(changes)
+        return _payload_response(payload_cache.lookup(f"games_{date}", updates))
     except Exception as e:
         print(f"CRITICAL ERROR /api/games: {e}")
         traceback.print_exc()
@@ -340,13 +471,64 @@ def games():
             "message": "Erro ao carregar jogos."
         })
 
+@app.route('/api/stream/live')
+@login_required
+@rate_limit(30, 60)
+def stream_live():
+    """SSE: live scores + pick flips from the shared live_feed poller."""
+    if not current_user.is_active_subscriber: return jsonify({"error": "Subscription Required"}), 403
+    feed = live_feed.get_feed()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    # Held streams are capped per worker (thread budget, see live_feed.py); over the cap the
+    # subscriber gets the buffered events at once and EventSource reconnects after `retry`.
+    # The slot is taken inside the body, so a response that is never iterated can't leak it
+    resp = Response(feed.stream(last_event_id), mimetype='text/event-stream')
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
+
+HISTORY_AUTOUPDATE_SECONDS = int(os.environ.get('HISTORY_AUTOUPDATE_SECONDS', 120))
+
 @app.route('/api/history')
 @login_required
 @rate_limit(20, 60)  # 20 req/min
 def history():
     if not current_user.is_active_subscriber: return jsonify({"error": "Subscription Required"}), 403
-    data = data_fetcher.get_history_games()
-    return jsonify(data)
+    if not request.args:
+        # Legacy: full list (+ auto-update of today's results)
+        data = data_fetcher.get_history_games()
+        return jsonify(data)
+
+    # Indexed mode: cursor pagination + filters (history_index)
+    def csv_arg(name):
+        raw = request.args.get(name, '')
+        return [v.strip() for v in raw.split(',') if v.strip()] or None
+
+    try:
+        filters = {
+            "cursor": history_index.parse_cursor(request.args.get('cursor')),
+            "date_from": history_index.parse_date(request.args.get('date_from')),
+            "date_to": history_index.parse_date(request.args.get('date_to')),
+            "leagues": csv_arg('league'),
+            "statuses": csv_arg('status'),
+            "markets": csv_arg('market'),
+            "min_odd": float(request.args['min_odd']) if request.args.get('min_odd') else None,
+        }
+        limit = int(request.args.get('limit', history_index.DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Parâmetros de filtro inválidos"}), 400
+
+    if filters["cursor"] is None:
+        # Same-day auto-update the legacy path runs per request — throttled here, first page only
+        job_scheduler.run_if_due("history_autoupdate", HISTORY_AUTOUPDATE_SECONDS)
+    index = history_index.get_history_index()
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for entry in index.iter_matches(**filters):
+                yield json.dumps(entry, ensure_ascii=False) + "\n"
+        resp = Response(generate(), mimetype='application/x-ndjson')
+        resp.headers['Content-Disposition'] = 'attachment; filename="history.ndjson"'
+        return resp
+    return jsonify(index.query(limit=limit, **filters))
 
 @app.route('/api/history_stats')
 @login_required
@@ -417,7 +599,14 @@ def analyze_multiple():
 @rate_limit(20, 60)
 def leverage():
     if not current_user.is_active_subscriber: return jsonify({"error": "Subscription Required"}), 403
-    data = data_fetcher.get_leverage_plan()
+    try:
+        stake = float(request.args.get('stake', 10))
+        target_odd = float(request.args.get('target_odd', 1.25))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Parâmetros inválidos"}), 400
+    if not (1 <= stake <= 100000) or not (1.05 <= target_odd <= 3.0):
+        return jsonify({"status": "error", "message": "Parâmetros fora do intervalo"}), 400
+    data = data_fetcher.get_leverage_plan(stake, target_odd)
     return jsonify(data)
 
 # --- AUTH & PAYMENT ENDPOINTS ---
@@ -452,6 +641,21 @@ def login_api():
             "message": "Conta temporariamente bloqueada por tentativas excessivas. Aguarde 30 minutos."
         }), 429
     
+    # 🛡️ TARPIT: still inside the delay of a previous failure (this account or this IP)
+    # → refused at once, without touching the DB or holding the worker thread
+    client_ip = _get_client_ip()
+    ip_key = f"login_tarpit_ip:{client_ip}"
+    wait = max(login_tarpit.retry_after(account_key), login_tarpit.retry_after(ip_key))
+    if wait:
+        log_rate_limited(client_ip, "LOGIN_TARPIT")
+        resp = jsonify({
+            "status": "error",
+            "message": f"Muitas tentativas. Aguarde {wait}s para tentar novamente.",
+            "retry_after": wait,
+        })
+        resp.headers['Retry-After'] = str(wait)
+        return resp, 429
+    
     user = User.query.filter_by(email=email).first()
     
     if user and user.check_password(password):
@@ -464,14 +668,18 @@ def login_api():
         })
     
     # Failed login — record against the ACCOUNT (not just IP)
-    limiter.record_hit(account_key)
-    log_failed_login(_get_client_ip(), email)
+    limiter.record_hit(account_key, 1800)
+    log_failed_login(client_ip, email)
     
-    # 🛡️ PROGRESSIVE DELAY: slow down automated tools (1s per failure, max 5s)
+    # 🛡️ PROGRESSIVE DELAY: slow down automated tools (1s per failure, max 5s).
+    # Tarpit deadline instead of time.sleep — the next attempt before it gets 429.
     delay = min(failed_count + 1, 5)
-    time.sleep(delay)
+    login_tarpit.hold(account_key, delay)
+    login_tarpit.hold(ip_key, delay)
     
-    return jsonify({"status": "error", "message": "Credenciais inv\u00e1lidas"}), 401
+    resp = jsonify({"status": "error", "message": "Credenciais inv\u00e1lidas", "retry_after": delay})
+    resp.headers['Retry-After'] = str(delay)
+    return resp, 401
 
 @app.route('/api/register', methods=['POST'])
 @rate_limit(3, 3600)  # Per-IP: 3 per hour
@@ -520,6 +728,7 @@ def register_api():
     new_user.set_password(password)
     db.session.add(new_user)
     db.session.commit()
+    user_cache.invalidate(new_user.id)  # refreshes the /admin summary in every worker
     
     login_user(new_user)
     session.permanent = True
@@ -580,6 +789,7 @@ def reset_password_api():
     user.set_password(new_password)
     user.reset_code = None
     db.session.commit()
+    user_cache.invalidate(user.id)
     
     return jsonify({"status": "success", "message": "Senha alterada com sucesso."})
 
@@ -595,6 +805,36 @@ def admin_security_dashboard():
     report["server_time"] = datetime.datetime.utcnow().isoformat()
     return jsonify(report)
 
+@app.route('/api/admin/what_if')
+@login_required
+@rate_limit(20, 60)
+def admin_what_if():
+    """🧪 Threshold what-if grid over resolved history — admin only."""
+    if getattr(current_user, 'role', 'user') != 'admin':
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+
+    import threshold_lab
+
+    def _csv(name):
+        raw = request.args.get(name, '')
+        return [v.strip() for v in raw.split(',') if v.strip()] or None
+
+    try:
+        report = threshold_lab.evaluate_threshold_grid(
+            min_probs=threshold_lab.parse_grid_param(request.args.get('min_prob')),
+            min_safety=threshold_lab.parse_grid_param(request.args.get('min_safety')),
+            min_odds=threshold_lab.parse_grid_param(request.args.get('min_odd')),
+            max_odds=threshold_lab.parse_grid_param(request.args.get('max_odd')),
+            leagues=_csv('league'),
+            markets=_csv('market'),
+            odds_ranges=_csv('odds_range'),
+            group_by=request.args.get('group_by') or None,
+            heatmap_axes=tuple(request.args.get('heatmap', 'min_prob,min_safety').split(',')[:2]),
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify(report)
+
 @app.route('/api/logout')
 @login_required
 def logout_api():
@@ -643,13 +883,20 @@ def mp_webhook():
     # 🛡️ WEBHOOK SIGNATURE VERIFICATION (MercadoPago HMAC-SHA256)
     webhook_secret = os.environ.get('MP_WEBHOOK_SECRET', '')
     
-    if request.method == 'POST' and webhook_secret:
+    # With a secret EVERY notification must be signed (GET included: an unsigned
+    # ?topic=payment&id=... would otherwise land in the durable queue). Without one
+    # nothing can be verified, so only Mercado Pago's POST webhooks are accepted.
+    data_id = request.args.get('data.id', '')
+    if not webhook_secret and request.method != 'POST':
+        print(f"Webhook ignored: unsigned {request.method} (MP_WEBHOOK_SECRET not set)")
+        return jsonify({"status": "ignored"}), 200
+
+    if webhook_secret:
         import hmac
         import hashlib
         
         x_signature = request.headers.get('x-signature', '')
         x_request_id = request.headers.get('x-request-id', '')
-        data_id = request.args.get('data.id', '')
         
         if not x_signature:
             log_suspicious_activity(_get_client_ip(), "Webhook without x-signature header")
@@ -686,29 +933,26 @@ def mp_webhook():
         
         print(f"Webhook signature VERIFIED for data.id={data_id}")
     
-    # Process the webhook notification
+    # Persist the notification and answer at once; the "mp_webhooks" job queries
+    # Mercado Pago and applies it idempotently (webhook_queue.py)
     topic = request.args.get('topic') or request.args.get('type')
-    p_id = request.args.get('id') or request.args.get('data.id')
+    # Signed → only the id covered by the HMAC manifest
+    p_id = data_id if webhook_secret else (request.args.get('id') or data_id)
 
     if topic == 'payment' and p_id:
-        print(f"Checking payment {p_id}...")
         try:
-            payment_info = mp_manager.check_payment_status(p_id)
-            print(f"Payment Status: {payment_info['status']}")
-            
-            if payment_info['status'] == 'approved':
-                payer_email = payment_info['payer']['email']
-                user = User.query.filter_by(email=payer_email).first()
-                if user:
-                    user.subscription_end = datetime.datetime.utcnow() + datetime.timedelta(days=7)
-                    db.session.commit()
-                    print(f"Subscription ACTIVATED for {user.email}")
-                else:
-                    print(f"User not found for email {payer_email}")
+            queued = webhook_queue.get_queue().enqueue(p_id, topic)
+        except webhook_queue.QueueFull as e:
+            # Cap reached → 503 so Mercado Pago redelivers once the queue drains
+            print(f"Webhook Queue Full: {e}")
+            return jsonify({"status": "busy"}), 503
         except Exception as e:
-            print(f"Webhook Processing Error: {e}")
+            # Not persisted → non-2xx so Mercado Pago retries the notification
+            print(f"Webhook Queue Error: {e}")
             traceback.print_exc()
             return jsonify({"status": "error"}), 500
+        print(f"Payment {p_id} {'queued' if queued else 'already queued'}")
+        job_scheduler.enqueue("mp_webhooks")
                 
     return jsonify({"status": "ok"}), 200
 
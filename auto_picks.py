@@ -18,6 +18,9 @@ import numpy as np
 import math
 import random
 import time as _time
+import log_config
+import metrics
+import profiler
 import sys
 import os
 CACHE_DIR = "cache"
@@ -31,6 +34,10 @@ try:
 except:
     pass
 
+from treble_optimizer import optimize_tickets
+from joint_sim import ticket_reranker
+from prop_engine import project_slate, game_key as prop_game_key, sides_from_game as prop_sides_from_game
+
 # Import turbo parallel fetcher
 try:
     from turbo_fetcher import (
@@ -43,7 +50,10 @@ try:
     TURBO_ACTIVE = True
 except ImportError:
     TURBO_ACTIVE = False
-    print("[AUTO-ENGINE] ⚠️ turbo_fetcher not found, falling back to sequential")
+
+log = log_config.get_logger("auto_picks")
+if not TURBO_ACTIVE:
+    log.warning("[AUTO-ENGINE] ⚠️ turbo_fetcher not found, falling back to sequential")
 
 # ══════════════════════════════════════════════
 # SECTION 1: POWER RATINGS (Source: ESPN Feb 11 2026)
@@ -256,9 +266,9 @@ def fetch_espn_schedule(target_date):
                 except:
                     continue
         except Exception as e:
-            print(f"[AUTO] ESPN error {league['name']}: {e}")
+            log.warning("[AUTO] ESPN error", league=league['name'], error=str(e))
             continue
-    print(f"[AUTO-ENGINE] ESPN retornou {len(games)} jogos para {target_date}")
+    log.info("[AUTO-ENGINE] ESPN schedule (sequential)", games=len(games), date=target_date)
     return games
 
 
@@ -331,8 +341,16 @@ def prob_to_odd(prob_pct):
     return max(1.01, min(20.0, raw))
 
 
-def generate_nba_tip(game, sim):
-    """Gera melhor tip para jogo NBA. Prioriza Player Props se hover valor; fallback para ML/Over."""
+def _nba_def_rating(team):
+    """Opponent defense multiplier for props from NBA_POWER (1 = average, >1 = weak defense)."""
+    return max(0.90, min(1.10, 1 + (75 - NBA_POWER.get(team, 75)) * 0.005))
+
+
+def generate_nba_tip(game, sim, prop_board=None):
+    """
+    Gera melhor tip para jogo NBA. Prioriza Player Props se hover valor; fallback para ML/Over.
+    prop_board: PropBoard do slate (prop_engine); a melhor prop do jogo é a de maior edge.
+    """
     home, away = game["home"], game["away"]
     h_prob, a_prob = sim["home_prob"], sim["away_prob"]
     total_avg = sim["total_avg"]
@@ -344,84 +362,40 @@ def generate_nba_tip(game, sim):
     odd_a = prob_to_odd(a_prob)
     
     # 1. TENTATIVA DE PLAYER PROP (Prioridade Máxima para NBA - Meta 80% Green)
-    # Procurar nas estruturas do 365Scores se temos projetores de Props explodindo.
-    intel_data = game.get("_team_intel", {})
-    home_intel = intel_data.get("home", {})
-    away_intel = intel_data.get("away", {})
-    
-    # Acessar a engine (já foi chamada no turbo_fetcher, então vamos ler os 'top_performers' injetados)
-    from ai_engine import simulate_player_props
+    # Distribuições do prop_engine: board do slate inteiro (get_auto_games) ou,
+    # se o jogo não estiver nele, um board só deste jogo.
+    key = prop_game_key(home, away)
+    if prop_board is None or not any(r["game_key"] == key for r in prop_board.rows):
+        prop_board = project_slate(
+            prop_sides_from_game(game, _nba_def_rating(away), _nba_def_rating(home)),
+            live_odds=game.get("_live_odds", {}),
+        )
     
     best_prop = None
-    best_prop_val = 0
-    
-    for team_intel, is_home in [(home_intel, True), (away_intel, False)]:
-        team_name = home if is_home else away
-        starters = team_intel.get("starters", [])
-        missing = team_intel.get("missing", [])
-        # Extrair odds reais se disponíveis (The-Odds-API)
-        live_odds = game.get("_live_odds", {})
-
-        # Simular Props para todos os titulares usando a nova Engine
-        for player in starters:
-            prop_sim = simulate_player_props(player, missing, opponent_defense_rating=1.0) # Def rating placeholder
-            if prop_sim:
-                pts = prop_sim["projected_pts"]
-                avg_pts = player.get("avg_pts", 0)
-                
-                is_value = prop_sim.get("is_value", False)
-                p_name = player.get("name", "")
-                
-                # Check for REAL bookmaker lines
-                real_line_data = None
-                p_aliases = [p_name, p_name.split(" ")[-1], player.get("short_name", "")]
-                
-                for alias in p_aliases:
-                    if alias and alias in live_odds:
-                        # Tenta pegar linha do pinnacle ou bet365, ou a primeira que vier
-                        lines_dict = live_odds[alias].get("lines", {})
-                        if "pinnacle" in lines_dict:
-                             real_line_data = lines_dict["pinnacle"].get("Over")
-                        elif "bet365" in lines_dict:
-                             real_line_data = lines_dict["bet365"].get("Over")
-                        elif lines_dict:
-                             first_bm = list(lines_dict.keys())[0]
-                             real_line_data = lines_dict[first_bm].get("Over")
-                        break
-
-                # Estimar a linha padrão se não houver linha real
-                proj_line = real_line_data["val"] if real_line_data else round(max(14.5, avg_pts - 1.5) * 2) / 2
-                
-                # Assign a common baseline odd (1.80 to 1.90 is typical for an Over line)
-                prop_odd = real_line_data["odd"] if real_line_data else 1.85
-                
-                # O Score de valor agora respeita a linha REAL (ou estimada AI EV)
-                diff = pts - proj_line
-                prop_score = diff * 5 + avg_pts  # Combina potencial de explosao com média base
-                
-                if prop_score > best_prop_val and pts > 15:
-                    best_prop_val = prop_score
-                    if pts >= proj_line + 1.0: # Softened threshold to allow more +EV edge
-                        reason = prop_sim["reasons"][0] if prop_sim["reasons"] else f"Média de {avg_pts:.1f} PTS."
-                        
-                        # Penalidade de probabilidade se odds forem muito justas (< 1.60)
-                        prob_penalty = 0 if prop_odd >= 1.70 else 5
-                        prob_calc = min(92, 70 + int(diff * 3)) - prob_penalty
-                        
-                        best_prop = {
-                            "market": "Mercado de Jogadores",
-                            "selection": f"{p_name} Over {proj_line:.1f} Pontos",
-                            "prob": prob_calc,
-                            "odd": prop_odd, 
-                            "reason": f"🏀 [PROP SNIPER] {team_name}: {reason} Projeção: {pts:.1f}",
-                            "badge": "🎯 PROP SNIPER" if not is_value else "🔥 ALPHA DOG",
-                        }
-                        # DEBUG
-                        print(f"[DEBUG PROPS] Found potential: {p_name} Pts: {pts:.1f} (Line: {proj_line:.1f}) -> Score: {prop_score:.1f}, Prob: {prob_calc}% (Odd: {prop_odd})")
+    for prop in prop_board.props("pts", game=key, min_mean=15):
+        # Softened threshold to allow more +EV edge
+        if prop["mean"] < prop["line"] + 1.0:
+            continue
+        team_name = prop["team"]
+        reason = prop["reasons"][0] if prop["reasons"] else f"Média de {prop['avg']:.1f} PTS."
+        prob_calc = min(92, int(round(prop["p_over"] * 100)))
+        
+        best_prop = {
+            "market": "Mercado de Jogadores",
+            "selection": f"{prop['player']} Over {prop['line']:.1f} Pontos",
+            "prob": prob_calc,
+            "odd": prop["odd"], 
+            "reason": f"🏀 [PROP SNIPER] {team_name}: {reason} Projeção: {prop['mean']:.1f} (P10-P90: {prop['p10']:.0f}-{prop['p90']:.0f})",
+            "badge": "🎯 PROP SNIPER" if not prop["reasons"] else "🔥 ALPHA DOG",
+        }
+        # DEBUG
+        log.debug("[PROPS] Found potential", player=prop['player'], mean=round(prop['mean'], 1), line=prop['line'],
+                  line_source=prop['line_source'], edge=round(prop['edge'], 2), prob=prob_calc, odd=prop['odd'])
+        break
 
     # Se achou uma Tip de Prop com alta probabilidade, ela reduz a chance do ML aparecer
     if best_prop:
-         print(f"[DEBUG PROPS] GAME {home} vs {away} BEST PROP: {best_prop['selection']} with Prob: {best_prop['prob']}%")
+         log.debug("[PROPS] Best prop", game=f"{home} vs {away}", selection=best_prop['selection'], prob=best_prop['prob'])
          # NBA player props are highly volatile but high value. Lowering threshold to 65% to pass EV models.
          if best_prop["prob"] >= 65:
              return best_prop, True, odd_h, 0, odd_a
@@ -637,6 +611,28 @@ MARKET_SAFETY = {
 }
 
 
+# Combo tiers for the optimal search (treble_optimizer.optimize_tickets)
+# max_per_league is tried in order: strict first, relaxed only if nothing fits
+TREBLE_TIERS = [
+    {
+        "name": "🛡️ BUNKER BLINDADO", "title": "🛡️ BUNKER BLINDADO",
+        "legs": 2, "min_safety": 55,  # Aumentado safety mínimo de 42 para 55
+        "objective": "prob",          # Target: 85-95% combined probability
+        "max_per_league": (1, 2),
+    },
+    {
+        "name": "🏰 FORTRESS (3-LEGS)", "title": "🏰 FORTRESS",
+        "legs": 3, "min_safety": 48,  # Aumentado safety mínimo de 38 para 48
+        "objective": "ev",            # Mix of DC + ML for better odds
+        "max_per_league": (2,),       # Same rule as _diversification_check
+        "min_total_odd": 1.50, "max_total_odd": 4.00,
+    },
+]
+
+# Non-overlapping tickets returned per tier
+TREBLE_TOP_K = 2
+
+
 def _calc_safety_score(game):
     """
     Calculate a composite safety score (0-100) for treble inclusion.
@@ -745,9 +741,44 @@ def _diversification_check(picks):
     return all(count <= 2 for count in league_count.values())
 
 
-def build_trebles(processed_games):
+def _format_treble(tier, picks, rank=1, joint_prob=None):
+    """
+    Builds the treble payload (frontend + history_trebles.json format).
+    Uses the simulated joint probability when available, else the discount table.
+    """
+    total_odd = 1
+    sels = []
+    for p in picks:
+        total_odd *= float(p["best_tip"]["odd"])
+        sels.append({
+            "match": f"{p['away_team']} @ {p['home_team']}", 
+            "pick": f"{p['best_tip']['selection']} (@{p['best_tip']['odd']})",
+            "league": p.get("league", ""),
+            "prob": p["best_tip"]["prob"]
+        })
+    
+    if joint_prob is not None:
+        combo_prob = int(round(joint_prob * 100))
+    else:
+        combo_prob = _calc_combo_probability(picks)
+    name = tier["name"] if rank == 1 else f"{tier['name']} #{rank}"
+    
+    return {
+        "name": name,
+        "total_odd": f"{total_odd:.2f}",
+        "probability": f"{combo_prob}%",
+        "selections": sels,
+        "copy_text": (
+            f"{tier['title']} (Safety: {combo_prob}%)\n" + 
+            "\n".join([f"• {s['pick']} [{s['league']}]" for s in sels]) + 
+            f"\n💰 Odd Total: {total_odd:.2f}"
+        )
+    }
+
+
+def build_trebles(processed_games, top_k=TREBLE_TOP_K):
     """
-    FORTRESS TREBLE BUILDER v3.0 🏰
+    FORTRESS TREBLE BUILDER v4.0 🏰
     
     7-Layer intelligence for 90%+ green rate:
     1. FORTRESS filter: prob >= 68, no traps, no EV GATE
@@ -756,7 +787,8 @@ def build_trebles(processed_games):
     4. Diversification (no same-league stacking)
     5. Market quality hierarchy (DC > ML > Over)
     6. Smart safety scoring
-    7. Three treble tiers: BUNKER, FORTRESS, VALUE
+    7. Optimal combo search per tier (BUNKER, FORTRESS), top_k non-overlapping tickets each,
+       ranked on the correlated joint probability (joint_sim)
     """
     trebles = []
     
@@ -795,10 +827,11 @@ def build_trebles(processed_games):
     # Sort by safety score (highest = safest)
     fortress_pool.sort(key=lambda x: x.get("_safety_score", 0), reverse=True)
     
-    print(f"[TREBLE-ENGINE] 🏰 Fortress pool: {len(fortress_pool)} picks (from {len(processed_games)} total)")
+    log.debug("[TREBLE-ENGINE] 🏰 Fortress pool", picks=len(fortress_pool), total=len(processed_games))
     for g in fortress_pool[:5]:
-        print(f"  → {g['home_team']} vs {g['away_team']}: {g['best_tip']['selection']} "
-              f"(prob:{g['best_tip']['prob']}%, safety:{g.get('_safety_score', 0):.0f})")
+        log.debug("[TREBLE-ENGINE] Fortress pick", game=f"{g['home_team']} vs {g['away_team']}",
+                  selection=g['best_tip']['selection'], prob=g['best_tip']['prob'],
+                  safety=round(g.get('_safety_score', 0)))
     
     # Categorize picks
     ml_keywords = ["vence", "ml", "ou empate", "dupla chance", "vitória", "win"]
@@ -821,105 +854,46 @@ def build_trebles(processed_games):
     safe_picks = safe_unique
     
     # ═══════════════════════════════════════
-    # TREBLE 1: 🛡️ BUNKER (2-leg, ultra-safe)
-    # Target: 85-95% combined probability
-    # Only DC picks or very high ML picks
+    # TREBLES: 🛡️ BUNKER (2-leg) + 🏰 FORTRESS (3-leg)
+    # Optimal search over the fortress pool (treble_optimizer) instead of
+    # greedily taking the first safest picks: every viable combination is
+    # considered under the tier's league and odd constraints.
     # ═══════════════════════════════════════
     
-    # Aumentado safety mínimo de 42 para 55
-    bunker_candidates = [g for g in fortress_pool if g.get("_safety_score", 0) >= 55]
-    
-    if len(bunker_candidates) >= 2:
-        # Pick the 2 safest, ensuring diversification
-        picks = []
-        used_leagues = set()
-        for g in bunker_candidates:
-            if len(picks) >= 2:
-                break
-            league = g.get("league", "")
-            # Allow max 1 per league in BUNKER
-            if league in used_leagues and len(bunker_candidates) > 3:
-                continue
-            picks.append(g)
-            used_leagues.add(league)
+    for tier in TREBLE_TIERS:
+        candidates = [g for g in fortress_pool if g.get("_safety_score", 0) >= tier["min_safety"]]
+        if len(candidates) < tier["legs"]:
+            continue
         
-        if len(picks) >= 2:
-            total_odd = 1
-            sels = []
-            for p in picks:
-                total_odd *= float(p["best_tip"]["odd"])
-                sels.append({
-                    "match": f"{p['away_team']} @ {p['home_team']}", 
-                    "pick": f"{p['best_tip']['selection']} (@{p['best_tip']['odd']})",
-                    "league": p.get("league", ""),
-                    "prob": p["best_tip"]["prob"]
-                })
-            
-            combo_prob = _calc_combo_probability(picks)
-            
-            trebles.append({
-                "name": "🛡️ BUNKER BLINDADO",
-                "total_odd": f"{total_odd:.2f}",
-                "probability": f"{combo_prob}%",
-                "selections": sels,
-                "copy_text": (
-                    f"🛡️ BUNKER BLINDADO (Safety: {combo_prob}%)\n" + 
-                    "\n".join([f"• {s['pick']} [{s['league']}]" for s in sels]) + 
-                    f"\n💰 Odd Total: {total_odd:.2f}"
-                )
-            })
-            print(f"[TREBLE-ENGINE] 🛡️ BUNKER: {combo_prob}% @ {total_odd:.2f}")
-    
-    # ═══════════════════════════════════════
-    # TREBLE 2: 🏰 FORTRESS (3-leg, balanced)
-    # Target: 65-80% combined probability
-    # Mix of DC + ML for better odds
-    # ═══════════════════════════════════════
-    
-    # Aumentado safety mínimo de 38 para 48
-    fortress_candidates = [g for g in fortress_pool if g.get("_safety_score", 0) >= 48]
-    
-    if len(fortress_candidates) >= 3:
-        picks = []
-        used_leagues = set()
-        for g in fortress_candidates:
-            if len(picks) >= 3:
+        # Shortlist by the fast objective, then rank on the correlated joint probability
+        try:
+            rerank = ticket_reranker(candidates, tier["objective"])
+        except Exception as e:
+            log.warning("[TREBLE-ENGINE] Joint sim indisponível — usando desconto fixo", error=str(e))
+            rerank = None
+        
+        tickets = []
+        for max_per_league in tier["max_per_league"]:
+            tickets = optimize_tickets(
+                candidates, tier["legs"],
+                objective=tier["objective"],
+                max_per_league=max_per_league,
+                min_total_odd=tier.get("min_total_odd"),
+                max_total_odd=tier.get("max_total_odd"),
+                top_k=top_k,
+                rerank=rerank,
+            )
+            if tickets:
                 break
-            league = g.get("league", "")
-            if league in used_leagues and len(fortress_candidates) > 5:
-                continue
-            picks.append(g)
-            used_leagues.add(league)
         
-        if len(picks) >= 3 and _diversification_check(picks):
-            total_odd = 1
-            sels = []
-            for p in picks:
-                total_odd *= float(p["best_tip"]["odd"])
-                sels.append({
-                    "match": f"{p['away_team']} @ {p['home_team']}", 
-                    "pick": f"{p['best_tip']['selection']} (@{p['best_tip']['odd']})",
-                    "league": p.get("league", ""),
-                    "prob": p["best_tip"]["prob"]
-                })
-            
-            combo_prob = _calc_combo_probability(picks)
-            
-            trebles.append({
-                "name": "🏰 FORTRESS (3-LEGS)",
-                "total_odd": f"{total_odd:.2f}",
-                "probability": f"{combo_prob}%",
-                "selections": sels,
-                "copy_text": (
-                    f"🏰 FORTRESS (Safety: {combo_prob}%)\n" + 
-                    "\n".join([f"• {s['pick']} [{s['league']}]" for s in sels]) + 
-                    f"\n💰 Odd Total: {total_odd:.2f}"
-                )
-            })
-            print(f"[TREBLE-ENGINE] 🏰 FORTRESS: {combo_prob}% @ {total_odd:.2f}")
+        for rank, ticket in enumerate(tickets, start=1):
+            treble = _format_treble(tier, ticket["picks"], rank, ticket.get("joint_prob"))
+            trebles.append(treble)
+            log.debug("[TREBLE-ENGINE] Treble", tier=tier['title'], probability=treble['probability'],
+                      total_odd=treble['total_odd'])
     
     if not trebles:
-        print("[TREBLE-ENGINE] ⚠️ No trebles built — insufficient fortress-quality picks")
+        log.warning("[TREBLE-ENGINE] ⚠️ No trebles built — insufficient fortress-quality picks")
     
     return trebles
 
@@ -931,8 +905,9 @@ def build_trebles(processed_games):
 # ═══════════════════════════════════════════════════
 # THROTTLED LEARNING (max once per 10 min)
 # ═══════════════════════════════════════════════════
-_last_study_time = 0
+STUDY_MIN_INTERVAL = 600
 
+@profiler.pipeline("auto_picks.get_auto_games")
 def get_auto_games(target_date):
     """
     Entrada principal do Auto Engine v2.0 TURBO ⚡
@@ -942,12 +917,25 @@ def get_auto_games(target_date):
     - ESPN fetch paralelo (10 ligas simultâneas)
     - 365Scores intelligence paralelo (todos jogos simultâneos)
     - News Agent paralelo (todos times simultâneos)
-    - study_results() com throttle (máx 1x/10min)
+    - study_results() com throttle (máx 1x/10min, job "study_results" do scheduler)
     - Calibração cacheada
+
+    LOG: uma linha de resumo por execução (log_config.run: contadores + tempos
+    de etapa); o detalhe por jogo sai em DEBUG.
     """
-    global _last_study_time
+    with log_config.run("auto_picks", logger=log, date=target_date) as run:
+        return _get_auto_games(target_date, run)
+
+
+def _stage(run, name, seconds):
+    """Stage timing → Prometheus histogram (metrics.py) + the run summary line."""
+    metrics.observe_stage(f"auto_picks.{name}", seconds)
+    run.stage(name, seconds)
+
+
+def _get_auto_games(target_date, run):
     t_total_start = _time.time()
-    print(f"[AUTO-ENGINE] 🤖⚡ Gerando picks TURBO para {target_date}...")
+    log.debug("[AUTO-ENGINE] 🤖⚡ Gerando picks TURBO")
 
     # ══════════════════════════════════════════════
     # IMPORT ALL SPECIALIST MODULES (THE FULL FUNNEL)
@@ -962,23 +950,23 @@ def get_auto_games(target_date):
             coach_tactical_matrix,
         )
         FUNNEL_ACTIVE = True
-        print("[AUTO-ENGINE] ✅ AI Engine CONNECTED (+ GOD MODE + LAUNDROMAT + COACH DNA)")
+        log.debug("[AUTO-ENGINE] ✅ AI Engine CONNECTED (+ GOD MODE + LAUNDROMAT + COACH DNA)")
     except Exception as e:
-        print(f"[AUTO-ENGINE] ⚠️ AI Engine not available: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ AI Engine not available", error=str(e))
         FUNNEL_ACTIVE = False
 
     try:
         from specialized_modules import tracker_sharp_money
         SHARP_MONEY_ACTIVE = True
-        print("[AUTO-ENGINE] ✅ Sharp Money Tracker CONNECTED")
+        log.debug("[AUTO-ENGINE] ✅ Sharp Money Tracker CONNECTED")
     except Exception as e:
         SHARP_MONEY_ACTIVE = False
-        print(f"[AUTO-ENGINE] ⚠️ Sharp Money not available: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ Sharp Money not available", error=str(e))
 
     try:
         from knowledge_base import SPORTS_KNOWLEDGE
         KB_ACTIVE = True
-        print(f"[AUTO-ENGINE] ✅ Knowledge Base CONNECTED ({len(SPORTS_KNOWLEDGE)} teams)")
+        log.debug("[AUTO-ENGINE] ✅ Knowledge Base CONNECTED", teams=len(SPORTS_KNOWLEDGE))
     except Exception as e:
         SPORTS_KNOWLEDGE = {}
         KB_ACTIVE = False
@@ -988,26 +976,28 @@ def get_auto_games(target_date):
     try:
         from scores365 import get_lineup_intelligence
         SCORES365_ACTIVE = True
-        print("[AUTO-ENGINE] ✅ 365Scores Intelligence CONNECTED")
+        log.debug("[AUTO-ENGINE] ✅ 365Scores Intelligence CONNECTED")
     except Exception as e:
         SCORES365_ACTIVE = False
         get_lineup_intelligence = None
-        print(f"[AUTO-ENGINE] ⚠️ 365Scores not available: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ 365Scores not available", error=str(e))
 
     try:
-        from self_learning import apply_learning_correction, study_results, get_learning_summary, get_active_thresholds
+        from self_learning import apply_learning_correction, get_learning_summary, get_active_thresholds
+        from scheduler import get_scheduler
         LEARNING_ACTIVE = True
         # THROTTLED: Only study once per 10 minutes
-        now = _time.time()
-        if (now - _last_study_time) > 600:
-            study_results()
-            _last_study_time = now
+        study = get_scheduler().run_if_due("study_results", STUDY_MIN_INTERVAL)
+        if study == "error":
+            log.warning("[AUTO-ENGINE] ⚠️ Self-Learning study failed, using last learned state")
+        if study == "ok":
             summary = get_learning_summary()
             learned_thresholds = get_active_thresholds()
-            print(f"[AUTO-ENGINE] ✅ Self-Learning: {summary.get('corrections_active', 0)} correções | Sniper: {learned_thresholds.get('sniper')}%")
+            log.info("[AUTO-ENGINE] ✅ Self-Learning studied", corrections=summary.get('corrections_active', 0),
+                     sniper=learned_thresholds.get('sniper'))
         else:
             learned_thresholds = get_active_thresholds()
-            print(f"[AUTO-ENGINE] ✅ Self-Learning CACHED (Sniper: {learned_thresholds.get('sniper')}%)")
+            log.debug("[AUTO-ENGINE] ✅ Self-Learning CACHED", sniper=learned_thresholds.get('sniper'))
             
         # Global learning state for downstream filtering
         from self_learning import get_learning_state
@@ -1015,7 +1005,7 @@ def get_auto_games(target_date):
     except Exception as e:
         LEARNING_ACTIVE = False
         GLOBAL_LEARNING = {}
-        print(f"[AUTO-ENGINE] ⚠️ Self-Learning not available: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ Self-Learning not available", error=str(e))
 
     # ══════════════════════════════════════════════
     # STAGE 0: PARALLEL DATA FETCH (All I/O at once)
@@ -1032,21 +1022,57 @@ def get_auto_games(target_date):
     
     raw_games = fetch_espn_schedule(target_date)
     if not raw_games:
-        print("[AUTO-ENGINE] ⚠️ Nenhum jogo encontrado na ESPN")
+        log.warning("[AUTO-ENGINE] ⚠️ Nenhum jogo encontrado na ESPN")
         return {"games": [], "trebles": []}
     
     t_espn = _time.time() - t0
-    print(f"[AUTO-ENGINE] ⚡ ESPN: {len(raw_games)} games in {t_espn:.1f}s")
+    _stage(run, "espn_schedule", t_espn)
+    run.count("games", len(raw_games))
 
     # 2. Pre-fetch 365Scores intelligence for ALL games in PARALLEL
+    t_stage = _time.time()
     intel_map = {}
     if SCORES365_ACTIVE and TURBO_ACTIVE and get_lineup_intelligence:
         try:
             intel_map = fetch_365_intelligence_parallel(raw_games, target_date, get_lineup_intelligence)
         except Exception as e:
-            print(f"[AUTO-ENGINE] ⚠️ Parallel 365S failed: {e}")
+            log.warning("[AUTO-ENGINE] ⚠️ Parallel 365S failed", error=str(e))
+    
+    _stage(run, "intel_365", _time.time() - t_stage)
+
+    # 2.5 Slate-wide prop board: every NBA starter projected in one vectorized pass
+    t_stage = _time.time()
+    prop_board = None
+    top_props = []
+    nba_games = [g for g in raw_games if g["sport"] == "basketball" and intel_map.get(g["home"])]
+    if nba_games:
+        try:
+            from odds_api import get_nba_player_props
+            live_props = get_nba_player_props(target_date, "player_points")
+        except Exception:
+            live_props = {}
+        try:
+            sides = []
+            for g in nba_games:
+                intel = intel_map[g["home"]]
+                sides.extend(prop_sides_from_game({
+                    "home": g["home"], "away": g["away"],
+                    "_team_intel": {
+                        "home": {"starters": intel.get("home_starters", []), "missing": intel.get("home_missing", [])},
+                        "away": {"starters": intel.get("away_starters", []), "missing": intel.get("away_missing", [])},
+                    },
+                }, _nba_def_rating(g["away"]), _nba_def_rating(g["home"])))
+            prop_board = project_slate(sides, live_odds=live_props)
+            top_props = prop_board.top(10)
+            run.count("prop_starters", len(prop_board))
+            for p in top_props[:3]:
+                log.debug("[AUTO-ENGINE] 🏀 Top prop", player=p['player'], line=p['line'], line_source=p['line_source'],
+                          p_over=round(p['p_over'], 3), edge=round(p['edge'], 2))
+        except Exception as e:
+            log.warning("[AUTO-ENGINE] ⚠️ Prop board error", error=str(e))
     
-    print(f"[AUTO-ENGINE] 📡 {len(raw_games)} jogos. Processando FUNIL TURBO...")
+    _stage(run, "prop_board", _time.time() - t_stage)
+    t_stage = _time.time()
 
     # 2. Gera tips para cada jogo — FULL FUNNEL PIPELINE
     processed = []
@@ -1066,7 +1092,7 @@ def get_auto_games(target_date):
                     # Fetch odds once per run and cache in the first game object (or pass globally)
                     game["_live_odds"] = get_nba_player_props(target_date, "player_points")
             except Exception as e:
-                print(f"[AUTO-ENGINE] ⚠️ Stage 0.5 OddsAPI error: {e}")
+                log.warning("[AUTO-ENGINE] ⚠️ Stage 0.5 OddsAPI error", game=f"{home} vs {away}", error=str(e))
                 
             # 2. Inject 365Scores Lineups
             if SCORES365_ACTIVE:
@@ -1094,16 +1120,17 @@ def get_auto_games(target_date):
                         if sport == "basketball":
                             h_st = len(game["_team_intel"]["home"]["starters"])
                             a_st = len(game["_team_intel"]["away"]["starters"])
-                            print(f"[DEBUG PIPELINE] {home} (Starters: {h_st}) vs {away} (Starters: {a_st}) injected")
+                            log.debug("[PIPELINE] Lineups injected", game=f"{home} vs {away}",
+                                      home_starters=h_st, away_starters=a_st)
                 except Exception as e:
-                    print(f"[AUTO-ENGINE] ⚠️ Stage 0.5 Lineups error for {home}: {e}")
+                    log.warning("[AUTO-ENGINE] ⚠️ Stage 0.5 Lineups error", game=f"{home} vs {away}", error=str(e))
 
             # ─── STAGE 1: RAW SIMULATION (Poisson / Monte Carlo) ───
             if sport == "basketball":
                 h_pow = NBA_POWER.get(home, 75)
                 a_pow = NBA_POWER.get(away, 75)
                 sim = monte_carlo_nba(h_pow, a_pow)
-                tip, is_sniper, oh, od, oa = generate_nba_tip(game, sim)
+                tip, is_sniper, oh, od, oa = generate_nba_tip(game, sim, prop_board)
             else:
                 h_pow = FOOTBALL_POWER.get(home, 70)
                 a_pow = FOOTBALL_POWER.get(away, 70)
@@ -1244,7 +1271,7 @@ def get_auto_games(target_date):
                                 funnel_notes.append(fact)
                                 break
                 except Exception as e:
-                    print(f"[AUTO-ENGINE] ⚠️ 365Scores error for {home}: {e}")
+                    log.warning("[AUTO-ENGINE] ⚠️ 365Scores error", game=f"{home} vs {away}", error=str(e))
 
             # ─── STAGE 4: TRAP HUNTER (detect suspicious odds) ───
             if FUNNEL_ACTIVE:
@@ -1282,7 +1309,8 @@ def get_auto_games(target_date):
                         tip["badge"] = "🔐 GOD MODE"
                         for gr in god_reasons[:2]:
                             funnel_notes.append(gr)
-                        print(f"[AUTO-ENGINE] 🔐 GOD MODE ACTIVATED: {home} vs {away} (+{god_boost}%)")
+                        run.count("god_mode")
+                        log.debug("[AUTO-ENGINE] 🔐 GOD MODE ACTIVATED", game=f"{home} vs {away}", boost=god_boost)
                 except Exception:
                     pass
 
@@ -1454,14 +1482,18 @@ def get_auto_games(target_date):
                 "comparisons": gen_bookmaker_odds(tip_odd),
             })
         except Exception as e:
-            print(f"[AUTO-ENGINE] Erro em {game.get('home','')} vs {game.get('away','')}: {e}")
+            run.count("game_errors")
+            log.warning("[AUTO-ENGINE] Erro no jogo", game=f"{game.get('home','')} vs {game.get('away','')}", error=str(e))
             continue
 
     # Sort: snipers primeiro, depois por horário
     processed.sort(key=lambda x: (not x.get("is_sniper", False), x["time"]))
 
+    _stage(run, "funnel", _time.time() - t_stage)
+
     # --- 🕵️ REAL NEWS AGENT (PARALLEL GOOGLE INTELLIGENCE) ---
-    print("[AUTO-ENGINE] 🕵️ [NEWS AGENT] Escutando conversas de vestiário...")
+    t_stage = _time.time()
+    log.debug("[AUTO-ENGINE] 🕵️ [NEWS AGENT] Escutando conversas de vestiário...")
     
     try:
         import real_news
@@ -1513,10 +1545,14 @@ def get_auto_games(target_date):
                 if h_bad:
                     tip['prob'] = min(99, tip['prob'] + 3)
     except Exception as e:
-        print(f"[AUTO-ENGINE] ⚠️ Erro no News Agent: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ Erro no News Agent", error=str(e))
+
+    _stage(run, "news", _time.time() - t_stage)
 
     # 3. Builds trebles
+    t_stage = _time.time()
     trebles = build_trebles(processed)
+    _stage(run, "trebles", _time.time() - t_stage)
 
     # [-NEW-] Local Persistence for Trebles (JSON)
     try:
@@ -1573,10 +1609,10 @@ def get_auto_games(target_date):
         if added_count > 0:
             with open(local_hist_file, "w", encoding="utf-8") as f:
                 json.dump(existing_trebles, f, indent=4, ensure_ascii=False)
-            print(f"[AUTO-ENGINE] 💾 Persisted {added_count} new trebles to {local_hist_file}")
+            run.count("trebles_persisted", added_count)
             
     except Exception as e:
-        print(f"[AUTO-ENGINE] ⚠️ Error saving local treble history: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ Error saving local treble history", error=str(e))
 
     # --- CLOUD SYNC AUTOMATION (non-blocking) ---
     try:
@@ -1610,13 +1646,15 @@ def get_auto_games(target_date):
                         "synced_at": datetime.datetime.now().isoformat()
                      }
                      client.table("trebles").insert(payload)
-                     print(f"[AUTO-ENGINE] ☁️ Sincronizado treble: {t['name']}")
+                     run.count("trebles_synced")
     except Exception as e:
-        print(f"[AUTO-ENGINE] ⚠️ Erro no Cloud Sync: {e}")
+        log.warning("[AUTO-ENGINE] ⚠️ Erro no Cloud Sync", error=str(e))
 
     t_total = _time.time() - t_total_start
-    print(f"[AUTO-ENGINE] ⚡ TURBO COMPLETE: {len(processed)} picks + {len(trebles)} combos em {t_total:.1f}s")
-    return {"games": processed, "trebles": trebles}
+    metrics.observe_stage("auto_picks.total", t_total)
+    run.count("picks", len(processed))
+    run.count("trebles", len(trebles))
+    return {"games": processed, "trebles": trebles, "top_props": top_props}
 
 if __name__ == "__main__":
     import sys
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """
 auto_updater.py — Atualização automática do history.json
-Executa via Windows Task Scheduler todo dia às 00:30.
+Executa via Windows Task Scheduler todo dia às 00:30 (setup_scheduler.ps1)
+ou, no servidor, como job "auto_updater" do scheduler.py (AUTO_UPDATER_IN_APP=1).
 Busca resultados de ontem e hoje na ESPN API, avalia WON/LOST,
 salva history.json e faz push automático ao GitHub.
 """
@@ -0,0 +1,213 @@
+"""
+bankroll_sim.py — SIMULADOR DE BANCA DA ALAVANCAGEM (MONTE CARLO) 📈
+====================================================================
+A projeção do get_leverage_plan é determinística (ganha todo dia). Aqui
+dezenas de milhares de caminhos de banca são simulados em NumPy com a taxa
+de acerto CALIBRADA do bucket de odd do desafio (turbo_fetcher).
+
+REGRAS DO CAMINHO (mesmas do desafio e do "Seguro de Banca"):
+  - Todo dia a banca inteira entra na odd alvo (all-in composto)
+  - RED zera a banca: recompra de `stake` e o desafio reinicia do Dia 1
+  - Dia 10 de uma sequência: retira o capital inicial
+  - A partir do Dia 20: retira 20% da banca a cada 3 dias
+  - Meta atingida quando banca + retiradas da sequência ≥ target_goal
+
+INCERTEZA:
+  - Cada caminho sorteia sua própria taxa de acerto de uma Beta(hits+1, misses+1)
+    do bucket calibrado — poucos dados → faixa mais larga
+
+CACHE:
+  - Resultado em memória por (stake, target_odd, target_goal, versão da calibração)
+  - stake e target_odd vêm do usuário (/api/leverage): antes de virar chave
+    são encaixados numa grade fixa (STAKE_STEPS 1-2-5, odd de ODD_STEP em
+    ODD_STEP) — no máximo GRID_SIZE simulações por versão da calibração, e o
+    cache comporta a grade inteira, então variar parâmetros não força miss
+  - Cada entrada fica como JSON (~8 KB; a grade toda ≈ 5 MB por worker)
+"""
+
+import hashlib
+import json
+import math
+import threading
+
+import numpy as np
+
+DEFAULT_PATHS = 20000
+DEFAULT_HORIZON = 90  # dias simulados
+DEFAULT_SEED = 1250
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Prior used when the odds bucket has too few resolved entries
+PRIOR_STRENGTH = 10
+MIN_BUCKET_SAMPLE = 10
+
+# Insurance rules (same as the insurance_advice text)
+INSURANCE_WITHDRAW_DAY = 10
+PROFIT_SKIM_FROM_DAY = 20
+PROFIT_SKIM_EVERY = 3
+PROFIT_SKIM_RATE = 0.20
+
+# Simulation grid for user-supplied plans (each miss is ~230 ms of CPU)
+STAKE_STEPS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+ODD_STEP = 0.05
+ODD_MIN, ODD_MAX = 1.05, 3.0
+GRID_SIZE = len(STAKE_STEPS) * (round((ODD_MAX - ODD_MIN) / ODD_STEP) + 1)
+
+_cache = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX = GRID_SIZE
+
+
+def _bucket_for_odd(calibration, odd):
+    for key, data in calibration.get("odds_range", {}).items():
+        low, high = data["range"]
+        if low <= odd < high:
+            return key, data
+    return None, {"hits": 0, "total": 0}
+
+
+def calibration_version(calibration):
+    """Stable short hash of the odds-bucket counts (changes only when the data does)."""
+    buckets = calibration.get("odds_range", {})
+    raw = "|".join(f"{k}:{v.get('hits', 0)}/{v.get('total', 0)}" for k, v in sorted(buckets.items()))
+    return hashlib.md5(raw.encode()).hexdigest()[:10]
+
+
+def hit_rate_prior(calibration, target_odd):
+    """
+    Beta(alpha, beta) for the daily hit rate at `target_odd`.
+    Uses the calibrated bucket; thin buckets are blended with the implied probability.
+    """
+    bucket, data = _bucket_for_odd(calibration, target_odd)
+    hits, total = data.get("hits", 0), data.get("total", 0)
+    implied = min(0.99, 1.0 / max(1.01, target_odd))
+    alpha, beta = hits + 1.0, (total - hits) + 1.0
+    if total < MIN_BUCKET_SAMPLE:
+        alpha += implied * PRIOR_STRENGTH
+        beta += (1 - implied) * PRIOR_STRENGTH
+    return {"bucket": bucket, "hits": hits, "total": total, "alpha": alpha, "beta": beta}
+
+
+def simulate_leverage(stake, target_odd, target_goal, alpha, beta,
+                      n_paths=DEFAULT_PATHS, horizon=DEFAULT_HORIZON, seed=DEFAULT_SEED):
+    """
+    Vectorized Monte Carlo of the leverage challenge (paths × days).
+
+    Returns risk of ruin, target odds, days-to-target stats, expected rebuys and
+    per-day percentile bands of net P&L (cash out + bankroll − money put in).
+    """
+    rng = np.random.default_rng(seed)
+    p = rng.beta(alpha, beta, size=n_paths)
+    wins = rng.random((horizon, n_paths)) < p  # day-major: each step reads one contiguous row
+
+    bankroll = np.full(n_paths, float(stake))
+    run_cash = np.zeros(n_paths)      # withdrawn during the current run
+    banked = np.zeros(n_paths)        # withdrawn overall
+    invested = np.full(n_paths, float(stake))
+    run_day = np.zeros(n_paths, dtype=np.int64)
+    reached_day = np.full(n_paths, -1, dtype=np.int64)
+    first_run_bust = np.zeros(n_paths, dtype=bool)
+    first_run_open = np.ones(n_paths, dtype=bool)
+    bands = np.empty((horizon, len(PERCENTILES)))
+
+    for day in range(horizon):
+        active = reached_day < 0
+        win = wins[day] & active
+        lose = ~wins[day] & active
+
+        # Loss: bankroll gone, rebuy and restart
+        first_run_bust |= lose & first_run_open
+        first_run_open &= ~lose
+        invested[lose] += stake
+        bankroll[lose] = stake
+        run_cash[lose] = 0.0
+        run_day[lose] = 0
+
+        # Win: compound, then apply insurance withdrawals
+        bankroll[win] *= target_odd
+        run_day[win] += 1
+
+        cap_out = win & (run_day == INSURANCE_WITHDRAW_DAY)
+        bankroll[cap_out] -= stake
+        run_cash[cap_out] += stake
+        banked[cap_out] += stake
+
+        skim = win & (run_day >= PROFIT_SKIM_FROM_DAY) & ((run_day - PROFIT_SKIM_FROM_DAY) % PROFIT_SKIM_EVERY == 0)
+        skim_amount = bankroll[skim] * PROFIT_SKIM_RATE
+        bankroll[skim] -= skim_amount
+        run_cash[skim] += skim_amount
+        banked[skim] += skim_amount
+
+        done = active & (bankroll + run_cash >= target_goal)
+        reached_day[done] = day + 1
+        first_run_open &= ~done
+
+        bands[day] = np.percentile(banked + bankroll - invested, PERCENTILES)
+
+    reached = reached_day > 0
+    days = reached_day[reached]
+    rebuys = invested / stake - 1
+
+    return {
+        "paths": n_paths,
+        "horizon_days": horizon,
+        "hit_rate_mean": round(float(p.mean()), 4),
+        "hit_rate_band": [round(float(x), 4) for x in np.percentile(p, (5, 95))],
+        "risk_of_ruin": round(float(first_run_bust.mean()), 4),
+        "prob_reach_target": round(float(reached.mean()), 4),
+        "expected_days_to_target": round(float(days.mean()), 1) if days.size else None,
+        "days_to_target_p50": int(np.percentile(days, 50)) if days.size else None,
+        "days_to_target_p90": int(np.percentile(days, 90)) if days.size else None,
+        "expected_rebuys": round(float(rebuys.mean()), 2),
+        "expected_invested": round(float(invested.mean()), 2),
+        "bands": [
+            {"day": d + 1, **{f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, bands[d])}}
+            for d in range(horizon)
+        ],
+    }
+
+
+def snap_plan(stake, target_odd):
+    """Nearest grid point: stake on STAKE_STEPS (log scale), odd on ODD_STEP within [ODD_MIN, ODD_MAX]."""
+    stake = max(float(stake), STAKE_STEPS[0])
+    snapped_stake = min(STAKE_STEPS, key=lambda step: abs(math.log(step / stake)))
+    odd = min(max(float(target_odd), ODD_MIN), ODD_MAX)
+    snapped_odd = round(ODD_MIN + round((odd - ODD_MIN) / ODD_STEP) * ODD_STEP, 2)
+    return snapped_stake, snapped_odd
+
+
+def get_leverage_simulation(stake, target_odd, target_goal, calibration=None):
+    """
+    Cached simulation for the /api/leverage payload.
+    The plan is snapped to the grid first (snap_plan); keyed by
+    (snapped stake, snapped target_odd, target_goal, calibration version).
+    """
+    if calibration is None:
+        from turbo_fetcher import get_calibration_adjustments_cached
+        calibration = get_calibration_adjustments_cached()
+
+    stake, target_odd = snap_plan(stake, target_odd)
+    version = calibration_version(calibration)
+    key = (round(float(stake), 2), round(float(target_odd), 3), round(float(target_goal), 2), version)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    prior = hit_rate_prior(calibration, target_odd)
+    result = simulate_leverage(stake, target_odd, target_goal, prior["alpha"], prior["beta"])
+    result["stake"] = stake
+    result["target_odd"] = target_odd
+    result["calibration"] = {
+        "version": version,
+        "bucket": prior["bucket"],
+        "hits": prior["hits"],
+        "total": prior["total"],
+    }
+    result["steps_to_target"] = math.ceil(math.log(target_goal / stake) / math.log(target_odd)) if target_odd > 1 and target_goal > stake else 0
+
+    with _cache_lock:
+        if len(_cache) >= _CACHE_MAX:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = json.dumps(result)
+    return result
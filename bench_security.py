@@ -0,0 +1,303 @@
+"""
+bench_security.py — MICRO-BENCHMARK DA CAMADA DE SEGURANÇA ⏱️🛡️
+================================================================
+Mede o custo por request do rate limiter (security.RateLimiter) num
+"scan storm": milhares de IPs distintos batendo no gate global de
+120 req/min, comparado com o limiter antigo (lista de timestamps por chave
++ lock global) e com o backend compartilhado entre workers
+(security_store.SharedRateLimiter, SQLite WAL).
+
+USO:
+  python bench_security.py              → tabela µs/chamada e memória
+  python bench_security.py --quick      → menos iterações (CI)
+
+O custo do limiter novo deve ficar plano com o número de IPs (estado O(1) por
+chave, teto fixo de memória); o antigo cresce com o histórico de cada chave.
+
+Também mede a inspeção de request do security_gate (UA de scanner, payload
+de ataque, extensão suspeita, honeypot) — matchers compilados + pré-filtro
+vs. os loops antigos — e o custo do gate inteiro (7 camadas) num request
+Flask real, comparado com o mesmo app sem o middleware.
+
+Por fim, um teste de carga do login: pool de 8 threads (2 workers × 4
+threads do gunicorn) sob um flood de logins errados, medindo a latência de
+um endpoint legítimo — com o time.sleep antigo na thread do request vs. o
+tarpit (security.LoginTarpit, 429 + Retry-After).
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import security
+from security import RateLimiter
+from security_store import SecurityStore, SharedRateLimiter
+
+
+class _ListRateLimiter:
+    """The previous implementation (timestamp list per key, one global lock) — baseline only."""
+
+    def __init__(self):
+        self._store = {}
+        self._lock = threading.Lock()
+
+    def is_rate_limited(self, key, max_calls, window_seconds):
+        now = time.time()
+        with self._lock:
+            if key not in self._store:
+                self._store[key] = []
+            self._store[key] = [t for t in self._store[key] if now - t < window_seconds]
+            if len(self._store[key]) >= max_calls:
+                oldest = self._store[key][0]
+                return True, int(window_seconds - (now - oldest)) + 1
+            self._store[key].append(now)
+            return False, 0
+
+
+def _storm_keys(n_ips, calls, seed=7):
+    rng = random.Random(seed)
+    ips = [f"global:10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(n_ips)]
+    return [ips[rng.randrange(n_ips)] for _ in range(calls)]
+
+
+def bench_limiter(limiter, keys, max_calls=120, window=60):
+    """Mean µs per is_rate_limited call over the key sequence."""
+    start = time.perf_counter()
+    for key in keys:
+        limiter.is_rate_limited(key, max_calls, window)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def bench_memory(factory, keys):
+    tracemalloc.start()
+    limiter = factory()
+    for key in keys:
+        limiter.is_rate_limited(key, 120, 60)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 1024
+
+
+# ─── Request inspection (security_gate layers 3-5 + honeypot) ───
+
+def _legacy_is_scanner_ua(ua):
+    ua_lower = ua.lower()
+    if any(w in ua_lower for w in security.WHITELISTED_UA_PATTERNS):
+        return False
+    return any(s in ua_lower for s in security.SCANNER_USER_AGENTS)
+
+
+def _legacy_has_attack_payload(text):
+    return any(p.search(text) for p in security.ATTACK_PATTERNS_URL)
+
+
+def _legacy_has_suspicious_extension(path):
+    lower_path = path.lower()
+    return any(lower_path.endswith(ext) for ext in security.BLOCKED_EXTENSIONS)
+
+
+def _legacy_is_honeypot(path):
+    return path in security.HONEYPOT_PATHS
+
+
+_SAMPLE_UAS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "sqlmap/1.7.2#stable (https://sqlmap.org)",
+    "python-requests/2.31.0",
+    "Mozilla/5.0 zgrab/0.x",
+]
+_SAMPLE_URLS = [
+    "https://bot.example.com/api/games?date=2026-03-01",
+    "https://bot.example.com/api/history?limit=50&cursor=1a2b3c4d5e6f",
+    "https://bot.example.com/api/analyze?game_id=12",
+    "https://bot.example.com/?q=1' OR '1'='1",
+    "https://bot.example.com/../../etc/passwd",
+    "https://bot.example.com/search?q=<script>alert(1)</script>",
+]
+_SAMPLE_PATHS = ["/api/games", "/api/history", "/static/app.js", "/wp-login.php", "/backup.sql", "/.env"]
+
+
+def _inspect(ua, url, path, fns):
+    scanner, payload, ext, honeypot = fns
+    return scanner(ua), payload(url), ext(path), honeypot(path)
+
+
+def bench_inspection(n=20000):
+    legacy = (_legacy_is_scanner_ua, _legacy_has_attack_payload, _legacy_has_suspicious_extension, _legacy_is_honeypot)
+    compiled = (security._is_scanner_ua, security._has_attack_payload, security._has_suspicious_extension,
+                security.is_honeypot_path)
+    cases = [(ua, url, path) for ua in _SAMPLE_UAS for url in _SAMPLE_URLS for path in _SAMPLE_PATHS]
+    mismatches = [c for c in cases if _inspect(*c, legacy) != _inspect(*c, compiled)]
+    out = {"cases": len(cases), "mismatches": len(mismatches)}
+    for name, fns in (("legacy_us", legacy), ("compiled_us", compiled)):
+        start = time.perf_counter()
+        for i in range(n):
+            _inspect(*cases[i % len(cases)], fns)
+        out[name] = (time.perf_counter() - start) / n * 1e6
+    return out
+
+
+def bench_gate(n=3000):
+    """Per-request cost of the full security_gate + honeypot gate on a trivial Flask route."""
+    from flask import Flask
+
+    def make_app(with_gate):
+        app = Flask("bench_gate")
+        if with_gate:
+            security.register_security_middleware(app)
+            security.register_honeypots(app)
+        app.add_url_rule("/api/ping", "ping", lambda: "ok")
+        return app
+
+    saved = security.limiter, security.ip_blocker
+    security.limiter, security.ip_blocker = RateLimiter(), security.IPBlocker()
+    try:
+        timings = {}
+        clients = {"bare_us": make_app(False).test_client(), "gated_us": make_app(True).test_client()}
+
+        def hit(client, i):
+            # Distinct IPs so the 120 req/min global gate never trips
+            client.get("/api/ping", headers={"User-Agent": _SAMPLE_UAS[i % 2]},
+                       environ_base={"REMOTE_ADDR": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"})
+
+        for client in clients.values():
+            for i in range(200):
+                hit(client, n + i)
+        for label, client in clients.items():
+            start = time.perf_counter()
+            for i in range(n):
+                hit(client, i)
+            timings[label] = (time.perf_counter() - start) / n * 1e6
+    finally:
+        security.limiter, security.ip_blocker = saved
+    timings["gate_us"] = timings["gated_us"] - timings["bare_us"]
+    return timings
+
+
+# ─── Login flood: legit latency with sleep vs. tarpit ───
+
+def _make_login_app(mode):
+    """Minimal copy of app.login_api's failure path: 'sleep' (old) or 'tarpit' (new)."""
+    from flask import Flask, jsonify, request
+
+    app = Flask(f"bench_login_{mode}")
+    failures = RateLimiter()
+    tarpit = security.LoginTarpit()
+
+    @app.route("/api/login", methods=["POST"])
+    def login():
+        key = f"account_lockout:{request.json['email']}"
+        if mode == "tarpit" and tarpit.retry_after(key):
+            return jsonify({"status": "error"}), 429
+        failed_count = failures.get_count(key, 1800)
+        failures.record_hit(key, 1800)
+        delay = min(failed_count + 1, 5)
+        if mode == "sleep":
+            time.sleep(delay)
+        else:
+            tarpit.hold(key, delay)
+        return jsonify({"status": "error"}), 401
+
+    @app.route("/api/ping")
+    def ping():
+        return "ok"
+
+    return app
+
+
+def bench_login_flood(seconds=3.0, attackers=16, pool_threads=8):
+    """p50/p95/max latency (ms) of a legit endpoint while `attackers` hammer bad logins."""
+    results = {}
+    for mode in ("idle", "sleep", "tarpit"):
+        client = _make_login_app("tarpit" if mode == "idle" else mode).test_client()
+        pool = ThreadPoolExecutor(max_workers=pool_threads)  # the gthread worker pool
+        stop = threading.Event()
+
+        def attacker(i):
+            while not stop.is_set():
+                pool.submit(client.post, "/api/login", json={"email": f"victim{i}@x.com"}).result()
+                time.sleep(0.01)  # network round trip; keeps the GIL free for the server side
+
+        threads = [threading.Thread(target=attacker, args=(i,), daemon=True)
+                   for i in range(attackers if mode != "idle" else 0)]
+        for t in threads:
+            t.start()
+        latencies = []
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            start = time.perf_counter()
+            pool.submit(client.get, "/api/ping").result()
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.02)
+        stop.set()
+        pool.shutdown(wait=True)
+        for t in threads:
+            t.join()
+        latencies.sort()
+        results[mode] = {
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[int(len(latencies) * 0.95)],
+            "max_ms": latencies[-1],
+        }
+    return results
+
+
+def run(quick=False):
+    calls = 50_000 if quick else 300_000
+    results = []
+    for n_ips in (1, 100, 1_000, 10_000, 100_000):
+        keys = _storm_keys(n_ips, calls)
+        row = {"ips": n_ips}
+        row["new_us"] = bench_limiter(RateLimiter(max_keys=50_000), keys)
+        row["old_us"] = bench_limiter(_ListRateLimiter(), keys)
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = SharedRateLimiter(SecurityStore(os.path.join(tmp, "bench.db")))
+            row["shared_us"] = bench_limiter(shared, keys[: calls // 5])
+            shared.store.conn().close()
+        results.append(row)
+    mem_keys = _storm_keys(100_000, calls)
+    memory = {
+        "new_kib": bench_memory(lambda: RateLimiter(max_keys=50_000), mem_keys),
+        "old_kib": bench_memory(_ListRateLimiter, mem_keys),
+    }
+    return results, memory
+
+
+def _print_limiter(results, memory):
+    print("RateLimiter.is_rate_limited — scan storm (120 req/min gate)")
+    print(f"{'IPs distintos':>14} {'novo µs':>9} {'antigo µs':>10} {'sqlite µs':>10}")
+    for row in results:
+        print(f"{row['ips']:>14,} {row['new_us']:>9.2f} {row['old_us']:>10.2f} {row['shared_us']:>10.2f}")
+    print(f"Memória com 100k IPs: novo {memory['new_kib']:,.0f} KiB (teto 50k chaves) | "
+          f"antigo {memory['old_kib']:,.0f} KiB (sem teto)")
+
+
+def _print_inspection(result, gate):
+    print(f"\nInspeção de request ({result['cases']} casos, divergências: {result['mismatches']})")
+    print(f"  loops antigos:        {result['legacy_us']:.2f} µs/request")
+    print(f"  compilados + filtro:  {result['compiled_us']:.2f} µs/request")
+    print(f"\nGate completo (Flask test client, backend em memória)")
+    print(f"  sem gate {gate['bare_us']:.1f} µs | com gate {gate['gated_us']:.1f} µs | "
+          f"custo do gate {gate['gate_us']:.1f} µs/request")
+
+
+def _print_login_flood(results):
+    print("\nFlood de login (16 atacantes, pool de 8 threads) — latência de /api/ping")
+    labels = {"idle": "sem flood", "sleep": "time.sleep antigo", "tarpit": "tarpit 429"}
+    for mode, row in results.items():
+        print(f"  {labels[mode]:<18} p50 {row['p50_ms']:8.1f} ms | p95 {row['p95_ms']:8.1f} ms | "
+              f"max {row['max_ms']:8.1f} ms")
+
+
+if __name__ == "__main__":
+    quick = "--quick" in sys.argv
+    _print_limiter(*run(quick))
+    _print_inspection(bench_inspection(5000 if quick else 50000), bench_gate(1000 if quick else 5000))
+    _print_login_flood(bench_login_flood(2.0 if quick else 5.0))
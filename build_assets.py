@@ -0,0 +1,176 @@
+"""
+build_assets.py — SHELL PRÉ-RENDERIZADO + ASSETS COM HASH DO index.html 📦
+=========================================================================
+O templates/index.html (~100 KB, CSS e JS inline) era renderizado pelo Jinja
+a cada visita e baixado inteiro toda vez (nenhum cache fora de /api). Aqui:
+
+  1. BUILD: os blocos <style> e <script> inline (sem atributos, sem Jinja)
+     viram arquivos com hash de conteúdo em static/dist/
+     (index.<hash>.css, index.head.<hash>.js, index.app.<hash>.js) e o
+     template passa a apontar para eles, na mesma posição (mesma ordem de
+     execução, DOM já montado para o script do fim do body)
+  2. SHELL: o template resultante é renderizado UMA vez por variante de
+     papel (admin / user — o único Jinja da página) e guardado em memória
+     pré-comprimido (payload_cache.PayloadEntry) com ETag forte
+  3. SERVE: shell com "private, no-cache" (revalida → 304 no retorno);
+     assets com "private, max-age=1 ano, immutable" — quem volta baixa só o
+     shell (ou nem ele)
+
+O build roda no boot do app (rápido, idempotente, escrita atômica) ou à mão:
+  python build_assets.py            → gera static/dist e mostra os tamanhos
+  python build_assets.py --clean    → também remove builds antigos
+"""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+from types import SimpleNamespace
+
+import payload_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_TEMPLATE = os.path.join(BASE_DIR, "templates", "index.html")
+DIST_DIR = os.path.join(BASE_DIR, "static", "dist")
+DIST_URL = "/static/dist/"
+HASH_LEN = 12
+ROLES = ("user", "admin")
+
+ASSET_CACHE_CONTROL = "private, max-age=31536000, immutable"
+SHELL_CACHE_CONTROL = "private, no-cache"
+
+_STYLE_RE = re.compile(r"<style>(.*?)</style>", re.S)
+_SCRIPT_RE = re.compile(r"<script>(.*?)</script>", re.S)  # inline only: no src / attributes
+_MIMETYPES = {".css": "text/css", ".js": "text/javascript"}
+
+
+def _has_jinja(text):
+    return "{{" in text or "{%" in text
+
+
+def _asset_name(kind, body):
+    digest = hashlib.sha256(body).hexdigest()[:HASH_LEN]
+    return f"index.{digest}.css" if kind == "css" else f"index.{kind}.{digest}.js"
+
+
+def extract(source):
+    """
+    Template source → (shell template source, {filename: bytes}). Blocks that
+    contain Jinja stay inline; scripts are named head / app (/ app2 …) in order.
+    """
+    assets = {}
+
+    def replace_style(match):
+        css = match.group(1)
+        if _has_jinja(css):
+            return match.group(0)
+        name = _asset_name("css", css.encode("utf-8"))
+        assets[name] = css.encode("utf-8")
+        return f'<link rel="stylesheet" href="{DIST_URL}{name}">'
+
+    script_index = [0]
+
+    def replace_script(match):
+        js = match.group(1)
+        if _has_jinja(js):
+            return match.group(0)
+        kind = "head" if script_index[0] == 0 else ("app" if script_index[0] == 1 else f"app{script_index[0]}")
+        script_index[0] += 1
+        name = _asset_name(kind, js.encode("utf-8"))
+        assets[name] = js.encode("utf-8")
+        return f'<script src="{DIST_URL}{name}"></script>'
+
+    shell = _STYLE_RE.sub(replace_style, source)
+    shell = _SCRIPT_RE.sub(replace_script, shell)
+    return shell, assets
+
+
+def write_assets(assets, dist_dir=DIST_DIR):
+    """Writes missing hashed files atomically (several workers may build at once)."""
+    os.makedirs(dist_dir, exist_ok=True)
+    for name, body in assets.items():
+        path = os.path.join(dist_dir, name)
+        if os.path.exists(path):
+            continue
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+
+def clean(keep, dist_dir=DIST_DIR):
+    """Removes hashed files from previous builds. Returns the names removed."""
+    removed = []
+    if not os.path.isdir(dist_dir):
+        return removed
+    for name in os.listdir(dist_dir):
+        if name.startswith("index.") and name not in keep:
+            os.remove(os.path.join(dist_dir, name))
+            removed.append(name)
+    return removed
+
+
+class IndexShell:
+    """index.html pre-rendered per role + its assets, all pre-compressed in memory."""
+
+    def __init__(self, jinja_env, source_path=SOURCE_TEMPLATE, dist_dir=DIST_DIR):
+        with open(source_path, encoding="utf-8") as f:
+            shell_source, assets = extract(f.read())
+        try:
+            write_assets(assets, dist_dir)
+        except OSError as e:
+            # Read-only filesystem: still served from memory
+            print(f"[ASSETS] ⚠️ Could not write {dist_dir}: {e}")
+        template = jinja_env.from_string(shell_source)
+        self.shells = {}
+        for role in ROLES:
+            html = template.render(current_user=SimpleNamespace(is_authenticated=True, role=role))
+            self.shells[role] = payload_cache.PayloadEntry(
+                f"index_shell_{role}", None, body=html.encode("utf-8"), mimetype="text/html")
+        self.assets = {}
+        for name, body in assets.items():
+            self.assets[name] = payload_cache.PayloadEntry(
+                name, None, body=body, mimetype=_MIMETYPES[os.path.splitext(name)[1]])
+
+    def shell_for(self, user):
+        return self.shells["admin" if getattr(user, "role", "user") == "admin" else "user"]
+
+    def sizes(self):
+        return {
+            "shell": {role: entry.sizes() for role, entry in self.shells.items()},
+            "assets": {name: entry.sizes() for name, entry in self.assets.items()},
+        }
+
+
+_shell = None
+_shell_lock = threading.Lock()
+
+
+def get_shell(jinja_env):
+    """Process-wide IndexShell, built on first use (None if the build fails)."""
+    global _shell
+    with _shell_lock:
+        if _shell is None:
+            try:
+                _shell = IndexShell(jinja_env)
+            except Exception as e:
+                print(f"[ASSETS] ⚠️ index.html build failed, rendering per request: {e}")
+                return None
+        return _shell
+
+
+if __name__ == "__main__":
+    from jinja2 import Environment
+
+    shell = IndexShell(Environment())
+    with open(SOURCE_TEMPLATE, "rb") as f:
+        original = len(f.read())
+    print(f"index.html original: {original:,} bytes")
+    for role, sizes in shell.sizes()["shell"].items():
+        print(f"  shell ({role}):  {sizes['identity']:>8,} bytes | gzip {sizes['gzip']:>7,}")
+    for name, sizes in shell.sizes()["assets"].items():
+        print(f"  {name:<32} {sizes['identity']:>8,} bytes | gzip {sizes['gzip']:>7,}")
+    if "--clean" in sys.argv:
+        for name in clean(set(shell.assets)):
+            print(f"  removed {name}")
@@ -2,8 +2,6 @@ import random
 import datetime
 import math
 import requests
-from bs4 import BeautifulSoup
-import numpy as np
 import json
 import os
 
@@ -16,6 +14,10 @@ except ImportError:
 import time
 import hashlib
 
+import log_config
+
+log = log_config.get_logger("data_fetcher")
+
 # Import turbo parallel I/O
 try:
     from turbo_fetcher import (
@@ -79,6 +81,60 @@ from espn_api import (
 
 
 
+def _publish_payload(target_date, data):
+    """Version-stamp the slate (slate_versions), then serialize + compress it once for /api/games (payload_cache)."""
+    try:
+        import payload_cache
+        import slate_versions
+        slate_versions.record(target_date, data)
+        payload_cache.publish(f"games_{target_date}", data)
+    except Exception as e:
+        log.warning("[CACHE] ⚠️ Payload publish failed", error=str(e))
+
+
+GAMES_CACHE_FRESH_TTL = 7200   # 2 hours fresh
+GAMES_CACHE_STALE_TTL = 86400  # 24h max stale
+REFRESH_WAIT_SECONDS = 90      # below the gunicorn 120 s timeout
+
+
+def refresh_games_cache(target_date):
+    """Rebuilds the slate for `target_date` and stores it in the file + memory caches."""
+    import auto_picks
+    cache_file = os.path.join(CACHE_DIR, f"games_{target_date}.json")
+    fresh = auto_picks.get_auto_games(target_date)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(fresh, f, ensure_ascii=False, indent=2)
+    if TURBO_AVAILABLE:
+        get_cache().set(f"games_payload_{target_date}", fresh, ttl_seconds=GAMES_CACHE_FRESH_TTL)
+    _publish_payload(target_date, fresh)
+    log.info("[CACHE] ✅ Background refresh complete", date=target_date)
+    return fresh
+
+
+def _enqueue_refresh(target_date):
+    """Background refresh through the scheduler: one refresh at a time per process."""
+    try:
+        from scheduler import get_scheduler
+        get_scheduler().enqueue("refresh_games", target_date)
+    except Exception as e:
+        log.warning("[CACHE] ⚠️ Could not enqueue background refresh", error=str(e))
+
+
+def _wait_for_refresh(target_date, timeout=REFRESH_WAIT_SECONDS):
+    """Slate produced by an in-flight refresh_games job, or None if there is none."""
+    try:
+        from scheduler import get_scheduler
+        sched = get_scheduler()
+        if not sched.is_running("refresh_games"):
+            return None
+        log.debug("[CACHE] ⏳ Waiting for in-flight refresh", date=target_date)
+        sched.wait("refresh_games", timeout)
+        return get_cache().get(f"games_payload_{target_date}")
+    except Exception as e:
+        log.warning("[CACHE] ⚠️ Refresh wait failed", error=str(e))
+        return None
+
+
 def get_games_for_date(target_date, skip_history=False, force_refresh=False):
     """
     Orchestrates the data fetching, prediction, and formatting process.
@@ -90,11 +146,6 @@ def get_games_for_date(target_date, skip_history=False, force_refresh=False):
     3. STALE-WHILE-REVALIDATE: Always serve existing cache instantly,
        then refresh in background — user NEVER waits 30+ seconds
     """
-    import threading
-
-    CACHE_FRESH_TTL = 7200   # 2 hours fresh
-    CACHE_STALE_TTL = 86400  # 24h max stale
-
     # 1. Check in-memory turbo cache (fastest — sub-millisecond)
     if TURBO_AVAILABLE and not force_refresh:
         mem_cached = get_cache().get(f"games_payload_{target_date}")
@@ -112,46 +163,41 @@ def get_games_for_date(target_date, skip_history=False, force_refresh=False):
             with open(cache_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            if not force_refresh and file_age < CACHE_FRESH_TTL:
+            if not force_refresh and file_age < GAMES_CACHE_FRESH_TTL:
                 # FRESH cache — serve directly
                 if TURBO_AVAILABLE:
-                    get_cache().set(f"games_payload_{target_date}", data, ttl_seconds=CACHE_FRESH_TTL)
+                    get_cache().set(f"games_payload_{target_date}", data, ttl_seconds=GAMES_CACHE_FRESH_TTL)
+                _publish_payload(target_date, data)
                 return data
             
-            elif not force_refresh and file_age < CACHE_STALE_TTL:
+            elif not force_refresh and file_age < GAMES_CACHE_STALE_TTL:
                 # STALE cache — serve immediately, refresh in background
                 if TURBO_AVAILABLE:
                     get_cache().set(f"games_payload_{target_date}", data, ttl_seconds=300)
+                _publish_payload(target_date, data)
                 
-                # Background refresh (non-blocking)
-                def _bg_refresh():
-                    try:
-                        import auto_picks
-                        fresh = auto_picks.get_auto_games(target_date)
-                        with open(cache_file, 'w', encoding='utf-8') as f:
-                            json.dump(fresh, f, ensure_ascii=False, indent=2)
-                        if TURBO_AVAILABLE:
-                            get_cache().set(f"games_payload_{target_date}", fresh, ttl_seconds=CACHE_FRESH_TTL)
-                        print(f"[CACHE] ✅ Background refresh complete for {target_date}")
-                    except Exception as e:
-                        print(f"[CACHE] ⚠️ Background refresh failed: {e}")
-                
-                t = threading.Thread(target=_bg_refresh, daemon=True)
-                t.start()
-                print(f"[CACHE] ⚡ Serving stale cache ({file_age:.0f}s old), refreshing in background...")
+                # Background refresh (non-blocking, coalesced by the scheduler)
+                _enqueue_refresh(target_date)
+                log.info("[CACHE] ⚡ Serving stale cache, refreshing in background", age_s=round(file_age))
                 return data  # Return stale data INSTANTLY
                 
         except Exception as e:
-            print(f"⚠️ Cache read error: {e}")
+            log.warning("[CACHE] ⚠️ Cache read error", error=str(e))
 
-    print(f"📡 Fetching FRESH games for {target_date} (no cache available)...")
+    # 3a. A refresh is already building this slate (boot warm-up / stale refresh) → wait for it
+    if not force_refresh and TURBO_AVAILABLE:
+        waited = _wait_for_refresh(target_date)
+        if waited is not None:
+            return waited
+
+    log.info("[CACHE] 📡 Fetching fresh games (no cache available)", date=target_date)
     
-    # 3. No cache at all — must fetch synchronously (first visit of the day)
+    # 3b. No cache at all — must fetch synchronously (first visit of the day)
     try:
         import auto_picks
         final_payload = auto_picks.get_auto_games(target_date)
     except Exception as e:
-        print(f"⚠️ auto_picks failed: {e}")
+        log.error("⚠️ auto_picks failed", error=str(e))
         final_payload = {"games": [], "trebles": []}
     
     # 4. Save to file cache + memory cache
@@ -159,7 +205,8 @@ def get_games_for_date(target_date, skip_history=False, force_refresh=False):
         with open(cache_file, 'w', encoding='utf-8') as f:
             json.dump(final_payload, f, ensure_ascii=False, indent=2)
         if TURBO_AVAILABLE:
-            get_cache().set(f"games_payload_{target_date}", final_payload, ttl_seconds=CACHE_FRESH_TTL)
+            get_cache().set(f"games_payload_{target_date}", final_payload, ttl_seconds=GAMES_CACHE_FRESH_TTL)
+        _publish_payload(target_date, final_payload)
     except:
         pass
         
@@ -240,7 +287,7 @@ class ResultScoutBot:
             self._fetch_365 = fetch_results_365scores
             self._fetch_google = fetch_result_from_google
         except Exception as e:
-            print(f"[SCOUT] ⚠️ 365Scores results not available: {e}")
+            log.warning("[SCOUT] ⚠️ 365Scores results not available", error=str(e))
 
     def scout_results_for_date(self, target_date):
         """Fetch results from all sources, merging with priority."""
@@ -249,16 +296,16 @@ class ResultScoutBot:
         # ── SOURCE 1: 365Scores (NBA + Football) ──
         if self._365_available:
             try:
-                print(f"[SCOUT] 📡 Fonte 1: 365Scores (NBA + Futebol Internacional)...")
+                log.debug("[SCOUT] 📡 Fonte 1: 365Scores (NBA + Futebol Internacional)")
                 results_365 = self._fetch_365(target_date)
                 all_results.update(results_365)
-                print(f"[SCOUT] ✅ 365Scores: {len(results_365)} entradas")
+                log.debug("[SCOUT] ✅ 365Scores", entries=len(results_365))
             except Exception as e:
-                print(f"[SCOUT] ⚠️ 365Scores falhou: {e}")
+                log.warning("[SCOUT] ⚠️ 365Scores falhou", error=str(e))
         
         # ── SOURCE 2: ESPN (complementa o que faltar) ──
         try:
-            print(f"[SCOUT] 📡 Fonte 2: ESPN API...")
+            log.debug("[SCOUT] 📡 Fonte 2: ESPN API")
             espn_results = fetch_from_espn_api(target_date)
             # Only add ESPN results for teams NOT already in 365Scores
             espn_added = 0
@@ -266,11 +313,11 @@ class ResultScoutBot:
                 if team not in all_results:
                     all_results[team] = res
                     espn_added += 1
-            print(f"[SCOUT] ✅ ESPN: +{espn_added} resultados novos")
+            log.debug("[SCOUT] ✅ ESPN", added=espn_added)
         except Exception as e:
-            print(f"[SCOUT] ⚠️ ESPN falhou: {e}")
+            log.warning("[SCOUT] ⚠️ ESPN falhou", error=str(e))
         
-        print(f"[SCOUT] 📊 Total combinado: {len(all_results)} entradas de resultado")
+        log.info("[SCOUT] 📊 Resultados combinados", entries=len(all_results))
         return all_results
 
     def scout_with_google_fallback(self, target_date, pending_games):
@@ -284,14 +331,14 @@ class ResultScoutBot:
         google_results = {}
         for home, away in pending_games:
             try:
-                print(f"[SCOUT] 🔍 Google fallback: {home} vs {away}...")
+                log.debug("[SCOUT] 🔍 Google fallback", game=f"{home} vs {away}")
                 result = self._fetch_google(home, away)
                 if result:
                     google_results[home] = result
                     google_results[away] = result
-                    print(f"[SCOUT] ✅ Google: {home} {result['score']} ({result['status']})")
+                    log.debug("[SCOUT] ✅ Google", team=home, score=result['score'], status=result['status'])
             except Exception as e:
-                print(f"[SCOUT] ⚠️ Google falhou para {home}: {e}")
+                log.warning("[SCOUT] ⚠️ Google falhou", team=home, error=str(e))
         
         return google_results
 
@@ -322,7 +369,7 @@ def get_history_games():
     today_games = get_games_for_date(today_str, skip_history=True)
     
     # ACTIVATE MULTI-SOURCE RESULT SCOUT BOT 🤖
-    print(f"[BOT] Ativando Varredura Multi-Fonte para {today_str} (365Scores → ESPN → Google)...")
+    log.debug("[BOT] Varredura Multi-Fonte (365Scores → ESPN → Google)", date=today_str)
     bot = ResultScoutBot()
     real_results = bot.scout_results_for_date(today_str)
     
@@ -453,7 +500,7 @@ def get_history_games():
                             history.insert(0, new_entry)
                             updated = True
             except Exception as e:
-                print(f"Error processing game: {repr(e)}")
+                log.warning("[BOT] ⚠️ Error processing game", error=repr(e))
                 continue
 
     # ── GOOGLE FALLBACK: Check any remaining PENDING games ──
@@ -472,7 +519,7 @@ def get_history_games():
                 pass
     
     if pending_games and hasattr(bot, 'scout_with_google_fallback'):
-        print(f"[BOT] 🔍 {len(pending_games)} jogos sem resultado. Tentando Google...")
+        log.info("[BOT] 🔍 Jogos sem resultado, tentando Google", pending=len(pending_games))
         google_results = bot.scout_with_google_fallback(today_str, pending_games)
         
         if google_results:
@@ -522,7 +569,7 @@ def get_history_games():
                                 history[i]['status'] = status
                                 history[i]['profit'] = f"+{int((odd_val-1)*100)}%" if status == "WON" else "-100%"
                                 updated = True
-                                print(f"[BOT] ✅ Google: {home_name} → {res['score']} ({status})")
+                                log.debug("[BOT] ✅ Google", team=home_name, score=res['score'], status=status)
 
     # 3. Save if updated
     if updated:
@@ -622,7 +669,7 @@ def get_today_scout():
             if isinstance(all_day_data, dict):
                 total_tips = len(all_day_data.get('games', []))
     except Exception as e:
-        print(f"⚠️ Error getting today games for scout: {e}")
+        log.warning("⚠️ Error getting today games for scout", error=str(e))
     
     # Use cached history — NO re-calling get_history_games()
     if TURBO_AVAILABLE:
@@ -831,7 +878,7 @@ def get_history_trebles():
                                     updated = True
                         
                         except Exception as e:
-                            print(f"[TREBLE-CHECK-ERR] {e}")
+                            log.warning("[TREBLE-CHECK-ERR]", error=str(e))
 
                     # Accumulate status
                     if c_status == 'WON':
@@ -883,7 +930,7 @@ def get_history_trebles():
                     updated = True
                 
         except Exception as e:
-            print(f"[TREBLE-UPDATE-CRITICAL] {e}")
+            log.error("[TREBLE-UPDATE-CRITICAL]", error=str(e))
 
     # 3. Save if updated
     if updated:
@@ -894,14 +941,14 @@ def get_history_trebles():
             
     return history
 
-def get_leverage_plan():
+def get_leverage_plan(initial_stake=10.0, target_odd=1.25, target_goal=9000.0):
     """
     Logic for the 1.25 Daily Challenge (Alavancagem Neural).
     Goal: 10 BRL -> 9,000 BRL in 32 days.
     Now DYNAMIC: picks the safest game of the day as the daily tip.
+    Includes a Monte Carlo bankroll simulation (bankroll_sim), run on the
+    grid point nearest to (stake, target_odd) and cached per calibration version.
     """
-    initial_stake = 10.0
-    target_odd = 1.25
     steps = 32
     
     # Calculate projection
@@ -964,33 +1011,41 @@ def get_leverage_plan():
             "house": "Betano / Bet365"
         }
     
-    # Track current day based on consecutive wins in history
+    # Track current day based on consecutive wins in history (mtime-cached read)
     try:
-        history_file = 'history.json'
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            # Count recent consecutive leverage-eligible wins (odd <= 1.40)
-            leverage_wins = 0
-            for h in history:
-                if h.get('status') == 'WON' and float(h.get('odd', 2.0)) <= 1.40:
-                    leverage_wins += 1
-                elif h.get('status') == 'LOST':
-                    break
-            current_day = min(leverage_wins + 1, steps)
+        if TURBO_AVAILABLE:
+            history = get_cached_history()
         else:
-            current_day = 1
+            # Plain file read (get_history_games would scout results on this request)
+            with open('history.json', 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        # Count recent consecutive leverage-eligible wins (odd <= 1.40)
+        leverage_wins = 0
+        for h in history:
+            if h.get('status') == 'WON' and float(h.get('odd', 2.0)) <= 1.40:
+                leverage_wins += 1
+            elif h.get('status') == 'LOST':
+                break
+        current_day = min(leverage_wins + 1, steps)
     except:
         current_day = 1
     
     # Calculate current stake based on current day
     current_stake = initial_stake * (target_odd ** (current_day - 1))
 
+    try:
+        from bankroll_sim import get_leverage_simulation
+        simulation = get_leverage_simulation(initial_stake, target_odd, target_goal)
+    except Exception as e:
+        log.warning("[LEVERAGE] Simulação indisponível", error=str(e))
+        simulation = None
+
     return {
         "current_day": current_day,
         "current_stake": round(current_stake, 2),
-        "target_goal": 9000.00,
+        "target_goal": round(float(target_goal), 2),
         "daily_tip": best_tip,
         "projection": projection[:35],
-        "insurance_advice": "PROTEÇÃO NEURAL: Após o 10º dia (Ganho acumulado de ~R$ 93), sugerimos retirar o capital inicial (R$ 10) e seguir apenas com o lucro. A partir do 20º dia, retire 20% do lucro a cada 3 dias para garantir o 'Seguro de Banca'."
+        "simulation": simulation,
+        "insurance_advice": f"PROTEÇÃO NEURAL: Após o 10º dia (Ganho acumulado de ~R$ {projection[9]['total']:.0f}), sugerimos retirar o capital inicial (R$ {initial_stake:g}) e seguir apenas com o lucro. A partir do 20º dia, retire 20% do lucro a cada 3 dias para garantir o 'Seguro de Banca'."
     }
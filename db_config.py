@@ -0,0 +1,159 @@
+"""
+db_config.py — PERFIL DO POOL DE CONEXÕES (USUÁRIOS / PAGAMENTOS) 🗄️
+===================================================================
+init_payment_system só definia SQLALCHEMY_DATABASE_URI: pool padrão do
+SQLAlchemy, sem pre-ping, sem recycle e sem timeout — e em produção o banco
+é o Postgres do Supabase (SUPABASE_DB_URL), acessado pelas threads gthread
+de cada worker. Aqui fica o perfil do engine, igual para Postgres e SQLite:
+
+  - Pool por worker = threads do gunicorn (GUNICORN_THREADS) + overflow;
+    orçamento total = WEB_CONCURRENCY × (pool + overflow), logado no boot
+  - pool_pre_ping + pool_recycle (conexões mortas pelo pooler do Supabase
+    são trocadas antes de virar erro 500)
+  - Postgres: statement_timeout + connect_timeout por conexão
+  - SQLite (fallback local): WAL + synchronous=NORMAL + busy_timeout
+  - Slow-query log acima de DB_SLOW_QUERY_MS
+  - Métrica de espera no checkout do pool (_TimedQueuePool)
+
+VARIÁVEIS: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+DB_STATEMENT_TIMEOUT_MS, DB_SLOW_QUERY_MS.
+
+stats() → queries, slow_queries, checkouts, espera média/p95/máx, status do pool.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+import log_config
+import metrics
+from sqlalchemy.pool import QueuePool
+
+log = log_config.get_logger("db")
+
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", 2))
+THREADS = int(os.environ.get("GUNICORN_THREADS", 4))
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", THREADS))
+MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", max(2, THREADS // 2)))
+POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 300))  # below the Supabase pooler idle cut
+STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 5000))
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", 200))
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+_WAIT_SAMPLES = 1000  # checkout waits kept for the percentile
+
+_metrics = {"queries": 0, "slow_queries": 0, "checkouts": 0, "checkout_wait_ms_total": 0.0,
+            "checkout_wait_ms_max": 0.0, "checkout_timeouts": 0}
+_waits = deque(maxlen=_WAIT_SAMPLES)
+_metrics_lock = threading.Lock()
+_engines = []
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with _metrics_lock:
+                _metrics["checkout_timeouts"] += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            with _metrics_lock:
+                _metrics["checkouts"] += 1
+                _metrics["checkout_wait_ms_total"] += waited
+                _metrics["checkout_wait_ms_max"] = max(_metrics["checkout_wait_ms_max"], waited)
+                _waits.append(waited)
+
+
+def _is_sqlite(db_url):
+    return db_url.startswith("sqlite")
+
+
+def engine_options(db_url):
+    """SQLALCHEMY_ENGINE_OPTIONS for `db_url` (Postgres or SQLite file)."""
+    options = {
+        "pool_pre_ping": True,
+        "pool_recycle": POOL_RECYCLE,
+    }
+    if db_url in ("sqlite://", "sqlite:///") or (_is_sqlite(db_url) and ":memory:" in db_url):
+        return options  # in-memory SQLite keeps SQLAlchemy's single-connection pool
+    options.update({
+        "poolclass": _TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+    })
+    if not _is_sqlite(db_url):
+        options["connect_args"] = {"connect_timeout": 5}
+    return options
+
+
+def _on_connect_postgres(dbapi_conn, _record):
+    if STATEMENT_TIMEOUT_MS > 0:
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"SET statement_timeout = {int(STATEMENT_TIMEOUT_MS)}")
+        cursor.close()
+        dbapi_conn.commit()
+
+
+def _on_connect_sqlite(dbapi_conn, _record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _before_execute(conn, _cursor, _statement, _params, _context, _executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_execute(conn, _cursor, statement, _params, _context, _executemany):
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    metrics.observe_upstream(conn.engine.url.host or conn.engine.dialect.name, elapsed / 1000, "ok", kind="sql")
+    with _metrics_lock:
+        _metrics["queries"] += 1
+        slow = elapsed >= SLOW_QUERY_MS
+        if slow:
+            _metrics["slow_queries"] += 1
+    if slow:
+        log.warning("[DB] Slow query", duration_ms=round(elapsed), sql=" ".join(statement.split())[:200])
+
+
+def install(engine):
+    """Connection pragmas / session settings + query timing on `engine`."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _on_connect_sqlite)
+    elif engine.dialect.name == "postgresql":
+        event.listen(engine, "connect", _on_connect_postgres)
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    _engines.append(engine)
+    if isinstance(engine.pool, QueuePool):
+        per_worker = POOL_SIZE + MAX_OVERFLOW
+        log.info(f"[DB] {engine.dialect.name} pool", pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW,
+                 workers=WORKERS, max_connections=per_worker * WORKERS, recycle_s=POOL_RECYCLE)
+
+
+def stats():
+    with _metrics_lock:
+        out = dict(_metrics)
+        waits = sorted(_waits)
+    out["checkout_wait_ms_avg"] = round(out["checkout_wait_ms_total"] / out["checkouts"], 3) if out["checkouts"] else 0.0
+    out["checkout_wait_ms_p95"] = round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0
+    out["checkout_wait_ms_total"] = round(out["checkout_wait_ms_total"], 3)
+    out["checkout_wait_ms_max"] = round(out["checkout_wait_ms_max"], 3)
+    out["slow_query_ms"] = SLOW_QUERY_MS
+    out["pools"] = [{"dialect": e.dialect.name, "status": e.pool.status()} for e in _engines]
+    return out
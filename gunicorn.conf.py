@@ -0,0 +1,28 @@
+"""
+gunicorn.conf.py — CONFIG DO GUNICORN (Procfile: gunicorn app:app -c gunicorn.conf.py)
+=====================================================================================
+Mesmos parâmetros que o Procfile passava na linha de comando, mais o hook
+post_fork: cada worker roda o warmup.warm_up() ANTES de aceitar conexões,
+então o primeiro request já encontra o slate do dia, o learning snapshot e
+a calibração em memória (o history_index só com WARMUP_HISTORY_INDEX=1).
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+timeout = 120
+graceful_timeout = 30
+
+
+def post_fork(server, worker):
+    if os.environ.get("WARMUP_ENABLED", "1") != "1":
+        return
+    try:
+        import warmup
+        state = warmup.warm_up()
+        server.log.info("Worker %s warm-up: %s", worker.pid, state["status"])
+    except Exception as e:
+        server.log.warning("Worker %s warm-up failed: %s", worker.pid, e)
@@ -0,0 +1,200 @@
+"""
+history_index.py — ÍNDICE DO HISTÓRICO (PAGINAÇÃO POR CURSOR + FILTROS) 📚
+=========================================================================
+O /api/history devolvia o history.json inteiro (850+ entradas e crescendo)
+e o cliente filtrava. Aqui o histórico vira um índice em memória,
+reconstruído só quando o history.json muda (get_cached_history):
+
+  - Ordem: mais recente primeiro (data dd/mm com ano inferido + horário)
+  - Chave de ordenação estável (data, hora, crc da pick) + desempate pela
+    posição da entrada no history.json (row) → o cursor "<chave>-<row>"
+    continua válido quando entradas novas entram no topo e nunca pula
+    entradas de chave igual na virada de página
+  - Posting lists por liga / status / mercado (self_learning._classify_market)
+  - Odds em array NumPy para o filtro min_odd
+  - Intervalo de datas = fatia contígua (busca binária)
+
+  query(...)        → {"items", "next_cursor", "total"} (página limitada)
+  iter_matches(...) → gerador para o export NDJSON
+
+STATUS: "WON" inclui ARCHIVE_WON (mesma regra do self_learning).
+"""
+
+import datetime
+import threading
+import zlib
+
+import numpy as np
+
+from self_learning import _classify_market
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+_STATUS_ALIASES = {"WON": ("WON", "ARCHIVE_WON")}
+
+
+def _entry_day(date_str, today):
+    """Date for a 'dd/mm' entry: the most recent such date not too far in the future."""
+    try:
+        day, month = (int(x) for x in date_str.split("/")[:2])
+        year = today.year
+        if month > today.month + 1:
+            year -= 1
+        return datetime.date(year, month, day)
+    except (ValueError, AttributeError):
+        return datetime.date(1970, 1, 1)
+
+
+def _entry_minutes(time_str):
+    try:
+        hour, minute = (int(x) for x in time_str.split(":")[:2])
+        return hour * 60 + minute
+    except (ValueError, AttributeError):
+        return 0
+
+
+def _sort_key(entry, today):
+    """Stable int64 key: (day ordinal, minutes) high bits + 32-bit content crc."""
+    day = _entry_day(entry.get("date", ""), today).toordinal()
+    ident = f"{entry.get('home')}|{entry.get('away')}|{entry.get('selection')}".encode("utf-8")
+    return ((day * 1440 + _entry_minutes(entry.get("time", ""))) << 32) | zlib.crc32(ident)
+
+
+def parse_date(value):
+    """Accepts YYYY-MM-DD or dd/mm (current year)."""
+    if not value:
+        return None
+    if "/" in value:
+        day, month = (int(x) for x in value.split("/")[:2])
+        return _entry_day(f"{day}/{month}", datetime.date.today())
+    return datetime.date.fromisoformat(value)
+
+
+class HistoryIndex:
+    """Sorted, posting-list index over history entries (newest first)."""
+
+    def __init__(self, entries, today=None):
+        today = today or datetime.date.today()
+        keyed = sorted(((_sort_key(e, today), row, e) for row, e in enumerate(entries)),
+                       key=lambda x: (x[0], x[1]), reverse=True)
+        self.entries = [e for _, _, e in keyed]
+        # Ascending negated keys so np.searchsorted works on newest-first order
+        self.neg_keys = np.array([-k for k, _, _ in keyed], dtype=np.int64)
+        self.rows = np.array([row for _, row, _ in keyed], dtype=np.int64)  # tiebreak, descending within a key
+        self.odds = np.array([_safe_float(e.get("odd")) for e in self.entries])
+
+        self.postings = {"league": {}, "status": {}, "market": {}}
+        for pos, e in enumerate(self.entries):
+            self.postings["league"].setdefault((e.get("league") or "").lower(), []).append(pos)
+            self.postings["status"].setdefault(e.get("status", "PENDING"), []).append(pos)
+            self.postings["market"].setdefault(_classify_market(e.get("selection", "")), []).append(pos)
+        for field in self.postings:
+            self.postings[field] = {k: np.array(v, dtype=np.int64) for k, v in self.postings[field].items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _bound(self, day, end_of_day):
+        """Number of entries at or after the start (or the end, if end_of_day) of `day`."""
+        # Boundary key has crc 0: an equal key is exactly that minute, so side="right" is correct here
+        minute = 1440 if end_of_day else 0
+        key = ((day.toordinal() * 1440 + minute) << 32)
+        return int(np.searchsorted(self.neg_keys, -key, side="right"))
+
+    def _posting_union(self, field, values):
+        lists = []
+        for v in values:
+            if field == "league":
+                v = v.lower()
+            if field == "status":
+                for alias in _STATUS_ALIASES.get(v.upper(), (v.upper(),)):
+                    lists.append(self.postings[field].get(alias))
+            else:
+                lists.append(self.postings[field].get(v.upper() if field == "market" else v))
+        lists = [x for x in lists if x is not None]
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(lists)) if len(lists) > 1 else lists[0]
+
+    def matches(self, cursor=None, date_from=None, date_to=None, leagues=None,
+                statuses=None, markets=None, min_odd=None):
+        """Sorted positions (newest first) matching all filters, after the cursor."""
+        start = 0
+        end = len(self.entries)
+        if cursor is not None:
+            start = self._after_cursor(*cursor)
+        if date_to is not None:
+            start = max(start, self._bound(date_to, end_of_day=True))
+        if date_from is not None:
+            end = min(end, self._bound(date_from, end_of_day=False))
+        if start >= end:
+            return np.zeros(0, dtype=np.int64)
+
+        positions = None
+        for field, values in (("league", leagues), ("status", statuses), ("market", markets)):
+            if values:
+                posting = self._posting_union(field, values)
+                positions = posting if positions is None else np.intersect1d(positions, posting, assume_unique=True)
+        if positions is None:
+            positions = np.arange(start, end, dtype=np.int64)
+        else:
+            positions = positions[(positions >= start) & (positions < end)]
+        if min_odd is not None and positions.size:
+            positions = positions[self.odds[positions] >= min_odd]
+        return positions
+
+    def _after_cursor(self, key, row):
+        """First position after cursor (key, row); entries sharing the key are split by row."""
+        left = int(np.searchsorted(self.neg_keys, -key, side="left"))
+        right = int(np.searchsorted(self.neg_keys, -key, side="right"))
+        if row is None:  # legacy key-only cursor
+            return right
+        return left + int(np.searchsorted(-self.rows[left:right], -row, side="right"))
+
+    def cursor_for(self, pos):
+        return f"{int(-self.neg_keys[pos]):x}-{int(self.rows[pos]):x}"
+
+    def query(self, limit=DEFAULT_LIMIT, **filters):
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        positions = self.matches(**filters)
+        page = positions[:limit]
+        return {
+            "items": [self.entries[p] for p in page],
+            "next_cursor": self.cursor_for(page[-1]) if positions.size > limit else None,
+            "total": int(positions.size),
+        }
+
+    def iter_matches(self, **filters):
+        for pos in self.matches(**filters):
+            yield self.entries[pos]
+
+
+def parse_cursor(raw):
+    """"<key hex>-<row hex>" → (key, row); a key-only cursor (older pages) → (key, None)."""
+    if not raw:
+        return None
+    key, _, row = raw.partition("-")
+    return int(key, 16), (int(row, 16) if row else None)
+
+
+def _safe_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_index = {"source": None, "index": None}
+_index_lock = threading.Lock()
+
+
+def get_history_index():
+    """Index over get_cached_history(); rebuilt only when the history list object changes."""
+    from turbo_fetcher import get_cached_history
+    history = get_cached_history()
+    with _index_lock:
+        if _index["source"] is not history:
+            _index["index"] = HistoryIndex(history)
+            _index["source"] = history
+        return _index["index"]
@@ -0,0 +1,57 @@
+"""
+lazy_modules.py — IMPORTS PREGUIÇOSOS PARA O BOOT DO APP 💤
+==========================================================
+O app.py importava data_fetcher / result_checker / ai_engine no topo e a
+cadeia puxava NumPy, bs4, specialized_modules e o literal gigante do
+knowledge_base antes do primeiro request. lazy_module("nome") devolve um
+proxy que só importa o módulo no primeiro acesso a atributo:
+
+    data_fetcher = lazy_module("data_fetcher")
+    data_fetcher.get_games_for_date(...)   # importa aqui (uma vez, thread-safe)
+
+startup_profile.py mede o resultado (python -X importtime).
+"""
+
+import importlib
+import sys
+import threading
+
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """Module proxy: the real import happens on first attribute access."""
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with _import_lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    @property
+    def loaded(self):
+        return self._name in sys.modules
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,272 @@
+"""
+live_feed.py — FEED AO VIVO (UM POLLER, N ASSINANTES VIA SSE) 📡
+===============================================================
+Antes cada usuário fazia polling de /api/games, /api/today_scout e
+/api/history e cada poll rodava a lógica do servidor. Aqui UM poller por
+processo consulta o scoreboard da ESPN (fetch_espn_results_parallel) e o
+history do dia, calcula o diff e publica eventos num ring buffer que todos
+os assinantes SSE leem — custo upstream constante, qualquer que seja o
+número de usuários online.
+
+EVENTOS:
+  - score:  placar mudou            {"match", "teams", "score", "status"}
+  - status: status mudou (HT, 2nd)  {"match", "teams", "score", "status"}
+  - final:  jogo encerrou           {"match", "teams", "score", "status"}
+  - pick:   tip do dia virou        {"match", "selection", "status", "score"}
+  - reset:  Last-Event-ID deste processo que já saiu do buffer (lacuna)
+
+SSE:
+  - id: "<boot>-<seq>" (boot distingue processos), retry sugerido ao cliente.
+    Id de outro worker / boot anterior: retoma do ponto atual, sem reset
+  - Heartbeat a cada HEARTBEAT_SECONDS (comentário ": hb")
+
+ORÇAMENTO DE THREADS (gthread: 2 workers × 4 threads):
+  - No máximo MAX_STREAMS (2) streams SEGURAM uma thread, cada uma por até
+    STREAM_MAX_SECONDS (25 s) — sobram sempre 2 threads por worker para o
+    resto do app
+  - Acima do teto NÃO há 503: o assinante recebe uma resposta de catch-up
+    (eventos após o Last-Event-ID, direto do ring buffer) que fecha na hora,
+    com retry = POLL_INTERVAL — o EventSource reconecta sozinho. Custa uma
+    leitura do buffer em memória, nunca uma thread presa nem upstream
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+POLL_INTERVAL = int(os.environ.get("LIVE_POLL_INTERVAL", 30))
+HEARTBEAT_SECONDS = 15
+STREAM_MAX_SECONDS = int(os.environ.get("LIVE_STREAM_MAX_SECONDS", 25))
+MAX_STREAMS = int(os.environ.get("LIVE_MAX_STREAMS", 2))  # held streams per process (≤ half the gthread threads)
+RETRY_MS = 5000
+CATCHUP_RETRY_MS = POLL_INTERVAL * 1000  # no new events can appear before the next poll
+BUFFER_SIZE = 500
+IDLE_STOP_SECONDS = 120  # poller stops after this long without subscribers
+
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class LiveFeed:
+    """Single upstream poller + ring buffer of events fanned out to SSE subscribers."""
+
+    def __init__(self, fetch_results=None, fetch_history=None, poll_interval=POLL_INTERVAL):
+        self._fetch_results = fetch_results or _default_fetch_results
+        self._fetch_history = fetch_history or _default_fetch_history
+        self.poll_interval = poll_interval
+        self._events = deque(maxlen=BUFFER_SIZE)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._scores = None
+        self._picks = None
+        self._thread = None
+        self._subscribers = 0
+        self._last_subscriber_at = 0.0
+        self.stats = {"polls": 0, "poll_errors": 0, "events": 0, "catchups": 0}
+
+    # ─── Upstream side ───
+
+    def poll_once(self):
+        """One upstream fetch + diff. Returns the number of events published."""
+        self.stats["polls"] += 1
+        published = 0
+        try:
+            scores = _unique_events(self._fetch_results())
+        except Exception as e:
+            self.stats["poll_errors"] += 1
+            print(f"[LIVE] ⚠️ Poll error: {e}")
+            scores = None
+        if scores is not None:
+            if self._scores is not None:
+                for match, cur in scores.items():
+                    prev = self._scores.get(match)
+                    if prev is None:
+                        continue
+                    payload = {"match": match, "teams": cur["teams"], "score": cur["score"], "status": cur["status"]}
+                    if cur["completed"] and not prev["completed"]:
+                        published += self._publish("final", payload)
+                    elif cur["score"] != prev["score"]:
+                        published += self._publish("score", payload)
+                    elif cur["status"] != prev["status"]:
+                        published += self._publish("status", payload)
+            self._scores = scores
+
+        try:
+            picks = _today_picks(self._fetch_history())
+        except Exception as e:
+            print(f"[LIVE] ⚠️ History diff error: {e}")
+            picks = None
+        if picks is not None:
+            if self._picks is not None:
+                for key, cur in picks.items():
+                    prev = self._picks.get(key)
+                    if prev is not None and prev["status"] != cur["status"]:
+                        published += self._publish("pick", cur)
+            self._picks = picks
+        return published
+
+    def _publish(self, event_type, data):
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event_type, json.dumps(data, ensure_ascii=False)))
+            self.stats["events"] += 1
+            self._cond.notify_all()
+        return 1
+
+    def _run(self):
+        print(f"[LIVE] 📡 Poller started (every {self.poll_interval}s)")
+        while True:
+            self.poll_once()
+            with self._cond:
+                idle = self._subscribers == 0 and time.time() - self._last_subscriber_at > IDLE_STOP_SECONDS
+                if idle:
+                    self._thread = None
+                    print("[LIVE] 💤 Poller stopped (no subscribers)")
+                    return
+            time.sleep(self.poll_interval)
+
+    def _ensure_poller(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="live-feed-poller")
+                self._thread.start()
+
+    # ─── Subscriber side ───
+
+    def try_acquire(self):
+        """Reserves a held-stream slot (stream() does it); False when the per-process cap is reached."""
+        with self._cond:
+            self._last_subscriber_at = time.time()
+            if self._subscribers >= MAX_STREAMS:
+                self.stats["catchups"] += 1
+                acquired = False
+            else:
+                self._subscribers += 1
+                acquired = True
+        self._ensure_poller()
+        return acquired
+
+    def release(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+            self._last_subscriber_at = time.time()
+
+    def _events_after(self, seq):
+        return [e for e in self._events if e[0] > seq]
+
+    def _resume(self, last_event_id):
+        """(start seq, frames to send first). Foreign / missing id → current seq, no reset."""
+        with self._cond:
+            seq = self._seq
+            oldest = self._events[0][0] if self._events else self._seq + 1
+        resume = _parse_event_id(last_event_id)
+        if resume is None:
+            return seq, [f"id: {BOOT_ID}-{seq}\n\n"]  # sets lastEventId for the next reconnect
+        if oldest - 1 <= resume <= seq:
+            return resume, []
+        return seq, [_format(f"{BOOT_ID}-{seq}", "reset", "{}")]
+
+    def catch_up(self, last_event_id=None):
+        """SSE body for a subscriber over the cap: buffered events after its id, then close."""
+        seq, frames = self._resume(last_event_id)
+        yield f"retry: {CATCHUP_RETRY_MS}\n\n"
+        yield from frames
+        with self._cond:
+            pending = self._events_after(seq)
+        for event_seq, event_type, data in pending:
+            yield _format(f"{BOOT_ID}-{event_seq}", event_type, data)
+
+    def stream(self, last_event_id=None, max_seconds=STREAM_MAX_SECONDS, heartbeat=HEARTBEAT_SECONDS):
+        """
+        SSE generator for one subscriber: a held stream when a slot is free, else catch_up().
+        The slot is taken on the first iteration and released in `finally`, so a body that is
+        never iterated (an after_request hook raised, the client left first) never holds one.
+        Resumes after `last_event_id` when it belongs to this process and is still buffered.
+        """
+        if not self.try_acquire():
+            yield from self.catch_up(last_event_id)
+            return
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            seq, frames = self._resume(last_event_id)
+            yield from frames
+
+            deadline = time.time() + max_seconds
+            while time.time() < deadline:
+                with self._cond:
+                    pending = self._events_after(seq)
+                    if not pending:
+                        self._cond.wait(timeout=min(heartbeat, max(0.0, deadline - time.time())))
+                        pending = self._events_after(seq)
+                if pending:
+                    for event_seq, event_type, data in pending:
+                        yield _format(f"{BOOT_ID}-{event_seq}", event_type, data)
+                        seq = event_seq
+                else:
+                    yield ": hb\n\n"
+        finally:
+            self.release()
+
+
+def _format(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+def _parse_event_id(raw):
+    """Sequence number if the id was issued by this process, else None (resume from now)."""
+    if not raw:
+        return None
+    boot, _, seq = raw.partition("-")
+    if boot != BOOT_ID or not seq.isdigit():
+        return None
+    return int(seq)
+
+
+def _unique_events(results):
+    """ESPN results are keyed by every team alias; collapse them to one entry per event."""
+    by_obj = {}
+    for name, obj in results.items():
+        by_obj.setdefault(id(obj), (obj, []))[1].append(name)
+    events = {}
+    for obj, names in by_obj.values():
+        match = " x ".join(names[:2])
+        events[match] = {"score": obj.get("score"), "status": obj.get("status"),
+                         "completed": bool(obj.get("completed")), "teams": names}
+    return events
+
+
+def _today_picks(history):
+    today = datetime.datetime.now().strftime("%d/%m")
+    picks = {}
+    for h in history:
+        if h.get("date") != today:
+            continue
+        key = f"{h.get('home')}|{h.get('away')}|{h.get('selection')}"
+        picks[key] = {"match": f"{h.get('home')} x {h.get('away')}", "selection": h.get("selection"),
+                      "status": h.get("status"), "score": h.get("score", "")}
+    return picks
+
+
+def _default_fetch_results():
+    from turbo_fetcher import fetch_espn_results_parallel
+    return fetch_espn_results_parallel(datetime.datetime.now().strftime("%Y-%m-%d"), use_cache=False)
+
+
+def _default_fetch_history():
+    from turbo_fetcher import get_cached_history
+    return get_cached_history()
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed():
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = LiveFeed()
+        return _feed
@@ -0,0 +1,238 @@
+"""
+log_config.py — LOGGING ESTRUTURADO, COM NÍVEIS E FORA DO CAMINHO CRÍTICO 📝
+===========================================================================
+auto_picks, turbo_fetcher, scores365, self_learning, result_checker e
+data_fetcher davam print() de várias linhas com emoji por jogo e por etapa:
+escrita síncrona no stdout do worker, milhares de linhas por slate e nenhum
+jeito de baixar o volume. Aqui:
+
+  - Loggers por módulo (get_logger("auto_picks") → "neural.auto_picks"),
+    nível global LOG_LEVEL (INFO) e por módulo LOG_LEVELS="scores365=WARNING,auto_picks=DEBUG"
+  - Campos estruturados: log.info("msg", stage="espn", duration_ms=812) e o
+    contexto da execução (run_id, date) anexado sozinho dentro de run() —
+    também nas threads de pool, desde que submetidas por submit()
+  - NÃO BLOQUEANTE: os loggers só enfileiram (QueueHandler, fila limitada em
+    QUEUE_MAX — cheia = descarta e conta, nunca trava o pipeline); uma
+    thread QueueListener formata e escreve no stdout
+  - RESUMO POR EXECUÇÃO: run("picks", date=...) acumula contadores e
+    tempos de etapa e emite UMA linha INFO no fim; a conversa por jogo fica
+    em DEBUG (desligada por padrão)
+
+LOG_FORMAT=json → uma linha JSON por registro (agregadores de log).
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+NAMESPACE = "neural"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+QUEUE_MAX = 10000
+
+_RESERVED = frozenset({"exc_info", "stack_info", "stacklevel", "extra"})
+_current_run = contextvars.ContextVar("neural_log_run", default=None)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger whose extra keyword arguments become structured fields."""
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _RESERVED}
+        if fields:
+            extra = dict(kwargs.get("extra") or {})
+            extra["fields"] = {**extra.get("fields", {}), **fields}
+            kwargs["extra"] = extra
+        return msg, kwargs
+
+
+class _ContextFilter(logging.Filter):
+    """Runs in the calling thread: attaches the run context and counts levels into the run."""
+
+    def filter(self, record):
+        run = _current_run.get()
+        fields = getattr(record, "fields", None) or {}
+        if run is not None:
+            fields = {"run_id": run.run_id, **run.context, **fields}
+            if record.levelno >= logging.WARNING:
+                run.count(record.levelname.lower())
+        record.fields = fields
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record (and counts it)."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message here (args may be mutated later) but leave formatting to the listener
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def _format_value(value):
+    text = str(value)
+    return f'"{text}"' if (" " in text or not text) else text
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " | " + " ".join(f"{k}={_format_value(v)}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+               "msg": record.getMessage(), **(getattr(record, "fields", None) or {})}
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+# ═══════════════════════════════════════
+# SETUP
+# ═══════════════════════════════════════
+_setup_lock = threading.Lock()
+_state = {"pid": None, "listener": None, "queue": None}
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup(stream=None):
+    """Installs the queue handler on the "neural" logger (idempotent; restarts after fork)."""
+    with _setup_lock:
+        if _state["pid"] == os.getpid():
+            return
+        root = logging.getLogger(NAMESPACE)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        for name, level in _parse_levels(LOG_LEVELS).items():
+            logging.getLogger(f"{NAMESPACE}.{name}").setLevel(level)
+
+        record_queue = queue.Queue(QUEUE_MAX)
+        handler = _DroppingQueueHandler(record_queue)
+        handler.addFilter(_ContextFilter())
+        root.addHandler(handler)
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        listener = logging.handlers.QueueListener(record_queue, output, respect_handler_level=True)
+        listener.start()
+        _state.update(pid=os.getpid(), listener=listener, queue=record_queue)
+
+
+def flush():
+    """Stops the listener after draining the queue (atexit); logging resumes on the next setup()."""
+    with _setup_lock:
+        listener = _state["listener"]
+        if listener is not None and _state["pid"] == os.getpid():
+            listener.stop()
+        _state.update(pid=None, listener=None, queue=None)
+
+
+atexit.register(flush)
+
+
+def get_logger(name):
+    """Per-module structured logger ("neural.<name>")."""
+    setup()
+    return StructuredLogger(logging.getLogger(f"{NAMESPACE}.{name}"), {})
+
+
+def stats():
+    q = _state["queue"]
+    return {"queued": q.qsize() if q is not None else 0, "dropped": _DroppingQueueHandler.dropped,
+            "level": LOG_LEVEL, "format": LOG_FORMAT}
+
+
+# ═══════════════════════════════════════
+# PER-RUN SUMMARY
+# ═══════════════════════════════════════
+class Run:
+    """Counters + stage timings of one pipeline run, logged as a single summary line."""
+
+    def __init__(self, name, context):
+        self.name = name
+        self.run_id = uuid.uuid4().hex[:8]
+        self.context = context
+        self.counters = Counter()
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def stage(self, name, seconds):
+        self.stages[f"{name}_ms"] = round(seconds * 1000, 1)
+
+    def summary(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return {"duration_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                **self.stages, **counters}
+
+
+@contextmanager
+def run(name, logger=None, **context):
+    """Binds run_id + context to every record of this run; logs the summary when it ends."""
+    current = Run(name, context)
+    token = _current_run.set(current)
+    logger = logger or get_logger(name)
+    status = "ok"
+    try:
+        yield current
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        logger.info(f"{name} run finished", status=status, **current.summary())
+        _current_run.reset(token)
+
+
+def current_run():
+    return _current_run.get()
+
+
+def submit(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the caller's run context (pool threads start with an empty one)."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,282 @@
+"""
+metrics.py — MÉTRICAS DE LATÊNCIA E UPSTREAM (FORMATO PROMETHEUS) 📈
+====================================================================
+A latência de cada request era calculada só para o header X-Neural-Latency e
+os contadores de cache (turbo_fetcher.performance_report, payload_cache,
+user_cache, db_config) ficavam espalhados em /api/debug. Aqui tudo vira
+série agregada, exposta por /api/admin/metrics (admin) em texto Prometheus:
+
+  - HTTP: histograma de latência por rota (regra do Flask, não o path —
+    cardinalidade fixa; rota inexistente = "unmatched"), contagem por status
+    e requests em andamento (in-flight)
+  - UPSTREAM: histograma por host (espn, 365scores, odds_api, google_news,
+    supabase, mercadopago, other) e contagem por resultado (2xx/4xx/5xx/error).
+    instrument_requests() envolve requests.Session.request uma vez — pega
+    requests.get/post dos módulos e o SDK do Mercado Pago; as queries SQL do
+    Supabase entram pelo hook de db_config (kind="sql")
+  - ESTÁGIOS: histograma por estágio do pipeline (auto_picks, fetches
+    paralelos do turbo_fetcher, warm-up) — observe_stage() / stage()
+  - COMPONENTES: register_collector(nome, fn) → valores numéricos de stats()
+    de cada cache, lidos na hora do scrape
+
+As séries são POR WORKER (label worker=pid): com WEB_CONCURRENCY=2 cada
+scrape cai num dos workers; agregue no Prometheus com sum without(worker).
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import log_config
+
+log = log_config.get_logger("metrics")
+
+PREFIX = "neural"
+
+# Seconds. Requests and upstream calls span ~1 ms (cache hit) to ~30 s (cold slate)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Host suffix → label (first match wins)
+UPSTREAM_HOSTS = (
+    ("espn.com", "espn"),
+    ("365scores.com", "365scores"),
+    ("the-odds-api.com", "odds_api"),
+    ("news.google.com", "google_news"),
+    ("supabase.co", "supabase"),
+    ("supabase.com", "supabase"),
+    ("mercadopago.com", "mercadopago"),
+    ("mercadolibre.com", "mercadopago"),
+    ("sqlite", "sqlite"),  # local fallback user DB (db_config, kind="sql")
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Fixed-bucket histogram per label tuple (Prometheus cumulative on export)."""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def render(self, const_labels):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.snapshot().items()):
+            base = _labels(self.label_names, labels, const_labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label tuple."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, n=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, const_labels):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels, const_labels)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, const_labels):
+    pairs = list(const_labels) + list(zip(names, values))
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+# ═══════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════
+http_latency = Histogram(f"{PREFIX}_http_request_duration_seconds",
+                         "Request latency by Flask route.", ("method", "route"))
+http_responses = Counter(f"{PREFIX}_http_responses_total",
+                         "Responses by route and status code.", ("method", "route", "status"))
+upstream_latency = Histogram(f"{PREFIX}_upstream_request_duration_seconds",
+                             "Outbound call latency by upstream host.", ("host", "kind"))
+upstream_calls = Counter(f"{PREFIX}_upstream_requests_total",
+                         "Outbound calls by upstream host and outcome.", ("host", "kind", "outcome"))
+stage_latency = Histogram(f"{PREFIX}_pipeline_stage_duration_seconds",
+                          "Pipeline stage duration.", ("stage",), buckets=STAGE_BUCKETS)
+
+_in_flight = [0]
+_in_flight_lock = threading.Lock()
+_collectors = {}  # component -> callable returning a stats dict
+_started_at = time.time()
+
+
+def request_started():
+    with _in_flight_lock:
+        _in_flight[0] += 1
+
+
+def request_finished():
+    with _in_flight_lock:
+        _in_flight[0] -= 1
+
+
+def in_flight():
+    return _in_flight[0]
+
+
+def observe_request(method, route, status, seconds=None):
+    """One response. `seconds` is None when a security gate answered before the timer started."""
+    route = route or UNMATCHED_ROUTE
+    http_responses.inc((method, route, str(status)))
+    if seconds is not None:
+        http_latency.observe((method, route), seconds)
+
+
+@lru_cache(maxsize=256)
+def host_label(host):
+    """Hostname → bounded upstream label."""
+    host = (host or "").lower()
+    for suffix, label in UPSTREAM_HOSTS:
+        if host == suffix or host.endswith("." + suffix):
+            return label
+    return "other"
+
+
+def observe_upstream(host, seconds, outcome, kind="http"):
+    label = host_label(host)
+    upstream_latency.observe((label, kind), seconds)
+    upstream_calls.inc((label, kind, outcome))
+
+
+def observe_stage(name, seconds):
+    stage_latency.observe((name,), seconds)
+
+
+@contextmanager
+def stage(name):
+    """Times a block as pipeline stage `name` (recorded even when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def register_collector(component, fn):
+    """`fn()` → dict; its numeric values are exported at scrape time as component stats."""
+    _collectors[component] = fn
+
+
+# ═══════════════════════════════════════
+# UPSTREAM INSTRUMENTATION
+# ═══════════════════════════════════════
+_instrumented = [False]
+_instrument_lock = threading.Lock()
+
+
+def instrument_requests():
+    """Wraps requests.Session.request (idempotent) so every outbound HTTP call is timed per host."""
+    with _instrument_lock:
+        if _instrumented[0]:
+            return
+        import requests
+
+        original = requests.Session.request
+
+        def timed_request(self, method, url, *args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                response = original(self, method, url, *args, **kwargs)
+                outcome = f"{response.status_code // 100}xx"
+                return response
+            finally:
+                try:
+                    host = urlsplit(url if isinstance(url, str) else url.decode()).hostname
+                except Exception:
+                    host = None
+                observe_upstream(host, time.perf_counter() - start, outcome)
+
+        timed_request.__wrapped__ = original
+        requests.Session.request = timed_request
+        _instrumented[0] = True
+
+
+# ═══════════════════════════════════════
+# EXPORT
+# ═══════════════════════════════════════
+def _collector_lines(const_labels):
+    name = f"{PREFIX}_component_stat"
+    lines = [f"# HELP {name} Numeric stats() values of caches / queues / pools, read at scrape time.",
+             f"# TYPE {name} untyped"]
+    for component, fn in sorted(_collectors.items()):
+        try:
+            values = fn() or {}
+        except Exception as e:
+            log.warning("[METRICS] Collector failed", component=component, error=str(e))
+            continue
+        for key, value in sorted(values.items()):
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                labels = _labels(("component", "stat"), (component, key), const_labels)
+                lines.append(f"{name}{{{labels}}} {value}")
+    return lines
+
+
+def render():
+    """All series in Prometheus text exposition format (version 0.0.4)."""
+    const_labels = (("worker", str(os.getpid())),)
+    base = _labels((), (), const_labels)
+    lines = [
+        f"# HELP {PREFIX}_http_requests_in_flight Requests being handled by this worker.",
+        f"# TYPE {PREFIX}_http_requests_in_flight gauge",
+        f"{PREFIX}_http_requests_in_flight{{{base}}} {in_flight()}",
+        f"# HELP {PREFIX}_process_start_time_seconds Worker start time (unix).",
+        f"# TYPE {PREFIX}_process_start_time_seconds gauge",
+        f"{PREFIX}_process_start_time_seconds{{{base}}} {_started_at:.3f}",
+    ]
+    for metric in (http_latency, http_responses, upstream_latency, upstream_calls, stage_latency):
+        lines.extend(metric.render(const_labels))
+    lines.extend(_collector_lines(const_labels))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,151 @@
+"""
+payload_cache.py — PAYLOAD PRÉ-SERIALIZADO E PRÉ-COMPRIMIDO ⚡
+=============================================================
+O /api/games re-serializava o slate inteiro (reasons, funnel notes, trebles)
+a cada request. Aqui o JSON canônico é gerado UMA vez por slate, junto com as
+variantes gzip (e brotli, se o pacote estiver instalado), e o request vira um
+lookup de dict.
+
+  - publish(date, data): serializa + comprime + ETag forte (sha1 do JSON)
+  - lookup(date, data):  devolve a entrada se `data` for o mesmo objeto já
+                         publicado (identidade), senão publica
+  - negotiate(accept_encoding): escolhe br > gzip > identity
+  - etag_matches(if_none_match, etag): suporta o ETag por variante ("...-gz")
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+MAX_ENTRIES = 16  # datas mantidas em memória
+
+_entries = {}
+_lock = threading.Lock()
+_stats = {"published": 0, "hits": 0, "bytes_identity": 0, "bytes_sent": 0}
+
+
+class PayloadEntry:
+    """Canonical JSON bytes (or ready-made `body` bytes, e.g. HTML / JS) + compressed variants."""
+
+    __slots__ = ("key", "data", "body", "mimetype", "variants", "etag", "created_at")
+
+    def __init__(self, key, data, body=None, mimetype="application/json"):
+        self.key = key
+        self.data = data
+        self.body = dumps(data) if body is None else body
+        self.mimetype = mimetype
+        self.variants = {"identity": self.body, "gzip": gzip.compress(self.body, GZIP_LEVEL, mtime=0)}
+        if BROTLI_AVAILABLE:
+            self.variants["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:24]
+        self.created_at = time.time()
+
+    def variant_etag(self, encoding):
+        """Strong ETag per representation (each encoding has different bytes)."""
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+    def sizes(self):
+        return {enc: len(body) for enc, body in self.variants.items()}
+
+
+def dumps(data):
+    """Canonical JSON encoding used for every cached payload."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def publish(key, data):
+    entry = PayloadEntry(key, data)
+    with _lock:
+        _entries.pop(key, None)
+        _entries[key] = entry
+        while len(_entries) > MAX_ENTRIES:
+            _entries.pop(next(iter(_entries)))
+        _stats["published"] += 1
+    return entry
+
+
+def get(key):
+    with _lock:
+        return _entries.get(key)
+
+
+def lookup(key, data):
+    """Entry for `data`; re-publishes only when the slate object changed."""
+    entry = get(key)
+    if entry is not None and entry.data is data:
+        with _lock:
+            _stats["hits"] += 1
+        return entry
+    return publish(key, data)
+
+
+def invalidate(key=None):
+    with _lock:
+        if key is None:
+            _entries.clear()
+        else:
+            _entries.pop(key, None)
+
+
+def negotiate(accept_encoding):
+    """Best encoding the client accepts (q=0 excluded): br > gzip > identity."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    for enc in ("br", "gzip"):
+        if enc == "br" and not BROTLI_AVAILABLE:
+            continue
+        if accepted.get(enc, accepted.get("*", 0)) > 0:
+            return enc
+    return "identity"
+
+
+def etag_matches(if_none_match, entry):
+    """True if any ETag in If-None-Match refers to this payload (any encoding variant)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.split("-", 1)[0] == entry.etag:
+            return True
+    return False
+
+
+def record_sent(entry, encoding):
+    with _lock:
+        _stats["bytes_identity"] += len(entry.body)
+        _stats["bytes_sent"] += len(entry.variants[encoding])
+
+
+def stats():
+    with _lock:
+        out = dict(_stats)
+        out["entries"] = len(_entries)
+    out["brotli"] = BROTLI_AVAILABLE
+    return out
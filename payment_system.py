@@ -1,10 +1,10 @@
 
 from datetime import datetime, timedelta
-import mercadopago
 import os
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import db_config
 
 # Initialize extensions (will be bound to app in app.py)
 db = SQLAlchemy()
@@ -14,7 +14,7 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256))
-    subscription_end = db.Column(db.DateTime, nullable=True)
+    subscription_end = db.Column(db.DateTime, nullable=True, index=True)
     role = db.Column(db.String(20), default='user') # 'admin', 'user'
     reset_code = db.Column(db.String(10), nullable=True)
     
@@ -42,7 +42,16 @@ class Payment(db.Model):
 # Payment Logic
 class PaymentManager:
     def __init__(self, access_token):
-        self.sdk = mercadopago.SDK(access_token)
+        self._access_token = access_token
+        self._sdk = None
+
+    @property
+    def sdk(self):
+        """Mercado Pago SDK, created on first payment call (keeps it out of worker boot)."""
+        if self._sdk is None:
+            import mercadopago
+            self._sdk = mercadopago.SDK(self._access_token)
+        return self._sdk
         
     def create_preference(self, user_email):
         """Creates a payment preference for 1 week access."""
@@ -81,9 +90,14 @@ def init_payment_system(app):
     # If the URL starts with postgres://, SQLAlchemy requires it to be postgresql://
     if db_url.startswith('postgres://'):
         db_url = db_url.replace('postgres://', 'postgresql://', 1)
+    # requirements.txt ships psycopg2-binary; SQLAlchemy 2.1+ maps bare postgresql:// to psycopg 3
+    if db_url.startswith('postgresql://'):
+        db_url = db_url.replace('postgresql://', 'postgresql+psycopg2://', 1)
         
     app.config['SQLALCHEMY_DATABASE_URI'] = db_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool sizing, pre-ping/recycle, timeouts, WAL on SQLite (db_config.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_config.engine_options(db_url)
     
     # 🛡️ SECRET_KEY security check
     secret = os.getenv('SECRET_KEY', '')
@@ -94,7 +108,10 @@ def init_payment_system(app):
     db.init_app(app)
     
     with app.app_context():
+        db_config.install(db.engine)
         db.create_all()
+        import admin_users
+        admin_users.ensure_indexes(db)
         # Create default admin if not exists
         if not User.query.filter_by(role='admin').first():
             admin_email = os.getenv('ADMIN_EMAIL', 'admin@bot.com')
@@ -0,0 +1,381 @@
+"""
+profiler.py — PERFIL SOB DEMANDA (PIPELINE + REQUESTS LENTOS) 🔬
+================================================================
+Quando o get_auto_games ou o /api/history ficavam lentos em produção só
+sobravam os prints do log. Aqui o admin ARMA o profiler pelo /admin e os
+resultados viram artefatos em disco (cache/profiles/), listados e baixados
+pelo painel:
+
+  - PIPELINE (determinístico): as próximas N execuções de uma função
+    decorada com @pipeline (auto_picks.get_auto_games) rodam sob cProfile
+    → <id>.prof (pstats: snakeviz / python -m pstats) + resumo top funções.
+    O contador N é consumido atomicamente entre workers (SQLite)
+  - REQUESTS LENTOS (amostragem): enquanto armado, uma thread amostra a
+    pilha das threads de request a cada SAMPLE_MS (sys._current_frames);
+    request que termina acima do limiar (slow_ms) grava <id>.folded
+    (flamegraph.pl / speedscope) + resumo; os rápidos são descartados
+
+SEGURO EM PRODUÇÃO:
+  - Desarmado: custo = ler o estado em cache (recarregado a cada 1 s)
+  - Armado: sempre com prazo (máx MAX_ARM_MINUTES) e N ≤ MAX_PIPELINE_RUNS;
+    amostras por request limitadas (MAX_SAMPLES); amostragem não usa
+    sys.setprofile, então o request não fica mais lento
+  - Retenção: MAX_ARTIFACTS mais recentes e no máximo MAX_AGE_DAYS
+"""
+
+import cProfile
+import functools
+import io
+import json
+import marshal
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+import log_config
+
+log = log_config.get_logger("profiler")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "cache", "profiles"))
+DEFAULT_DB_PATH = os.environ.get("PROFILER_DB", os.path.join(BASE_DIR, "instance", "profiler.db"))
+
+SAMPLE_MS = int(os.environ.get("PROFILER_SAMPLE_MS", 10))
+MAX_SAMPLES = 6000          # per request (~60 s at 10 ms)
+MAX_STACK_DEPTH = 64
+MAX_PIPELINE_RUNS = 20
+MAX_ARM_MINUTES = 60
+MIN_SLOW_MS = 100
+MAX_ARTIFACTS = 40
+MAX_AGE_DAYS = 7
+TOP_FUNCTIONS = 25
+STATE_TTL = 1.0             # seconds a worker trusts its cached arm state
+
+ARTIFACT_RE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{6}-[a-z_]+\.(prof|folded|json)$")
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS arm (
+    id INTEGER PRIMARY KEY CHECK (id = 1), pipeline_runs INTEGER NOT NULL,
+    slow_ms INTEGER, until REAL NOT NULL, armed_at REAL NOT NULL, armed_by TEXT
+)"""
+
+
+class ArmState:
+    """Shared arm state (SQLite WAL, one row); cached per worker for STATE_TTL."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._cached = (0.0, None)  # (loaded_at, row dict or None)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn().execute(_SCHEMA)
+
+    def conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    def arm(self, pipeline_runs=0, slow_ms=None, minutes=15, armed_by=None):
+        pipeline_runs = max(0, min(int(pipeline_runs), MAX_PIPELINE_RUNS))
+        slow_ms = max(MIN_SLOW_MS, int(slow_ms)) if slow_ms else None
+        minutes = max(1, min(float(minutes), MAX_ARM_MINUTES))
+        now = time.time()
+        self.conn().execute(
+            "INSERT OR REPLACE INTO arm (id, pipeline_runs, slow_ms, until, armed_at, armed_by) "
+            "VALUES (1, ?, ?, ?, ?, ?)", (pipeline_runs, slow_ms, now + minutes * 60, now, armed_by))
+        self._cached = (0.0, None)
+        return self.get(fresh=True)
+
+    def disarm(self):
+        self.conn().execute("DELETE FROM arm")
+        self._cached = (0.0, None)
+
+    def get(self, fresh=False):
+        """Current arm state (None when disarmed or expired)."""
+        now = time.time()
+        loaded_at, state = self._cached
+        if fresh or now - loaded_at > STATE_TTL:
+            row = self.conn().execute(
+                "SELECT pipeline_runs, slow_ms, until, armed_at, armed_by FROM arm WHERE id = 1").fetchone()
+            state = dict(zip(("pipeline_runs", "slow_ms", "until", "armed_at", "armed_by"), row)) if row else None
+            self._cached = (now, state)
+        if state is None or state["until"] <= now:
+            return None
+        return state
+
+    def take_pipeline_run(self):
+        """Consumes one armed pipeline run (atomic across workers). False on the fast path."""
+        state = self.get()
+        if state is None or state["pipeline_runs"] <= 0:
+            return False
+        row = self.conn().execute(
+            "UPDATE arm SET pipeline_runs = pipeline_runs - 1 WHERE id = 1 AND pipeline_runs > 0 "
+            "AND until > ? RETURNING pipeline_runs", (time.time(),)).fetchone()
+        self._cached = (0.0, None)
+        return row is not None
+
+
+# ═══════════════════════════════════════
+# ARTIFACTS
+# ═══════════════════════════════════════
+def _new_id(kind):
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}-{kind}"
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _save(kind, meta, payload, ext, artifact_dir=None):
+    """Writes <id>.<ext> + <id>.json and applies retention. Returns the meta (with id/files)."""
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    artifact_id = _new_id(kind)
+    try:
+        os.makedirs(artifact_dir, exist_ok=True)
+        _write_atomic(os.path.join(artifact_dir, f"{artifact_id}.{ext}"), payload)
+        meta = dict(meta, id=artifact_id, kind=kind, created_at=time.time(),
+                    files=[f"{artifact_id}.{ext}", f"{artifact_id}.json"], bytes=len(payload))
+        _write_atomic(os.path.join(artifact_dir, f"{artifact_id}.json"),
+                      json.dumps(meta, ensure_ascii=False, indent=1).encode("utf-8"))
+        prune(artifact_dir)
+        log.info(f"[PROFILER] Saved {kind} profile", id=artifact_id, label=meta.get("label"),
+                 duration_ms=meta.get("duration_ms"))
+        return meta
+    except OSError as e:
+        log.warning("[PROFILER] Could not save profile", error=str(e))
+        return None
+
+
+def list_artifacts(artifact_dir=None):
+    """Newest first: the .json metas of the stored profiles."""
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    if not os.path.isdir(artifact_dir):
+        return []
+    out = []
+    for name in sorted(os.listdir(artifact_dir), reverse=True):
+        if not name.endswith(".json") or not ARTIFACT_RE.match(name):
+            continue
+        try:
+            with open(os.path.join(artifact_dir, name), encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return out
+
+
+def artifact_path(name, artifact_dir=None):
+    """Absolute path of a stored artifact file, or None (name is validated, no traversal)."""
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    if not ARTIFACT_RE.match(name or ""):
+        return None
+    path = os.path.join(artifact_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def prune(artifact_dir=None, max_artifacts=MAX_ARTIFACTS, max_age_days=MAX_AGE_DAYS):
+    """Keeps the newest `max_artifacts` profiles younger than `max_age_days`. Returns ids removed."""
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    ids = sorted({name.rsplit(".", 1)[0] for name in os.listdir(artifact_dir) if ARTIFACT_RE.match(name)},
+                 reverse=True)
+    cutoff = time.time() - max_age_days * 86400
+    removed = []
+    for index, artifact_id in enumerate(ids):
+        meta_path = os.path.join(artifact_dir, f"{artifact_id}.json")
+        try:
+            too_old = os.path.getmtime(meta_path) < cutoff
+        except OSError:
+            too_old = True  # orphan payload without its meta
+        if index >= max_artifacts or too_old:
+            for ext in ("prof", "folded", "json"):
+                try:
+                    os.remove(os.path.join(artifact_dir, f"{artifact_id}.{ext}"))
+                except OSError:
+                    pass
+            removed.append(artifact_id)
+    return removed
+
+
+# ═══════════════════════════════════════
+# PIPELINE (cProfile)
+# ═══════════════════════════════════════
+def _top_functions(profile):
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (_cc, ncalls, tottime, cumtime, _callers) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(filename)}:{line}:{func}", "calls": ncalls,
+                     "self_ms": round(tottime * 1000, 2), "cumulative_ms": round(cumtime * 1000, 2)})
+    by_self = sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:10]
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:TOP_FUNCTIONS], [{"function": r["function"], "self_ms": r["self_ms"]} for r in by_self]
+
+
+def run_profiled(label, fn, *args, **kwargs):
+    """Runs fn under cProfile and stores the artifact (the result / exception pass through)."""
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    error = None
+    profile.enable()
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        profile.disable()
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        try:
+            profile.create_stats()  # .prof = marshal of the stats dict (what dump_stats writes)
+            payload = marshal.dumps(profile.stats)  # before pstats.Stats(), which empties profile.stats
+            top, top_self = _top_functions(profile)
+            _save("pipeline", {"label": label, "duration_ms": duration_ms, "error": error,
+                               "top": top, "top_self": top_self}, payload, "prof")
+        except Exception as e:
+            log.warning("[PROFILER] Pipeline profile failed", error=str(e))
+
+
+def pipeline(label):
+    """Decorator: the next armed runs of the function are profiled (no-op otherwise)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not get_state().take_pipeline_run():
+                return fn(*args, **kwargs)
+            return run_profiled(label, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ═══════════════════════════════════════
+# SLOW REQUESTS (stack sampling)
+# ═══════════════════════════════════════
+class _Trace:
+    __slots__ = ("label", "start", "samples", "count")
+
+    def __init__(self, label):
+        self.label = label
+        self.start = time.perf_counter()
+        self.samples = Counter()
+        self.count = 0
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}:{code.co_name}"
+
+
+def _fold(frame):
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestSampler:
+    """Samples the stacks of registered request threads while slow-request profiling is armed."""
+
+    def __init__(self, interval=SAMPLE_MS / 1000):
+        self.interval = interval
+        self._traces = {}  # thread id -> _Trace
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, label):
+        with self._lock:
+            self._traces[threading.get_ident()] = _Trace(label)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+                self._thread.start()
+
+    def end(self, slow_ms, meta=None, artifact_dir=None):
+        """Stops sampling this thread; stores a profile if the request took ≥ slow_ms."""
+        with self._lock:
+            trace = self._traces.pop(threading.get_ident(), None)
+        if trace is None:
+            return None
+        duration_ms = (time.perf_counter() - trace.start) * 1000
+        if duration_ms < slow_ms or not trace.samples:
+            return None
+        return _save_samples(trace, duration_ms, self.interval, meta, artifact_dir)
+
+    def sample_once(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, trace in self._traces.items():
+                frame = frames.get(thread_id)
+                if frame is None or trace.count >= MAX_SAMPLES:
+                    continue
+                trace.samples[_fold(frame)] += 1
+                trace.count += 1
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._traces:
+                    self._thread = None
+                    return
+            self.sample_once()
+
+
+def _save_samples(trace, duration_ms, interval, meta=None, artifact_dir=None):
+    self_counts, inclusive = Counter(), Counter()
+    for stack, n in trace.samples.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += n
+        for name in set(frames):
+            inclusive[name] += n
+    top = [{"function": name, "self_samples": self_counts[name], "samples": n}
+           for name, n in inclusive.most_common(TOP_FUNCTIONS)]
+    folded = "\n".join(f"{stack} {n}" for stack, n in trace.samples.most_common()) + "\n"
+    meta = dict(meta or {}, label=trace.label, duration_ms=round(duration_ms, 1), samples=trace.count,
+                sample_ms=round(interval * 1000, 2), top=top,
+                top_self=[{"function": n, "samples": c} for n, c in self_counts.most_common(10)])
+    return _save("request", meta, folded.encode("utf-8"), "folded", artifact_dir)
+
+
+# ═══════════════════════════════════════
+# PROCESS-WIDE ACCESS
+# ═══════════════════════════════════════
+_state = None
+_sampler = SlowRequestSampler()
+_init_lock = threading.Lock()
+
+
+def get_state():
+    global _state
+    with _init_lock:
+        if _state is None:
+            _state = ArmState()
+        return _state
+
+
+def request_started(label):
+    """Registers the current request for sampling when slow-request profiling is armed."""
+    state = get_state().get()
+    if state is None or not state["slow_ms"]:
+        return False
+    _sampler.begin(label)
+    return True
+
+
+def request_finished(meta=None):
+    state = get_state().get()
+    # Disarmed mid-request: still drop the trace, with a threshold nothing reaches
+    return _sampler.end(state["slow_ms"] if state and state["slow_ms"] else float("inf"), meta)
+
+
+def status():
+    state = get_state().get(fresh=True)
+    return {"armed": state, "sample_ms": SAMPLE_MS, "max_artifacts": MAX_ARTIFACTS,
+            "max_age_days": MAX_AGE_DAYS, "artifacts": list_artifacts()}
@@ -0,0 +1,232 @@
+"""
+prop_engine.py — PROJEÇÃO DISTRIBUCIONAL DE PLAYER PROPS (SLATE INTEIRO) 🏀
+==========================================================================
+Substitui o loop jogador-a-jogador do generate_nba_tip: todos os titulares
+da noite viram arrays e as distribuições saem numa única passada vetorizada.
+
+ENTRADAS (por jogador):
+  - Médias da temporada (PTS / REB / AST) e minutos (avg_min, proj_min)
+  - Usage: fatia do jogador nos pontos dos titulares do time (ou "usage")
+  - Impacto de ausências: pontos vagos absorvidos proporcionalmente ao usage,
+    bumps posicionais de AST (armador fora) e REB (pivô fora)
+  - Rating defensivo do adversário (1 = média, >1 = defesa ruim)
+
+SAÍDA:
+  - Amostras Gamma × fator de minutos compartilhado (PTS, REB, AST e PRA
+    correlacionados) → média, p10/p50/p90 e P(over)/P(under) nas linhas reais
+    das casas (The-Odds-API) ou numa linha de modelo quando não há linha
+  - Edge por prop (P × odd − 1) para ranquear a noite inteira
+"""
+
+import numpy as np
+
+STATS = ("pts", "reb", "ast", "pra")
+
+DEFAULT_SIMS = 4000
+DEFAULT_SEED = 365
+DEFAULT_MINUTES = 30.0
+DEFAULT_PROP_ODD = 1.85
+BOOK_PRIORITY = ("pinnacle", "bet365")
+
+# Share of vacated points picked up by the remaining starters
+VACATED_ABSORB = 0.55
+# Positional bumps (same rules as ai_engine.simulate_player_props)
+AST_BUMP_PER_GUARD_OUT = 0.20
+REB_BUMP_PER_CENTER_OUT = 0.25
+
+# Game-to-game spread: sd = a × mean + b
+SPREAD = {"pts": (0.18, 1.5), "reb": (0.30, 1.0), "ast": (0.35, 0.8)}
+MINUTES_CV = 0.12
+
+_FIELD = {"pts": "avg_pts", "reb": "avg_reb", "ast": "avg_ast"}
+
+
+def game_key(home, away):
+    return f"{home}|{away}"
+
+
+def book_line(live_odds, player):
+    """Real Over line {"val", "odd"} for a player from The-Odds-API props, or None."""
+    if not live_odds:
+        return None
+    name = player.get("name", "")
+    for alias in (name, name.split(" ")[-1] if name else "", player.get("short_name", "")):
+        if alias and alias in live_odds:
+            lines = live_odds[alias].get("lines", {})
+            for bm in BOOK_PRIORITY:
+                if bm in lines and lines[bm].get("Over"):
+                    return lines[bm]["Over"]
+            for bm_lines in lines.values():
+                if bm_lines.get("Over"):
+                    return bm_lines["Over"]
+            return None
+    return None
+
+
+def _position_flags(positions, word):
+    return np.array([word in (p or "").lower() for p in positions])
+
+
+class PropBoard:
+    """Vectorized projections for every starter on the slate."""
+
+    def __init__(self, rows, means, samples, lines, odds, line_source, reasons):
+        self.rows = rows
+        self.means = means            # {stat: (n,)}
+        self.samples = samples        # {stat: (sims, n)} float32
+        self.lines = lines            # {stat: (n,)}
+        self.odds = odds              # {stat: (n,)}
+        self.line_source = line_source
+        self.reasons = reasons        # list[list[str]]
+
+        self.p_over = {s: (samples[s] > lines[s]).mean(axis=0) for s in STATS}
+        self.quantiles = {s: np.percentile(samples[s], (10, 50, 90), axis=0) for s in STATS}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def props(self, stat="pts", game=None, min_mean=0.0):
+        """Prop dicts for one stat (optionally one game), best edge first."""
+        out = []
+        for i, row in enumerate(self.rows):
+            if game is not None and row["game_key"] != game:
+                continue
+            mean = float(self.means[stat][i])
+            if mean < min_mean:
+                continue
+            p_over = float(self.p_over[stat][i])
+            odd = float(self.odds[stat][i])
+            q10, q50, q90 = (float(q[i]) for q in self.quantiles[stat])
+            out.append({
+                "game_key": row["game_key"],
+                "team": row["team"],
+                "player": row["player"].get("name", ""),
+                "stat": stat,
+                "line": float(self.lines[stat][i]),
+                "line_source": self.line_source[stat][i],
+                "odd": odd,
+                "mean": round(mean, 1),
+                "avg": float(row["player"].get(_FIELD.get(stat, "avg_pts"), 0.0)) if stat != "pra" else None,
+                "p10": round(q10, 1), "p50": round(q50, 1), "p90": round(q90, 1),
+                "p_over": round(p_over, 4),
+                "p_under": round(1 - p_over, 4),
+                "edge": round(p_over * odd - 1, 4),
+                "reasons": self.reasons[i],
+            })
+        out.sort(key=lambda p: p["edge"], reverse=True)
+        return out
+
+    def top(self, n=10, stat="pts", min_mean=15.0):
+        """Slate-wide ranking by edge."""
+        return self.props(stat, min_mean=min_mean)[:n]
+
+
+def project_slate(sides, live_odds=None, n_sims=DEFAULT_SIMS, seed=DEFAULT_SEED):
+    """
+    Builds the PropBoard for a list of team sides:
+        {"game_key", "team", "starters": [...], "missing": [...], "opp_def_rating": 1.0}
+    Starters/missing use the scores365 player format (avg_pts, avg_reb, avg_ast, position).
+    """
+    rows = []
+    for side in sides:
+        starters = [p for p in side.get("starters", []) if p.get("avg_pts", 0) > 0]
+        team_pts = sum(p.get("avg_pts", 0.0) for p in starters) or 1.0
+        missing = side.get("missing", [])
+        vacated = sum(m.get("avg_pts", 0.0) for m in missing)
+        guards_out = sum("guard" in (m.get("position", "") or "").lower() for m in missing)
+        centers_out = sum("center" in (m.get("position", "") or "").lower() for m in missing)
+        for p in starters:
+            rows.append({
+                "game_key": side["game_key"],
+                "team": side.get("team", ""),
+                "player": p,
+                "usage": p.get("usage") or p.get("avg_pts", 0.0) / team_pts,
+                "vacated": vacated,
+                "guards_out": guards_out,
+                "centers_out": centers_out,
+                "opp_def": side.get("opp_def_rating") or 1.0,
+            })
+
+    n = len(rows)
+    if n == 0:
+        empty = {s: np.zeros(0) for s in STATS}
+        return PropBoard([], empty, {s: np.zeros((n_sims, 0), dtype=np.float32) for s in STATS},
+                         empty, empty, {s: [] for s in STATS}, [])
+
+    players = [r["player"] for r in rows]
+    avg = {s: np.array([p.get(f, 0.0) for p in players], dtype=np.float64) for s, f in _FIELD.items()}
+    usage = np.array([r["usage"] for r in rows])
+    vacated = np.array([r["vacated"] for r in rows])
+    guards_out = np.array([r["guards_out"] for r in rows])
+    centers_out = np.array([r["centers_out"] for r in rows])
+    opp_def = np.array([r["opp_def"] for r in rows])
+    avg_min = np.array([p.get("avg_min") or DEFAULT_MINUTES for p in players], dtype=np.float64)
+    proj_min = np.array([p.get("proj_min") or p.get("avg_min") or DEFAULT_MINUTES for p in players], dtype=np.float64)
+    minute_scale = proj_min / avg_min
+
+    positions = [p.get("position", "") for p in players]
+    is_guard = _position_flags(positions, "guard")
+    is_forward = _position_flags(positions, "forward")
+    is_center = _position_flags(positions, "center")
+
+    ast_bump = 1 + AST_BUMP_PER_GUARD_OUT * guards_out * (is_guard | is_forward)
+    reb_bump = 1 + REB_BUMP_PER_CENTER_OUT * centers_out * (is_forward | is_center)
+
+    means = {
+        "pts": (avg["pts"] * minute_scale + vacated * VACATED_ABSORB * usage) * opp_def,
+        "reb": avg["reb"] * minute_scale * reb_bump * (1 + (opp_def - 1) * 0.5),
+        "ast": avg["ast"] * minute_scale * ast_bump * opp_def,
+    }
+    means["pra"] = means["pts"] + means["reb"] + means["ast"]
+
+    # Gamma draws per stat, scaled by a shared minutes factor (drives the PRA correlation)
+    rng = np.random.default_rng(seed)
+    k_min = 1 / MINUTES_CV ** 2
+    minutes = rng.gamma(k_min, 1 / k_min, size=(n_sims, n)).astype(np.float32)
+    samples = {}
+    for stat in ("pts", "reb", "ast"):
+        a, b = SPREAD[stat]
+        mean = np.maximum(means[stat], 0.1)
+        var = np.maximum((a * mean + b) ** 2 - (mean * MINUTES_CV) ** 2, 0.05)
+        shape, scale = mean ** 2 / var, var / mean
+        samples[stat] = rng.gamma(shape, scale, size=(n_sims, n)).astype(np.float32) * minutes
+    samples["pra"] = samples["pts"] + samples["reb"] + samples["ast"]
+
+    # Lines: real bookmaker line for points when available, else a model line at the season average
+    lines, odds, line_source = {}, {}, {}
+    for stat in STATS:
+        base = avg["pts"] + avg["reb"] + avg["ast"] if stat == "pra" else avg[stat]
+        lines[stat] = np.floor(np.maximum(base, 0.5)) + 0.5
+        odds[stat] = np.full(n, DEFAULT_PROP_ODD)
+        line_source[stat] = ["model"] * n
+    for i, p in enumerate(players):
+        real = book_line(live_odds, p)
+        if real:
+            lines["pts"][i] = float(real.get("val", lines["pts"][i]))
+            odds["pts"][i] = float(real.get("odd", DEFAULT_PROP_ODD))
+            line_source["pts"][i] = "book"
+
+    reasons = []
+    for i in range(n):
+        r = []
+        if means["pts"][i] > avg["pts"][i] + 4.5:
+            r.append(f"🔥 USAGE BOOST: Projetando {means['pts'][i]:.1f} PTS (Média: {avg['pts'][i]:.1f}) devido a ausências no time.")
+        if means["ast"][i] > avg["ast"][i] + 2.5:
+            r.append(f"🧠 PLAYMAKER BUMP: Projetando {means['ast'][i]:.1f} AST (Média: {avg['ast'][i]:.1f}) assumindo armação do time.")
+        if means["reb"][i] > avg["reb"][i] + 3.0:
+            r.append(f"💪 GLASS CLEANER: Projetando {means['reb'][i]:.1f} REB (Média: {avg['reb'][i]:.1f}) cobrindo o garrafão.")
+        reasons.append(r)
+
+    return PropBoard(rows, means, samples, lines, odds, line_source, reasons)
+
+
+def sides_from_game(game, opp_def_home=1.0, opp_def_away=1.0):
+    """Team sides for project_slate from an auto_picks raw game with _team_intel."""
+    intel = game.get("_team_intel", {})
+    key = game_key(game["home"], game["away"])
+    return [
+        {"game_key": key, "team": game["home"], "starters": intel.get("home", {}).get("starters", []),
+         "missing": intel.get("home", {}).get("missing", []), "opp_def_rating": opp_def_home},
+        {"game_key": key, "team": game["away"], "starters": intel.get("away", {}).get("starters", []),
+         "missing": intel.get("away", {}).get("missing", []), "opp_def_rating": opp_def_away},
+    ]
@@ -10,6 +10,8 @@ import requests
 import time
 import sys
 
+import log_config
+
 # Fix encoding for Windows terminals
 os.environ["PYTHONIOENCODING"] = "utf-8"
 try:
@@ -17,6 +19,8 @@ try:
 except:
     pass
 
+log = log_config.get_logger("result_checker")
+
 HISTORY_FILE = os.path.join(os.path.dirname(__file__), "history.json")
 
 # ESPN API endpoints by league
@@ -85,7 +89,7 @@ def fetch_espn_results(league, date_str):
         url = f"{endpoint}?dates={date_str}"
         resp = requests.get(url, timeout=10)
         if resp.status_code != 200:
-            print(f"[RESULT-CHECK] ⚠️ ESPN {league} returned {resp.status_code}")
+            log.warning("[RESULT-CHECK] ⚠️ ESPN error status", league=league, status=resp.status_code)
             return []
 
         data = resp.json()
@@ -129,7 +133,7 @@ def fetch_espn_results(league, date_str):
 
         return results
     except Exception as e:
-        print(f"[RESULT-CHECK] ❌ Error fetching {league}: {e}")
+        log.error("[RESULT-CHECK] ❌ Error fetching", league=league, error=str(e))
         return []
 
 
@@ -185,7 +189,7 @@ def determine_pick_result(pick, home_score, away_score):
             total = home_score + away_score
             return "WON" if total < line else "LOST"
 
-    print(f"[RESULT-CHECK] ⚠️ Could not determine result for: {selection}")
+    log.debug("[RESULT-CHECK] ⚠️ Could not determine result", selection=selection)
     return "PENDING"
 
 
@@ -204,16 +208,20 @@ def save_history(history):
     """Save history.json."""
     with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
         json.dump(history, f, ensure_ascii=False, indent=4)
-    print(f"[RESULT-CHECK] 💾 History saved ({len(history)} entries)")
+    log.debug("[RESULT-CHECK] 💾 History saved", entries=len(history))
 
 
 def check_and_update_results():
     """
     Main function: checks all games from dashboard (active games)
     and finished PENDING games in history, updates with real results.
-    Returns summary of updates made.
+    Returns summary of updates made (logged as one run-summary line).
     """
-    print(f"[RESULT-CHECK] 🔍 Starting result check at {datetime.datetime.now()}")
+    with log_config.run("result_check", logger=log) as run:
+        return _check_and_update_results(run)
+
+
+def _check_and_update_results(run):
 
     history = load_history()
     updates_made = 0
@@ -227,7 +235,7 @@ def check_and_update_results():
                 pending_dates.add(date_str)
 
     if not pending_dates:
-        print("[RESULT-CHECK] ✅ No PENDING entries found")
+        log.debug("[RESULT-CHECK] ✅ No PENDING entries found")
         return {"updates": 0, "greens": 0, "reds": 0}
 
     # Convert dates to ESPN format (DD/MM -> YYYYMMDD)
@@ -255,7 +263,7 @@ def check_and_update_results():
             all_results.extend(results)
             time.sleep(0.3)  # Rate limit
 
-    print(f"[RESULT-CHECK] 📊 Found {len(all_results)} finished games from ESPN")
+    run.count("espn_finished", len(all_results))
 
     # Match results to PENDING entries
     greens = 0
@@ -306,13 +314,15 @@ def check_and_update_results():
                         reds += 1
 
                     updates_made += 1
-                    print(f"[RESULT-CHECK] {'🟢' if status == 'WON' else '🔴'} {entry_home} vs {entry_away}: {h_score}-{a_score} → {status}")
+                    log.debug(f"[RESULT-CHECK] {'🟢' if status == 'WON' else '🔴'} Result",
+                              game=f"{entry_home} vs {entry_away}", score=f"{h_score}-{a_score}", status=status)
 
                 matched = True
                 break
 
         if not matched:
-            print(f"[RESULT-CHECK] ⏳ No result yet for: {entry_home} vs {entry_away} ({entry_league})")
+            run.count("no_result_yet")
+            log.debug("[RESULT-CHECK] ⏳ No result yet", game=f"{entry_home} vs {entry_away}", league=entry_league)
 
     if updates_made > 0:
         save_history(history)
@@ -324,7 +334,9 @@ def check_and_update_results():
         "timestamp": datetime.datetime.now().isoformat()
     }
 
-    print(f"[RESULT-CHECK] ✅ Done: {updates_made} updates ({greens}G/{reds}R)")
+    run.count("updates", updates_made)
+    run.count("greens", greens)
+    run.count("reds", reds)
     return summary
 
 
@@ -0,0 +1,445 @@
+"""
+scheduler.py — AGENDADOR DE JOBS EM PROCESSO 🗓️
+===============================================
+O trabalho em background nascia de vários jeitos sem coordenação:
+/api/cron/update abria uma Thread crua a cada hit (sem trava de overlap),
+o data_fetcher abria threads de _bg_refresh, o study_results tinha um
+throttle num global do auto_picks e o auto_updater rodava pelo Agendador
+de Tarefas do Windows (setup_scheduler.ps1). Aqui tudo vira JOB nomeado:
+
+  - Gatilhos: Interval(segundos) ou Cron("30 0 * * *") (min hora dia mês dia-semana)
+  - Sem overlap: um job nunca roda duas vezes ao mesmo tempo no processo;
+    enqueue() durante uma execução com os MESMOS argumentos é descartado
+    (overlap="skip") ou marca UMA re-execução ao final (overlap="coalesce");
+    argumentos diferentes (ex.: refresh_games de outra data) entram na fila
+    do job, uma vez por conjunto de argumentos
+  - Leader election entre workers do gunicorn via lock file (fcntl.flock,
+    msvcrt no Windows): só o líder dispara os gatilhos agendados, qualquer
+    worker pode executar um enqueue() (cron endpoints, refresh de cache)
+  - run_if_due(nome, min_interval): execução síncrona com throttle
+    (substitui o _last_study_time do auto_picks) — devolve None (não rodou)
+    ou o status da execução ("ok" / "error")
+  - Histórico por job: início, duração, status, erro (ring buffer)
+
+ENDPOINTS: /api/cron/update e /api/cron/results só fazem enqueue();
+/api/admin/jobs mostra o estado de cada job.
+"""
+
+import datetime
+import os
+import threading
+import time
+import traceback
+from collections import deque
+
+TICK_SECONDS = 5
+HISTORY_SIZE = 20
+LEADER_RETRY_SECONDS = 30
+LOCK_PATH = os.environ.get(
+    "SCHEDULER_LOCK_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "scheduler.lock"),
+)
+
+
+# ═══════════════════════════════════════
+# TRIGGERS
+# ═══════════════════════════════════════
+class Interval:
+    """Fires every `seconds` (first run after `seconds`, unless run_at_start)."""
+
+    def __init__(self, seconds, run_at_start=False):
+        self.seconds = seconds
+        self.run_at_start = run_at_start
+
+    def next_after(self, now):
+        return now + datetime.timedelta(seconds=self.seconds)
+
+    def first(self, now):
+        return now if self.run_at_start else self.next_after(now)
+
+    def __repr__(self):
+        return f"every {self.seconds}s"
+
+
+def _parse_cron_field(field, lo, hi):
+    values = set()
+    for part in field.split(","):
+        spec, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if spec == "*":
+            start, end = lo, hi
+        elif "-" in spec:
+            start, end = (int(x) for x in spec.split("-", 1))
+        else:
+            start = end = int(spec)
+        if start < lo or end > hi or start > end or step < 1:
+            raise ValueError(f"invalid cron field '{field}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Cron:
+    """Five-field cron expression in local time (day-of-week: 0 = Sunday)."""
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: '{expr}'")
+        self.expr = expr
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_cron_field(fields[4], 0, 7)}
+        # Classic cron: when both day fields are restricted, either one matches
+        self._day_or = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, t):
+        dom = t.day in self.days
+        dow = (t.isoweekday() % 7) in self.weekdays
+        return (dom or dow) if self._day_or else (dom and dow)
+
+    def next_after(self, now):
+        t = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = t + datetime.timedelta(days=4 * 366)  # Feb 29 fires within 4 years
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                t = t.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            if t.minute not in self.minutes:
+                t += datetime.timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"cron expression never fires: '{self.expr}'")
+
+    def first(self, now):
+        return self.next_after(now)
+
+    def __repr__(self):
+        return f"cron '{self.expr}'"
+
+
+# ═══════════════════════════════════════
+# LEADER ELECTION (lock file)
+# ═══════════════════════════════════════
+class LeaderLock:
+    """Non-blocking exclusive lock on a file; held for the life of the process."""
+
+    def __init__(self, path=LOCK_PATH):
+        self.path = path
+        self._fh = None
+
+    @property
+    def held(self):
+        return self._fh is not None
+
+    def try_acquire(self):
+        if self._fh is not None:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fh = open(self.path, "a+")
+        except OSError as e:
+            print(f"[SCHED] ⚠️ Lock file unavailable ({e}) — running as leader")
+            self._fh = True
+            return True
+        try:
+            try:
+                import fcntl
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        except (OSError, ImportError):
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(f"{os.getpid()}\n")
+        fh.flush()
+        self._fh = fh
+        return True
+
+
+# ═══════════════════════════════════════
+# JOBS
+# ═══════════════════════════════════════
+def _args_key(args, kwargs):
+    return repr((args, sorted(kwargs.items())))
+
+
+class Job:
+    def __init__(self, name, func, trigger=None, leader_only=True, overlap="coalesce"):
+        if overlap not in ("skip", "coalesce"):
+            raise ValueError(f"unknown overlap policy '{overlap}'")
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.leader_only = leader_only
+        self.overlap = overlap
+        self.next_run = None
+        self.running = False
+        self.current = None  # args key of the running execution
+        self.pending = {}  # args key -> (args, kwargs) queued while running, in order
+        self.last_run = 0.0  # epoch of the last start
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.counts = {"ok": 0, "error": 0, "coalesced": 0, "skipped": 0}
+
+    def snapshot(self):
+        return {
+            "name": self.name,
+            "trigger": repr(self.trigger) if self.trigger else None,
+            "leader_only": self.leader_only,
+            "overlap": self.overlap,
+            "running": self.running,
+            "pending": len(self.pending),
+            "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+            "counts": dict(self.counts),
+            "history": list(self.history),
+        }
+
+
+class Scheduler:
+    """Named jobs, triggers, non-overlap and run history for one process."""
+
+    def __init__(self, lock=None, tick=TICK_SECONDS):
+        self.jobs = {}
+        self.lock = lock or LeaderLock()
+        self.tick = tick
+        self._mutex = threading.Condition()  # also signals job completion (wait())
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_leader_try = 0.0
+
+    def register(self, name, func, trigger=None, leader_only=True, overlap="coalesce"):
+        with self._mutex:
+            job = Job(name, func, trigger, leader_only, overlap)
+            if trigger is not None:
+                job.next_run = trigger.first(datetime.datetime.now())
+            self.jobs[name] = job
+        return job
+
+    # ─── Execution ───
+
+    def _claim(self, job, args, kwargs):
+        """
+        Marks the job running → "started". When it already is: same args under
+        overlap="skip" → "skipped"; otherwise queued once per args → "coalesced".
+        """
+        key = _args_key(args, kwargs)
+        with self._mutex:
+            if job.running:
+                if job.overlap == "skip" and key == job.current:
+                    job.counts["skipped"] += 1
+                    return "skipped"
+                job.pending[key] = (args, kwargs)
+                job.counts["coalesced"] += 1
+                return "coalesced"
+            job.running = True
+            job.current = key
+            job.last_run = time.time()
+            return "started"
+
+    def _execute(self, job, args, kwargs, source):
+        """Runs the claimed job (then anything queued meanwhile); returns the last run's status."""
+        while True:
+            started = time.time()
+            status, error = "ok", None
+            try:
+                job.func(*args, **kwargs)
+            except Exception as e:
+                status, error = "error", str(e)
+                print(f"[SCHED] ❌ Job '{job.name}' failed: {e}")
+                traceback.print_exc()
+            duration = time.time() - started
+            with self._mutex:
+                job.counts[status] += 1
+                job.history.append({
+                    "started": datetime.datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+                    "duration_s": round(duration, 3),
+                    "status": status,
+                    "error": error,
+                    "source": source,
+                })
+                if not job.pending:
+                    job.running = False
+                    job.current = None
+                    self._mutex.notify_all()
+                    return status
+                key = next(iter(job.pending))
+                args, kwargs = job.pending.pop(key)
+                job.current = key
+                job.last_run = time.time()
+                source = "coalesced"
+
+    def enqueue(self, name, *args, **kwargs):
+        """
+        Runs the job in a background thread. Returns "started", or — when it is
+        already running — "coalesced" (runs afterwards) / "skipped" (see _claim).
+        """
+        job = self.jobs[name]
+        state = self._claim(job, args, kwargs)
+        if state != "started":
+            return state
+        threading.Thread(target=self._execute, args=(job, args, kwargs, "enqueue"),
+                         daemon=True, name=f"job-{name}").start()
+        return "started"
+
+    def wait(self, name, timeout=None):
+        """Blocks until the job is idle (or timeout). Returns True when it is idle."""
+        job = self.jobs[name]
+        with self._mutex:
+            return self._mutex.wait_for(lambda: not job.running, timeout)
+
+    def is_running(self, name):
+        with self._mutex:
+            return self.jobs[name].running
+
+    def run_if_due(self, name, min_interval, *args, **kwargs):
+        """
+        Synchronous throttled run: executes inline when the last start is older
+        than `min_interval` seconds and the job is idle. Returns None when it did
+        not run, else the status of the run ("ok" / "error").
+        """
+        job = self.jobs[name]
+        with self._mutex:
+            if job.running or time.time() - job.last_run < min_interval:
+                job.counts["skipped"] += 1
+                return None
+            job.running = True
+            job.current = _args_key(args, kwargs)
+            job.last_run = time.time()
+        return self._execute(job, args, kwargs, "inline")
+
+    # ─── Trigger loop ───
+
+    def _is_leader(self):
+        if self.lock.held:
+            return True
+        now = time.time()
+        if now - self._last_leader_try < LEADER_RETRY_SECONDS:
+            return False
+        self._last_leader_try = now
+        if self.lock.try_acquire():
+            print(f"[SCHED] 👑 Worker {os.getpid()} is the scheduler leader")
+            return True
+        return False
+
+    def run_pending(self, now=None):
+        """Fires every due trigger once. Returns the names of the jobs started."""
+        now = now or datetime.datetime.now()
+        leader = None
+        started = []
+        for job in list(self.jobs.values()):
+            if job.next_run is None or job.next_run > now:
+                continue
+            if job.leader_only:
+                if leader is None:
+                    leader = self._is_leader()
+                if not leader:
+                    job.next_run = job.trigger.next_after(now)
+                    continue
+            job.next_run = job.trigger.next_after(now)
+            if self._claim(job, (), {}) == "started":
+                threading.Thread(target=self._execute, args=(job, (), {}, "trigger"),
+                                 daemon=True, name=f"job-{job.name}").start()
+                started.append(job.name)
+        return started
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"[SCHED] ⚠️ Loop error: {e}")
+
+    def start(self):
+        with self._mutex:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="scheduler")
+            self._thread.start()
+        self._is_leader()
+        print(f"[SCHED] 🗓️ Scheduler started ({len(self.jobs)} jobs, leader={self.lock.held})")
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        with self._mutex:
+            return {
+                "pid": os.getpid(),
+                "leader": self.lock.held,
+                "jobs": {name: job.snapshot() for name, job in self.jobs.items()},
+            }
+
+
+# ═══════════════════════════════════════
+# DEFAULT JOBS
+# ═══════════════════════════════════════
+def _job_update_today():
+    """Daily update: refresh today's slate, then check results."""
+    import data_fetcher
+    import result_checker
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    print(f"🔄 Refreshing data for {today}...")
+    data_fetcher.get_games_for_date(today, force_refresh=True)
+    summary = result_checker.check_and_update_results()
+    print(f"✅ Result Check Complete: {summary}")
+    return summary
+
+
+def _job_check_results():
+    import result_checker
+    return result_checker.check_and_update_results()
+
+
+def _job_refresh_games(target_date):
+    import data_fetcher
+    return data_fetcher.refresh_games_cache(target_date)
+
+
+def _job_history_autoupdate():
+    """Same-day auto-update of history.json (today's finished games / results)."""
+    import data_fetcher
+    data_fetcher.get_history_games()
+
+
+def _job_study_results():
+    from self_learning import study_results
+    return study_results()
+
+
+def _job_auto_updater():
+    import auto_updater
+    return auto_updater.run()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler with the default jobs registered (not started)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            s = Scheduler()
+            s.register("update_today", _job_update_today, leader_only=False)
+            s.register("check_results", _job_check_results,
+                       Interval(int(os.environ.get("RESULTS_CHECK_INTERVAL", 1800))))
+            s.register("refresh_games", _job_refresh_games, leader_only=False, overlap="skip")
+            s.register("study_results", _job_study_results, leader_only=False)
+            s.register("history_autoupdate", _job_history_autoupdate, leader_only=False, overlap="skip")
+            # auto_updater pushes history.json to GitHub: opt-in on the server
+            nightly = Cron("30 0 * * *") if os.environ.get("AUTO_UPDATER_IN_APP") == "1" else None
+            s.register("auto_updater", _job_auto_updater, nightly)
+            _scheduler = s
+        return _scheduler
@@ -16,6 +16,7 @@ import json
 import os
 import sys
 from nba_stats import get_nba_player_stats
+import log_config
 
 os.environ["PYTHONIOENCODING"] = "utf-8"
 try:
@@ -26,6 +27,8 @@ except:
 # ═══════════════════════════════════════
 # 365SCORES API CONFIG
 # ═══════════════════════════════════════
+log = log_config.get_logger("scores365")
+
 BASE_URL = "https://webws.365scores.com/web"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 PARAMS = {
@@ -74,7 +77,7 @@ def _get(endpoint, extra_params=None):
         if r.status_code == 200:
             return r.json()
     except Exception as e:
-        print(f"[365] ⚠️ API Error ({endpoint}): {e}")
+        log.warning("[365] ⚠️ API Error", endpoint=endpoint, error=str(e))
     return None
 
 
@@ -460,7 +463,7 @@ def get_lineup_intelligence(home_team, away_team, target_date=None, sport="footb
     
     sport_id = SPORT_IDS.get(sport, None)
     sport_label = "🏀" if sport == "basketball" else "⚽"
-    print(f"[365] {sport_label} Buscando lineup intel: {home_team} vs {away_team}")
+    log.debug(f"[365] {sport_label} Buscando lineup intel", game=f"{home_team} vs {away_team}")
     
     # Fetch games filtered by sport
     games = get_games_today(target_date, sport_id=sport_id)
@@ -500,7 +503,7 @@ def get_lineup_intelligence(home_team, away_team, target_date=None, sport="footb
             break
     
     if not game_id:
-        print(f"[365] ⚠️ Game not found on 365Scores")
+        log.debug("[365] ⚠️ Game not found on 365Scores", game=f"{home_team} vs {away_team}")
         return None
     
     # Get full details
@@ -607,7 +610,8 @@ def get_lineup_intelligence(home_team, away_team, target_date=None, sport="footb
     if intel["venue"]:
         intel["key_facts"].append(f"🏟️ Estádio: {intel['venue']}")
     
-    print(f"[365] ✅ Intelligence ready: {len(intel['key_facts'])} facts, adj={intel['prob_adjustment']:+d}%")
+    log.debug("[365] ✅ Intelligence ready", game=f"{home_team} vs {away_team}", facts=len(intel['key_facts']),
+              adj=intel['prob_adjustment'])
     return intel
 
 
@@ -687,11 +691,11 @@ def fetch_results_365scores(target_date=None):
                             if len(parts) > 2:
                                 results[parts[0]] = result_obj  # First word
                         
-            print(f"[365-RESULTS] ✅ {sport_name}: {len(games)} jogos encontrados")
+            log.debug("[365-RESULTS] ✅ Jogos encontrados", sport=sport_name, games=len(games))
         except Exception as e:
-            print(f"[365-RESULTS] ⚠️ Erro ao buscar {sport_name}: {e}")
+            log.warning("[365-RESULTS] ⚠️ Erro ao buscar", sport=sport_name, error=str(e))
     
-    print(f"[365-RESULTS] 📊 Total: {len(results)} entradas de resultado")
+    log.info("[365-RESULTS] 📊 Resultados", entries=len(results))
     return results
 
 
@@ -765,7 +769,7 @@ def fetch_result_from_google(home_team, away_team):
                 }
         
     except Exception as e:
-        print(f"[GOOGLE] ⚠️ Erro ao buscar resultado: {e}")
+        log.warning("[GOOGLE] ⚠️ Erro ao buscar resultado", error=str(e))
     
     return None
 
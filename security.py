@@ -6,70 +6,126 @@ Central security layer: rate limiting, IP logging, honeypot traps, anti-scan war
 import time
 import re
 import threading
-import datetime
 import os
 import json
-from functools import wraps
+from collections import OrderedDict
+from functools import lru_cache, wraps
 from flask import request, jsonify, abort
 
+import log_config
+import security_events
+
 # ============================================================
 # RATE LIMITER — In-memory tracker per IP
 # ============================================================
 
 class RateLimiter:
-    """Thread-safe in-memory rate limiter using sliding window."""
-    
-    def __init__(self):
-        self._store = {}  # key -> list of timestamps
-        self._lock = threading.Lock()
-        self._cleanup_thread = threading.Thread(target=self._auto_cleanup, daemon=True)
-        self._cleanup_thread.start()
-    
-    def _auto_cleanup(self):
-        while True:
-            time.sleep(600)
-            self._cleanup()
-    
-    def _cleanup(self):
-        now = time.time()
-        with self._lock:
-            expired_keys = [k for k, v in self._store.items() if not [t for t in v if now - t < 3600]]
-            for key in expired_keys:
-                del self._store[key]
-            for key in list(self._store.keys()):
-                self._store[key] = [t for t in self._store[key] if now - t < 3600]
-    
+    """
+    Thread-safe in-memory rate limiter using sliding-window counters.
+
+    Constant state per (key, window): current window start, current and previous
+    window counts, last-seen time. The count is estimated as
+    prev × (1 − elapsed / window) + cur — no timestamp lists, no rescans.
+    Keys live in LOCK_SHARDS LRU shards (one lock each); a shard at its share of
+    max_keys evicts idle keys first, then the least recently used one.
+    """
+
+    LOCK_SHARDS = 16
+    DEFAULT_WINDOW = 3600  # record_hit() without a window
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._shard_cap = max(1, max_keys // self.LOCK_SHARDS)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(self.LOCK_SHARDS)]
+        self.evictions = 0
+
+    def _shard(self, key):
+        return self._shards[hash(key) % self.LOCK_SHARDS]
+
+    def _entry(self, store, key, window, now, create):
+        """[window_start, cur, prev, last_seen] rolled forward to `now` (caller holds the lock)."""
+        entry = store.get(key)
+        if entry is None:
+            if not create:
+                return None
+            if len(store) >= self._shard_cap:
+                self._evict(store, now)
+            entry = [now - now % window, 0, 0, now]
+            store[key] = entry
+            return entry
+        store.move_to_end(key)
+        start = now - now % window
+        if start != entry[0]:
+            # One window later the current count becomes the previous; two or more → both reset
+            entry[2] = entry[1] if start - entry[0] == window else 0
+            entry[1] = 0
+            entry[0] = start
+        return entry
+
+    def _evict(self, store, now):
+        """Drops keys idle for two windows from the LRU end; else the LRU key."""
+        while store:
+            (key, window), entry = next(iter(store.items()))
+            if now - entry[3] < 2 * window and len(store) < self._shard_cap:
+                return
+            store.popitem(last=False)
+            self.evictions += 1
+            if now - entry[3] < 2 * window:
+                return
+
+    @staticmethod
+    def _estimate(entry, window, now):
+        weight = 1.0 - (now - entry[0]) / window
+        return entry[2] * weight + entry[1]
+
     def is_rate_limited(self, key, max_calls, window_seconds):
         now = time.time()
-        with self._lock:
-            if key not in self._store:
-                self._store[key] = []
-            self._store[key] = [t for t in self._store[key] if now - t < window_seconds]
-            if len(self._store[key]) >= max_calls:
-                oldest = self._store[key][0]
-                retry_after = int(window_seconds - (now - oldest)) + 1
-                return True, retry_after
-            self._store[key].append(now)
+        ck = (key, window_seconds)
+        lock, store = self._shard(ck)
+        with lock:
+            entry = self._entry(store, ck, window_seconds, now, create=True)
+            entry[3] = now
+            if self._estimate(entry, window_seconds, now) >= max_calls:
+                # Time until the weighted previous window decays enough (bounded by the window)
+                elapsed = now - entry[0]
+                if entry[1] >= max_calls or entry[2] == 0:
+                    wait = window_seconds - elapsed
+                else:
+                    wait = (1 - (max_calls - entry[1]) / entry[2]) * window_seconds - elapsed
+                return True, int(max(0.0, min(wait, window_seconds))) + 1
+            entry[1] += 1
             return False, 0
-    
+
     def get_count(self, key, window_seconds):
-        """Get current hit count for a key within window."""
+        """Get current (estimated) hit count for a key within window."""
         now = time.time()
-        with self._lock:
-            if key not in self._store:
+        ck = (key, window_seconds)
+        lock, store = self._shard(ck)
+        with lock:
+            entry = self._entry(store, ck, window_seconds, now, create=False)
+            if entry is None:
                 return 0
-            return len([t for t in self._store[key] if now - t < window_seconds])
-    
-    def record_hit(self, key):
+            return int(round(self._estimate(entry, window_seconds, now)))
+
+    def record_hit(self, key, window_seconds=None):
+        window = window_seconds or self.DEFAULT_WINDOW
         now = time.time()
-        with self._lock:
-            if key not in self._store:
-                self._store[key] = []
-            self._store[key].append(now)
+        ck = (key, window)
+        lock, store = self._shard(ck)
+        with lock:
+            entry = self._entry(store, ck, window, now, create=True)
+            entry[1] += 1
+            entry[3] = now
 
+    def size(self):
+        total = 0
+        for lock, store in self._shards:
+            with lock:
+                total += len(store)
+        return total
 
-# Global rate limiter instance
-limiter = RateLimiter()
+
+SCAN_SCORE_WINDOW = 120  # scan_score:<ip> hits are counted over 2 min
 
 # ============================================================
 # IP BLOCKER — Dynamic IP blacklist
@@ -93,7 +149,8 @@ class IPBlocker:
             actual_duration = min(actual_duration, max_duration)
             
             self._blocked[ip] = time.time() + actual_duration
-        _log_security_event("IP_BLOCKED", ip, f"Duration={actual_duration}s Strike#{strikes} | {reason}")
+        _log_block(ip, actual_duration, strikes, reason)
+        return actual_duration, strikes
     
     def is_blocked(self, ip):
         with self._lock:
@@ -113,30 +170,93 @@ class IPBlocker:
             now = time.time()
             return len({ip: t for ip, t in self._blocked.items() if t > now})
 
+    def active_blocks(self, limit=10):
+        with self._lock:
+            now = time.time()
+            return [ip for ip, t in self._blocked.items() if t > now][:limit]
 
-# Global IP blocker instance
-ip_blocker = IPBlocker()
 
 # ============================================================
-# SECURITY EVENT LOGGER
+# LOGIN TARPIT — Delay without holding a worker thread
 # ============================================================
 
-LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
-SECURITY_LOG = os.path.join(LOG_DIR, "security.log")
+class LoginTarpit:
+    """
+    Per-key "not before" deadlines for login attempts. A failed login sets the
+    deadline; attempts before it are answered at once with 429 + Retry-After
+    instead of sleeping in the request thread (2 workers × 4 threads).
+    """
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._until = {}  # key -> unix time before which attempts are refused
+        self._lock = threading.Lock()
+
+    def hold(self, key, seconds):
+        now = time.time()
+        with self._lock:
+            if len(self._until) >= self.max_keys:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+                if len(self._until) >= self.max_keys:
+                    self._until.pop(next(iter(self._until)))
+            until = max(self._until.get(key, 0.0), now + seconds)
+            self._until[key] = until
+        return until
+
+    def retry_after(self, key):
+        """Whole seconds until `key` may try again (0 = free)."""
+        with self._lock:
+            until = self._until.get(key)
+            if until is None:
+                return 0
+            remaining = until - time.time()
+            if remaining <= 0:
+                del self._until[key]
+                return 0
+        return int(remaining) + 1
+
+
+def _log_block(ip, duration, strikes, reason):
+    _log_security_event("IP_BLOCKED", ip, f"Duration={duration}s Strike#{strikes} | {reason}")
 
-def _ensure_log_dir():
-    os.makedirs(LOG_DIR, exist_ok=True)
+
+# ============================================================
+# STATE BACKEND — shared across gunicorn workers (security_store.py)
+# ============================================================
+
+def _make_state():
+    """
+    SECURITY_STATE_BACKEND=sqlite (default): limiter + blocker + login tarpit
+    shared by every worker and persisted across restarts. memory: per-process
+    (old behaviour, also the fallback if the store cannot be opened).
+    """
+    if os.environ.get("SECURITY_STATE_BACKEND", "sqlite") == "sqlite":
+        try:
+            from security_store import SecurityStore, SharedRateLimiter, SharedIPBlocker, SharedLoginTarpit
+            store = SecurityStore()
+            return (SharedRateLimiter(store), SharedIPBlocker(store, on_block=_log_block),
+                    SharedLoginTarpit(store), "sqlite")
+        except Exception as e:
+            print(f"SECURITY | ⚠️ Shared state unavailable ({e}) — using per-process memory")
+    return RateLimiter(), IPBlocker(), LoginTarpit(), "memory"
+
+
+# Global rate limiter / IP blocker / login tarpit instances
+limiter, ip_blocker, login_tarpit, STATE_BACKEND = _make_state()
+
+# ============================================================
+# SECURITY EVENT LOGGER
+# ============================================================
+
+# Ring buffer + background batched writer with rotation (security_events.py)
+LOG_DIR = security_events.LOG_DIR
+SECURITY_LOG = security_events.SECURITY_LOG
+event_sink = security_events.get_sink()
+_event_log = log_config.get_logger("security")
 
 def _log_security_event(event_type, ip, details=""):
-    _ensure_log_dir()
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = f"[{timestamp}] [{event_type}] IP={ip} | {details}\n"
-    try:
-        with open(SECURITY_LOG, "a", encoding="utf-8") as f:
-            f.write(entry)
-    except Exception:
-        pass
-    print(f"SECURITY | {entry.strip()}")
+    event_sink.emit(event_type, ip, details)
+    _event_log.info(f"SECURITY | [{event_type}]", ip=ip, details=details)
 
 
 def log_failed_login(ip, email):
@@ -238,32 +358,29 @@ HONEYPOT_PATHS = [
     '/.well-known/security.txt',
 ]
 
+_HONEYPOT_SET = frozenset(p.rstrip('/') for p in HONEYPOT_PATHS)
+
+
+def is_honeypot_path(path):
+    """O(1) trap lookup (trailing slash ignored: '/wp-admin/' is the same trap)."""
+    return (path.rstrip('/') or '/') in _HONEYPOT_SET
+
+
 def register_honeypots(app):
-    """Register honeypot trap routes on the Flask app."""
+    """Arm the honeypot traps: one set lookup per request instead of a URL rule per path."""
     
-    def honeypot_handler(path=''):
+    @app.before_request
+    def honeypot_gate():
+        path = request.path
+        if not is_honeypot_path(path):
+            return None
         ip = _get_client_ip()
-        full_path = request.path
-        log_honeypot_triggered(ip, full_path)
-        ip_blocker.block(ip, duration_seconds=7200, reason=f"Honeypot: {full_path}")
+        log_honeypot_triggered(ip, path)
+        ip_blocker.block(ip, duration_seconds=7200, reason=f"Honeypot: {path}")
         # Return convincing 404 — never reveal it's a trap
         return jsonify({"status": "error", "message": "Not Found"}), 404
     
-    registered = 0
-    for path in HONEYPOT_PATHS:
-        endpoint_name = f"hp_{abs(hash(path))}"
-        try:
-            app.add_url_rule(
-                path,
-                endpoint=endpoint_name,
-                view_func=honeypot_handler,
-                methods=['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']
-            )
-            registered += 1
-        except Exception:
-            pass  # Skip duplicates silently
-    
-    print(f"SECURITY | {registered} honeypot traps armed!")
+    print(f"SECURITY | {len(_HONEYPOT_SET)} honeypot traps armed!")
 
 
 # ============================================================
@@ -325,33 +442,57 @@ VALID_ROUTE_PREFIXES = [
 ]
 
 
-def _is_scanner_ua(ua):
-    """Check if user agent belongs to a scanner, respecting whitelist."""
-    ua_lower = ua.lower()
-    # Whitelist check first
-    if any(w in ua_lower for w in WHITELISTED_UA_PATTERNS):
+def _alternation(words):
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# Compiled once: each word list becomes a single-pass matcher
+_WHITELIST_UA_RE = re.compile(_alternation(WHITELISTED_UA_PATTERNS), re.IGNORECASE)
+_SCANNER_UA_RE = re.compile(_alternation(SCANNER_USER_AGENTS), re.IGNORECASE)
+# Every ATTACK_PATTERNS_URL match needs one of these (ASCII, lowercased): clean
+# URLs skip the regexes entirely. Keep in sync when adding a pattern.
+_ATTACK_TRIGGER_CHARS = frozenset(" \t\n\r\f\v\x1c\x1d\x1e\x1f'*;`<")
+_ATTACK_TRIGGER_SUBSTRINGS = ("..", "%0", "%2", "%5c", "$(", "javascript",
+                              "onerror", "onload", "onclick", "onmouseover")
+_BLOCKED_EXTENSIONS = frozenset(BLOCKED_EXTENSIONS)
+_VALID_ROUTE_PREFIXES = tuple(VALID_ROUTE_PREFIXES)
+UA_CACHE_SIZE = 4096
+UA_CACHE_MAX_LEN = 512  # longer UAs are checked without caching
+
+
+@lru_cache(maxsize=UA_CACHE_SIZE)
+def _ua_verdict(ua):
+    if _WHITELIST_UA_RE.search(ua):
         return False
-    # Then check scanner patterns
-    return any(s in ua_lower for s in SCANNER_USER_AGENTS)
+    return _SCANNER_UA_RE.search(ua) is not None
+
+
+def _is_scanner_ua(ua):
+    """Check if user agent belongs to a scanner, respecting whitelist (verdict cached per UA)."""
+    if len(ua) > UA_CACHE_MAX_LEN:
+        return _ua_verdict.__wrapped__(ua)
+    return _ua_verdict(ua)
 
 
 def _has_attack_payload(text):
     """Check if text contains attack patterns (SQLi, XSS, traversal, etc.)."""
-    for pattern in ATTACK_PATTERNS_URL:
-        if pattern.search(text):
-            return True
-    return False
+    if text.isascii():
+        # Non-ASCII skips the prefilter: IGNORECASE folds chars that lower() does not
+        lowered = text.lower()
+        if _ATTACK_TRIGGER_CHARS.isdisjoint(lowered) and not any(t in lowered for t in _ATTACK_TRIGGER_SUBSTRINGS):
+            return False
+    return any(pattern.search(text) for pattern in ATTACK_PATTERNS_URL)
 
 
 def _has_suspicious_extension(path):
     """Check if the path ends with a suspicious file extension."""
-    lower_path = path.lower()
-    return any(lower_path.endswith(ext) for ext in BLOCKED_EXTENSIONS)
+    dot = path.rfind('.')
+    return dot != -1 and path[dot:].lower() in _BLOCKED_EXTENSIONS
 
 
 def _is_valid_route(path):
     """Check if path looks like a legitimate route on our app."""
-    return any(path == prefix or path.startswith(prefix) for prefix in VALID_ROUTE_PREFIXES)
+    return path.startswith(_VALID_ROUTE_PREFIXES)
 
 
 # ============================================================
@@ -385,7 +526,7 @@ def register_security_middleware(app):
         if not ua:
             # No user agent = likely a script/scanner
             log_scan_detected(ip, "Empty User-Agent")
-            limiter.record_hit(f"scan_score:{ip}")
+            limiter.record_hit(f"scan_score:{ip}", SCAN_SCORE_WINDOW)
         elif _is_scanner_ua(ua):
             log_scan_detected(ip, f"Scanner UA: {ua[:120]}")
             ip_blocker.block(ip, duration_seconds=86400, reason=f"Scanner UA: {ua[:80]}")
@@ -394,7 +535,7 @@ def register_security_middleware(app):
         # ─── LAYER 4: Suspicious File Extensions ───
         if _has_suspicious_extension(path):
             log_scan_detected(ip, f"Suspicious extension: {path}")
-            limiter.record_hit(f"scan_score:{ip}")
+            limiter.record_hit(f"scan_score:{ip}", SCAN_SCORE_WINDOW)
             # Don't block immediately, but track as scan behavior
         
         # ─── LAYER 5: Attack Payload Detection ───
@@ -418,7 +559,7 @@ def register_security_middleware(app):
         # ─── LAYER 6: 404 Flood Detection (Scanner Fingerprint) ───
         # Scanners generate lots of 404s rapidly — track and block
         # (This is tracked in after_request via _track_404)
-        scan_score = limiter.get_count(f"scan_score:{ip}", 120)  # hits in last 2 min
+        scan_score = limiter.get_count(f"scan_score:{ip}", SCAN_SCORE_WINDOW)  # hits in last 2 min
         if scan_score >= 8:
             log_scan_detected(ip, f"Scan score {scan_score} — auto-blocking")
             ip_blocker.block(ip, duration_seconds=14400, reason=f"High scan score: {scan_score}")
@@ -439,10 +580,10 @@ def register_security_middleware(app):
             
             # Don't count legitimate missed routes (like favicon, static assets)
             if not path.startswith('/static/') and path != '/favicon.ico':
-                limiter.record_hit(f"scan_score:{ip}")
+                limiter.record_hit(f"scan_score:{ip}", SCAN_SCORE_WINDOW)
                 
                 # Log the 404 for analysis
-                scan_count = limiter.get_count(f"scan_score:{ip}", 120)
+                scan_count = limiter.get_count(f"scan_score:{ip}", SCAN_SCORE_WINDOW)
                 if scan_count >= 5:
                     log_scan_detected(ip, f"404 flood ({scan_count} in 2min): {path}")
         
@@ -466,29 +607,19 @@ def _get_client_ip():
 
 def get_security_report():
     """Returns a dict summarizing current security state (for admin panel)."""
-    with ip_blocker._lock:
-        now = time.time()
-        active_blocks = {ip: t for ip, t in ip_blocker._blocked.items() if t > now}
-        blocked_count = len(active_blocks)
-        blocked_ips = list(active_blocks.keys())[:10]
-    
-    with limiter._lock:
-        tracked_keys = len(limiter._store)
+    blocked_count = ip_blocker.get_blocked_count()
+    blocked_ips = ip_blocker.active_blocks(10)
     
-    recent_events = []
-    try:
-        if os.path.exists(SECURITY_LOG):
-            with open(SECURITY_LOG, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                recent_events = [l.strip() for l in lines[-30:]]
-    except Exception:
-        pass
+    tracked_keys = limiter.size()
     
     return {
         "blocked_ips_count": blocked_count,
         "blocked_ips_sample": blocked_ips,
         "tracked_rate_limit_keys": tracked_keys,
-        "recent_events": recent_events
+        "state_backend": STATE_BACKEND,
+        "recent_events": event_sink.recent(30),
+        "event_counts": event_sink.counts(),
+        "event_log": event_sink.stats(),
     }
 
 
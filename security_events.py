@@ -0,0 +1,219 @@
+"""
+security_events.py — LOG DE EVENTOS DE SEGURANÇA EM LOTE, FORA DO REQUEST 🧾
+===========================================================================
+security._log_security_event abria logs/security.log, escrevia UMA linha e
+fechava a cada evento (num scan storm: milhares de open() por minuto, na
+thread do request) e get_security_report lia o arquivo inteiro com
+readlines() só para mostrar as últimas 30 linhas. Aqui:
+
+  - RING: os últimos RING_SIZE eventos ficam em memória (deque com maxlen)
+    — o relatório do admin lê dali, custo fixo seja qual for o tamanho do log
+  - ESCRITA EM LOTE: emit() só enfileira (fila limitada em QUEUE_MAX — cheia
+    = descarta e conta, nunca trava o request); uma thread daemon junta até
+    BATCH_MAX linhas ou FLUSH_SECONDS e faz UM open/write/close por lote
+  - ROTAÇÃO POR TAMANHO: passou de MAX_BYTES → security.log.1 … .BACKUPS
+  - CONTADORES por tipo de evento (FAILED_LOGIN, HONEYPOT_TRIGGER, …)
+    desde o boot do worker, mais escritos / descartados / lotes / rotações
+
+O ring é por worker; no boot ele é semeado com o fim do arquivo (um seek,
+não readlines), então o relatório continua mostrando o histórico recente
+depois de um restart. A thread é recriada depois de fork (pid diferente).
+
+Os workers do gunicorn escrevem no MESMO arquivo: o append + checagem de
+tamanho + rotação de cada lote acontecem sob flock em security.log.lock
+(msvcrt no Windows, como o scheduler.LeaderLock), então só um processo
+rotaciona; arquivo já sumido na rotação = outro worker já rotacionou.
+"""
+
+import atexit
+import datetime
+import os
+import queue
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+SECURITY_LOG = os.path.join(LOG_DIR, "security.log")
+
+RING_SIZE = 200
+QUEUE_MAX = 10000
+BATCH_MAX = 500
+FLUSH_SECONDS = 1.0
+MAX_BYTES = int(os.environ.get("SECURITY_LOG_MAX_BYTES", 5 * 1024 * 1024))
+BACKUPS = 3
+SEED_BYTES = 64 * 1024
+
+
+@contextmanager
+def _file_lock(path):
+    """Blocking exclusive lock shared by every process appending to the same log."""
+    with open(path, "a+") as fh:
+        try:
+            import fcntl
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            release = lambda: fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        except ImportError:
+            import msvcrt
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            release = lambda: (fh.seek(0), msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1))
+        try:
+            yield
+        finally:
+            release()
+
+
+class SecurityEventSink:
+    """Ring buffer of recent events + background batched, size-rotated file writer."""
+
+    def __init__(self, path=SECURITY_LOG, ring_size=RING_SIZE, queue_max=QUEUE_MAX, batch_max=BATCH_MAX,
+                 flush_seconds=FLUSH_SECONDS, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.queue_max = queue_max
+        self.batch_max = batch_max
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._ring = deque(self._seed(ring_size), maxlen=ring_size)
+        self._counts = Counter()
+        self._stats = Counter()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def _seed(self, ring_size):
+        """Last lines of the existing log (read from the end, never the whole file)."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - SEED_BYTES))
+                lines = f.read().decode("utf-8", "replace").splitlines()
+        except OSError:
+            return []
+        if size > SEED_BYTES:
+            lines = lines[1:]  # first line is probably cut in half
+        return [line for line in lines[-ring_size:] if line.strip()]
+
+    def _ensure_writer(self):
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self.queue_max)
+                threading.Thread(target=self._loop, args=(self._queue,), daemon=True,
+                                 name="security-events").start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def emit(self, event_type, ip, details=""):
+        """Records one event and returns its log line (no file I/O on the caller's thread)."""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] [{event_type}] IP={ip} | {details}"
+        with self._lock:
+            self._ring.append(line)
+            self._counts[event_type] += 1
+        try:
+            self._ensure_writer().put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+        return line
+
+    def recent(self, n=30):
+        with self._lock:
+            if n >= len(self._ring):
+                return list(self._ring)
+            return [self._ring[i] for i in range(len(self._ring) - n, len(self._ring))]
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def stats(self):
+        with self._lock:
+            stats = {key: self._stats[key] for key in ("written", "dropped", "batches", "rotations", "write_errors")}
+        stats["queued"] = self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+        stats["events_total"] = sum(self.counts().values())
+        return stats
+
+    # ── writer ────────────────────────────────────────────
+    def _loop(self, q):
+        while True:
+            try:
+                batch = [q.get(timeout=self.flush_seconds)]
+            except queue.Empty:
+                continue
+            self._drain(q, batch)
+
+    def _drain(self, q, batch):
+        while len(batch) < self.batch_max:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+
+    def _write(self, lines):
+        with self._write_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with _file_lock(f"{self.path}.lock"):
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                        size = f.tell()
+                    rotated = size >= self.max_bytes and self._rotate()
+            except OSError as e:
+                with self._lock:
+                    self._stats["write_errors"] += 1
+                print(f"SECURITY | ⚠️ Could not write {self.path}: {e}")
+                return
+        with self._lock:
+            self._stats["written"] += len(lines)
+            self._stats["batches"] += 1
+            self._stats["rotations"] += int(rotated)
+
+    def _rotate(self):
+        """security.log → .1 → .2 … (the oldest beyond BACKUPS is overwritten). Caller holds the file lock."""
+        for index in range(self.backups - 1, 0, -1):
+            try:
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+            except FileNotFoundError:
+                pass
+        try:
+            os.replace(self.path, f"{self.path}.1")
+        except FileNotFoundError:
+            return False  # another process rotated it already
+        return True
+
+    def flush(self):
+        """Writes everything still queued on the caller's thread (atexit / tests)."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_max:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Process-wide sink for logs/security.log."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = SecurityEventSink()
+            atexit.register(_sink.flush)
+        return _sink
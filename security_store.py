@@ -0,0 +1,282 @@
+"""
+security_store.py — ESTADO DE SEGURANÇA COMPARTILHADO ENTRE WORKERS 🔐
+=====================================================================
+security.limiter e security.ip_blocker eram por processo: com 2 workers do
+gunicorn o atacante tinha o dobro da cota, um bloqueio (honeypot, UA de
+scanner) num worker não valia no outro e tudo sumia no restart.
+
+Aqui o estado vive num SQLite local em WAL (instance/security_state.db),
+compartilhado por todos os workers da máquina:
+
+  - counters: janelas deslizantes (mesmo algoritmo do security.RateLimiter)
+    atualizadas por UM upsert atômico com RETURNING (~15 µs)
+  - blocks:   bloqueio por IP com expiração + strikes da escalada
+    (1h → 2h → 4h … 7 dias) que sobrevivem a restart; strikes esquecidos
+    STRIKE_MEMORY_SECONDS depois do fim do último bloqueio (purge() a cada
+    PRUNE_EVERY_SECONDS, dentro do block()) e teto de max_ips linhas — o
+    excesso sai pelos bloqueios já vencidos mais antigos, nunca um ativo
+  - tarpit:   prazo "não antes de" do login após falha (429 + Retry-After
+    em vez de time.sleep na thread do request)
+  - Limpeza periódica de contadores ociosos e teto de linhas (max_keys)
+
+Conexões são por thread e recriadas depois de fork (pid diferente).
+UPSERT … RETURNING exige SQLite ≥ 3.35: o construtor executa o upsert uma
+vez (com rollback), então um SQLite antigo falha no boot e o security.py
+cai para o backend em memória em vez de quebrar no primeiro request.
+security.py escolhe o backend por SECURITY_STATE_BACKEND=sqlite|memory.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.environ.get(
+    "SECURITY_STATE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "security_state.db"),
+)
+PRUNE_EVERY_SECONDS = 60
+STRIKE_MEMORY_SECONDS = 30 * 86400
+MAX_BLOCK_SECONDS = 86400 * 7
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS counters (
+        key TEXT NOT NULL, win REAL NOT NULL, start REAL NOT NULL,
+        cur INTEGER NOT NULL, prev INTEGER NOT NULL, last REAL NOT NULL,
+        allowed INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (key, win)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS counters_last ON counters (last)",
+    """CREATE TABLE IF NOT EXISTS blocks (
+        ip TEXT PRIMARY KEY, until REAL NOT NULL, strikes INTEGER NOT NULL,
+        reason TEXT, updated REAL NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS blocks_until ON blocks (until)",
+    """CREATE TABLE IF NOT EXISTS tarpit (
+        key TEXT PRIMARY KEY, until REAL NOT NULL
+    ) WITHOUT ROWID""",
+)
+
+# Sliding-window upsert: rolls the window, estimates the count and increments only
+# when under :max — one atomic statement, so workers never double-spend the quota.
+_HIT_SQL = """
+INSERT INTO counters (key, win, start, cur, prev, last, allowed)
+VALUES (:key, :win, :start, CASE WHEN :max > 0 THEN 1 ELSE 0 END, 0, :now,
+        CASE WHEN :max > 0 THEN 1 ELSE 0 END)
+ON CONFLICT (key, win) DO UPDATE SET
+    allowed = CASE WHEN
+        (CASE WHEN excluded.start = start THEN prev WHEN excluded.start - start = win THEN cur ELSE 0 END)
+          * (1.0 - (:now - excluded.start) / win)
+        + (CASE WHEN excluded.start = start THEN cur ELSE 0 END) < :max
+        THEN 1 ELSE 0 END,
+    cur = (CASE WHEN excluded.start = start THEN cur ELSE 0 END) + CASE WHEN
+        (CASE WHEN excluded.start = start THEN prev WHEN excluded.start - start = win THEN cur ELSE 0 END)
+          * (1.0 - (:now - excluded.start) / win)
+        + (CASE WHEN excluded.start = start THEN cur ELSE 0 END) < :max
+        THEN 1 ELSE 0 END,
+    prev = CASE WHEN excluded.start = start THEN prev WHEN excluded.start - start = win THEN cur ELSE 0 END,
+    start = excluded.start,
+    last = :now
+RETURNING allowed, start, cur, prev
+"""
+
+_NO_LIMIT = 1 << 62
+
+
+class SecurityStore:
+    """SQLite (WAL) file shared by the gunicorn workers; one connection per thread."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self.conn()
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        self._probe(conn)
+
+    @staticmethod
+    def _probe(conn):
+        """Runs the hit upsert once, rolled back: SQLite < 3.35 (no RETURNING) raises here, at boot."""
+        now = time.time()
+        conn.execute("BEGIN")
+        try:
+            conn.execute(_HIT_SQL, {"key": "__probe__", "win": 60.0, "start": now - now % 60,
+                                    "now": now, "max": 1}).fetchone()
+        finally:
+            conn.execute("ROLLBACK")
+
+    def conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+
+class SharedRateLimiter:
+    """security.RateLimiter interface backed by SecurityStore (quota shared by all workers)."""
+
+    DEFAULT_WINDOW = 3600
+
+    def __init__(self, store, max_keys=200000):
+        self.store = store
+        self.max_keys = max_keys
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _hit(self, key, window, max_calls, now):
+        start = now - now % window
+        row = self.store.conn().execute(_HIT_SQL, {
+            "key": key, "win": float(window), "start": start, "now": now, "max": max_calls,
+        }).fetchone()
+        self._maybe_prune(now)
+        return row
+
+    def is_rate_limited(self, key, max_calls, window_seconds):
+        now = time.time()
+        allowed, start, cur, prev = self._hit(key, window_seconds, max_calls, now)
+        if allowed:
+            return False, 0
+        elapsed = now - start
+        if cur >= max_calls or prev == 0:
+            wait = window_seconds - elapsed
+        else:
+            wait = (1 - (max_calls - cur) / prev) * window_seconds - elapsed
+        return True, int(max(0.0, min(wait, window_seconds))) + 1
+
+    def get_count(self, key, window_seconds):
+        now = time.time()
+        row = self.store.conn().execute(
+            "SELECT start, cur, prev FROM counters WHERE key = ? AND win = ?",
+            (key, float(window_seconds))).fetchone()
+        if row is None:
+            return 0
+        start, cur, prev = row
+        current = now - now % window_seconds
+        if current != start:
+            prev = cur if current - start == window_seconds else 0
+            cur = 0
+            start = current
+        return int(round(prev * (1.0 - (now - start) / window_seconds) + cur))
+
+    def record_hit(self, key, window_seconds=None):
+        self._hit(key, window_seconds or self.DEFAULT_WINDOW, _NO_LIMIT, time.time())
+
+    def size(self):
+        return self.store.conn().execute("SELECT COUNT(*) FROM counters").fetchone()[0]
+
+    def _maybe_prune(self, now):
+        """Drops counters idle for two windows; then enforces the max_keys ceiling (oldest first)."""
+        if now - self._last_prune < PRUNE_EVERY_SECONDS or not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_prune = now
+            conn = self.store.conn()
+            conn.execute("DELETE FROM counters WHERE last < ? - 2 * win", (now,))
+            excess = self.size() - self.max_keys
+            if excess > 0:
+                conn.execute("DELETE FROM counters WHERE (key, win) IN "
+                             "(SELECT key, win FROM counters ORDER BY last LIMIT ?)", (excess,))
+        except sqlite3.Error as e:
+            print(f"SECURITY | ⚠️ Counter prune failed: {e}")
+        finally:
+            self._prune_lock.release()
+
+
+class SharedIPBlocker:
+    """security.IPBlocker interface backed by SecurityStore (blocks + strikes persist)."""
+
+    def __init__(self, store, on_block=None, max_ips=100000):
+        self.store = store
+        self.on_block = on_block
+        self.max_ips = max_ips
+        self._last_prune = 0.0
+
+    def block(self, ip, duration_seconds=3600, reason=""):
+        now = time.time()
+        conn = self.store.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT until, strikes FROM blocks WHERE ip = ?", (ip,)).fetchone()
+            strikes = 1
+            if row is not None and now - row[0] < STRIKE_MEMORY_SECONDS:
+                strikes = row[1] + 1
+            # Escalating bans: each offense doubles the duration
+            actual_duration = min(duration_seconds * (2 ** (strikes - 1)), MAX_BLOCK_SECONDS)
+            conn.execute(
+                "INSERT INTO blocks (ip, until, strikes, reason, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (ip) DO UPDATE SET until = excluded.until, strikes = excluded.strikes, "
+                "reason = excluded.reason, updated = excluded.updated",
+                (ip, now + actual_duration, strikes, reason[:200], now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if now - self._last_prune >= PRUNE_EVERY_SECONDS:
+            self._last_prune = now
+            self.purge()
+        if self.on_block:
+            self.on_block(ip, actual_duration, strikes, reason)
+        return actual_duration, strikes
+
+    def is_blocked(self, ip):
+        row = self.store.conn().execute("SELECT until FROM blocks WHERE ip = ?", (ip,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def unblock(self, ip):
+        # Keeps the strike count (escalation memory); only lifts the active block
+        self.store.conn().execute("UPDATE blocks SET until = ? WHERE ip = ?", (time.time(), ip))
+
+    def get_blocked_count(self):
+        return self.store.conn().execute(
+            "SELECT COUNT(*) FROM blocks WHERE until > ?", (time.time(),)).fetchone()[0]
+
+    def active_blocks(self, limit=10):
+        return [ip for (ip,) in self.store.conn().execute(
+            "SELECT ip FROM blocks WHERE until > ? ORDER BY until DESC LIMIT ?", (time.time(), limit))]
+
+    def purge(self):
+        """Forgets IPs whose last block ended more than STRIKE_MEMORY_SECONDS ago; then enforces max_ips."""
+        now = time.time()
+        conn = self.store.conn()
+        try:
+            conn.execute("DELETE FROM blocks WHERE until < ?", (now - STRIKE_MEMORY_SECONDS,))
+            excess = conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0] - self.max_ips
+            if excess > 0:
+                conn.execute("DELETE FROM blocks WHERE ip IN (SELECT ip FROM blocks WHERE until <= ? "
+                             "ORDER BY until LIMIT ?)", (now, excess))
+        except sqlite3.Error as e:
+            print(f"SECURITY | ⚠️ Block purge failed: {e}")
+
+
+class SharedLoginTarpit:
+    """security.LoginTarpit interface backed by SecurityStore (deadlines seen by every worker)."""
+
+    def __init__(self, store):
+        self.store = store
+        self._last_prune = 0.0
+
+    def hold(self, key, seconds):
+        now = time.time()
+        conn = self.store.conn()
+        until = conn.execute(
+            "INSERT INTO tarpit (key, until) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET until = MAX(until, excluded.until) RETURNING until",
+            (key, now + seconds)).fetchone()[0]
+        if now - self._last_prune >= PRUNE_EVERY_SECONDS:
+            self._last_prune = now
+            conn.execute("DELETE FROM tarpit WHERE until < ?", (now,))
+        return until
+
+    def retry_after(self, key):
+        """Whole seconds until `key` may try again (0 = free)."""
+        row = self.store.conn().execute("SELECT until FROM tarpit WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return 0
+        remaining = row[0] - time.time()
+        return int(remaining) + 1 if remaining > 0 else 0
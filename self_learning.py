@@ -34,12 +34,16 @@ import sys
 import datetime
 import math
 
+import log_config
+
 os.environ["PYTHONIOENCODING"] = "utf-8"
 try:
     sys.stdout.reconfigure(encoding='utf-8')
 except:
     pass
 
+log = log_config.get_logger("self_learning")
+
 # ═══════════════════════════════════════
 # CONSTANTS
 # ═══════════════════════════════════════
@@ -140,7 +144,7 @@ def _save_state(state):
         with open(LEARNING_STATE_FILE, 'w', encoding='utf-8') as f:
             json.dump(state, f, indent=2, ensure_ascii=False)
     except Exception as e:
-        print(f"[LEARN] ❌ Erro ao salvar estado: {e}")
+        log.error("[LEARN] ❌ Erro ao salvar estado", error=str(e))
 
 
 def _load_history():
@@ -213,7 +217,7 @@ def study_results():
     state = _load_state()
     
     if not history:
-        print("[LEARN] 📚 Sem histórico para estudar")
+        log.info("[LEARN] 📚 Sem histórico para estudar")
         return state
     
     # Reset counters
@@ -519,14 +523,11 @@ def study_results():
     
     _save_state(state)
     
-    print(f"\n[LEARN] 🧠 AUTOCONHECIMENTO ATUALIZADO")
-    print(f"[LEARN] 📊 {total} jogos estudados | Acerto: {state['global_stats']['accuracy']}% | ROI: {state['global_stats']['roi']}%")
-    print(f"[LEARN] 🔥 Melhor sequência: +{best_streak} | Pior: {worst_streak}")
-    print(f"[LEARN] 📝 {len(insights)} lições aprendidas:")
+    log.info("[LEARN] 🧠 Autoconhecimento atualizado", studied=total,
+             accuracy=state['global_stats']['accuracy'], roi=state['global_stats']['roi'],
+             best_streak=best_streak, worst_streak=worst_streak, insights=len(insights))
     for insight in insights[:10]:
-        print(f"   {insight}")
-    if len(insights) > 10:
-        print(f"   ... e mais {len(insights) - 10} insights")
+        log.debug("[LEARN] 📝 Lição", insight=insight)
     
     return state
 
@@ -707,7 +708,7 @@ def cleanup_old_history(keep_days=30):
     if removed > 0:
         with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
             json.dump(kept, f, indent=4, ensure_ascii=False)
-        print(f"[LEARN] 🧹 Limpeza: {removed} entradas antigas removidas (>{keep_days} dias). {len(kept)} mantidas.")
+        log.info("[LEARN] 🧹 Limpeza do histórico", removed=removed, keep_days=keep_days, kept=len(kept))
     
     return removed
 
@@ -0,0 +1,134 @@
+"""
+slate_versions.py — VERSÕES DO SLATE E DELTAS PARA O /api/games 🔁
+=================================================================
+O dashboard recebia o slate inteiro a cada poll, mesmo quando só uma tip
+mudou depois de um update de escalação. Aqui cada slate publicado ganha:
+
+  - "version": monotônica (ms desde epoch, sempre > anterior no processo)
+  - game["key"] + game["rev"]: identidade e revisão por jogo (a revisão só
+    sobe quando o conteúdo do jogo muda)
+
+e um change log curto em memória por data permite responder
+/api/games?since=<version> só com added / changed / removed (+ trebles se
+mudaram). Versão desconhecida (outro worker, log rotacionado) → payload cheio.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+MAX_VERSIONS = 50  # versões guardadas por data
+MAX_DATES = 8
+
+# Keys written by this module (excluded from the content hash)
+_META_KEYS = ("key", "rev")
+
+_states = {}
+_lock = threading.Lock()
+
+
+def game_key(game):
+    return f"{game.get('sport', '')}|{game.get('home_team', '')}|{game.get('away_team', '')}"
+
+
+def _digest(obj):
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _game_digest(game):
+    return _digest({k: v for k, v in game.items() if k not in _META_KEYS})
+
+
+class _DateState:
+    __slots__ = ("data", "version", "games", "revs", "digests", "trebles_digest", "log")
+
+    def __init__(self):
+        self.data = None
+        self.version = 0
+        self.games = {}
+        self.revs = {}
+        self.digests = {}
+        self.trebles_digest = None
+        self.log = []  # [(version, revs snapshot, trebles_digest)]
+
+
+def record(date, data):
+    """
+    Stamps `data` (in place) with version / key / rev and logs the change.
+    Same object as last time → no work. Same content in a new object (e.g. a
+    file cache re-read) → same version.
+    """
+    with _lock:
+        state = _states.get(date)
+        if state is not None and state.data is data:
+            return state.version
+        if state is None:
+            state = _DateState()
+            _states[date] = state
+            while len(_states) > MAX_DATES:
+                _states.pop(next(iter(_states)))
+
+        games = {}
+        digests = {}
+        for game in data.get("games", []):
+            key = game_key(game)
+            games[key] = game
+            digests[key] = _game_digest(game)
+        trebles_digest = _digest(data.get("trebles", []))
+
+        revs = {}
+        for key, digest in digests.items():
+            prev_rev = state.revs.get(key, 0)
+            revs[key] = prev_rev if state.digests.get(key) == digest else prev_rev + 1
+
+        changed = (revs != state.revs or trebles_digest != state.trebles_digest)
+        if changed:
+            state.version = max(int(time.time() * 1000), state.version + 1)
+            state.log.append((state.version, revs, trebles_digest))
+            if len(state.log) > MAX_VERSIONS:
+                state.log = state.log[-MAX_VERSIONS:]
+
+        state.data = data
+        state.games = games
+        state.revs = revs
+        state.digests = digests
+        state.trebles_digest = trebles_digest
+
+        for key, game in games.items():
+            game["key"] = key
+            game["rev"] = revs[key]
+        data["version"] = state.version
+        return state.version
+
+
+def delta(date, since):
+    """
+    Changes between `since` and the current version, or None when `since`
+    is not in the log (caller should send the full payload).
+    """
+    with _lock:
+        state = _states.get(date)
+        if state is None or not state.log:
+            return None
+        if since == state.version:
+            return {"delta": True, "version": state.version, "since": since,
+                    "added": [], "changed": [], "removed": [], "trebles": None}
+        base = next((entry for entry in state.log if entry[0] == since), None)
+        if base is None:
+            return None
+
+        _, old_revs, old_trebles = base
+        added = [state.games[k] for k in state.revs if k not in old_revs]
+        changed = [state.games[k] for k, rev in state.revs.items() if k in old_revs and old_revs[k] != rev]
+        removed = [k for k in old_revs if k not in state.revs]
+        trebles = state.data.get("trebles", []) if old_trebles != state.trebles_digest else None
+        return {"delta": True, "version": state.version, "since": since,
+                "added": added, "changed": changed, "removed": removed, "trebles": trebles}
+
+
+def current_version(date):
+    with _lock:
+        state = _states.get(date)
+        return state.version if state else 0
@@ -11,6 +11,52 @@ except ImportError:
     SPORTS_KNOWLEDGE = {}
 
 # --- MODULE 1: PARLAY ARCHITECT (ARQUITETO DE MÚLTIPLAS) ---
+def _parlay_leg(game, odd):
+    """Leg descriptor for joint_sim (implied prob when the game has no model prob)."""
+    from joint_sim import implied_prob
+    prob = game.get('prob')
+    return {
+        "prob": float(prob) / 100 if prob else implied_prob(odd),
+        "game": f"{game.get('home', '')}-{game.get('away', '')}",
+        "league": game.get('league', game.get('sport', '')),
+        "date": game.get('date', ''),
+    }
+
+PARLAY_CANDIDATES = 32       # combos shortlisted by branch & bound, then simulated
+PARLAY_LEAGUE_CAPS = (1, 2)  # one leg per league first; relaxed only if the pool can't fill it
+
+def _best_parlay(candidates, legs, size=3, objective="prob"):
+    """
+    Picks the `size`-leg combo with the best correlated joint probability
+    (objective "prob") or joint probability × total odd ("ev").
+    treble_optimizer's branch & bound shortlists the PARLAY_CANDIDATES best
+    combos under a league cap; only those are simulated by joint_sim, and
+    same-league stacks pay joint_sim.league_stack_factor (as in the trebles).
+    """
+    if len(candidates) <= size:
+        return candidates
+    try:
+        from treble_optimizer import search_tickets
+        from joint_sim import combo_probabilities, league_stack_factor
+        pool = [{"best_tip": {"prob": leg["prob"] * 100, "odd": c['odd']}, "league": leg["league"], "index": i}
+                for i, (c, leg) in enumerate(zip(candidates, legs))]
+        shortlist = []
+        for cap in PARLAY_LEAGUE_CAPS + (size,):
+            shortlist = search_tickets(pool, size, objective, max_per_league=cap, top_n=PARLAY_CANDIDATES)
+            if shortlist:
+                break
+        probs, _ = combo_probabilities(legs, [[p["index"] for p in t["picks"]] for t in shortlist])
+    except Exception:
+        return candidates[:size]
+    best_score, best_ticket = -1.0, shortlist[0]
+    for ticket, p in zip(shortlist, probs):
+        score = p * league_stack_factor(pick["league"] for pick in ticket["picks"])
+        if objective == "ev":
+            score *= ticket["total_odd"]
+        if score > best_score:
+            best_score, best_ticket = score, ticket
+    return [candidates[pick["index"]] for pick in best_ticket["picks"]]
+
 def architect_parlays(available_games):
     """
     Generates 3 distinct parlay tickets based on strict criteria:
@@ -31,6 +77,7 @@ def architect_parlays(available_games):
     # --- LOGIC FOR ELITE ---
     # Filter: Favorites playing Home with Dominance + Win Rate > 70%
     candidates_elite = []
+    elite_legs = []
     for g in available_games:
         home_team = get_team_info(g['home'])
         # Simulating Win Rate check via 'phase'
@@ -43,15 +90,17 @@ def architect_parlays(available_games):
                     "odd": float(g.get('odds', {}).get('home', 1.40)),
                     "reason": "Favorito absoluto em casa. Win Rate > 70%. Dominância tática."
                 })
+                elite_legs.append(_parlay_leg(g, candidates_elite[-1]['odd']))
     
-    # Select Top 3 for Elite
-    for pick in candidates_elite[:3]:
+    # Select best 3 for Elite (max joint probability)
+    for pick in _best_parlay(candidates_elite, elite_legs, objective="prob"):
         tickets['elite']['selections'].append(pick)
         tickets['elite']['total_odd'] *= pick['odd']
 
     # --- LOGIC FOR VALUE ---
     # Filter: Handicaps Esticados (NBA) or Zebras
     candidates_value = []
+    value_legs = []
     for g in available_games:
         sport = g.get('sport', '').lower()
         if "nba" in sport:
@@ -64,6 +113,7 @@ def architect_parlays(available_games):
                     "odd": 1.90,
                     "reason": "Handicap esticado. Favorito vem de 3 vitórias por +15."
                 })
+                value_legs.append(_parlay_leg(g, 1.90))
         elif "zebra" in g.get('details', '').lower() or "crise" in get_team_info(g['home']).get('phase', '').lower():
              candidates_value.append({
                 "match": f"{g['home']} vs {g['away']}",
@@ -71,15 +121,17 @@ def architect_parlays(available_games):
                 "odd": 2.20,
                 "reason": "Zebra jogando contra time desfalcado/em crise."
             })
+             value_legs.append(_parlay_leg(g, 2.20))
             
-    # Select Top 3 for Value
-    for pick in candidates_value[:3]:
+    # Select best 3 for Value (max joint probability × odd)
+    for pick in _best_parlay(candidates_value, value_legs, objective="ev"):
         tickets['value']['selections'].append(pick)
         tickets['value']['total_odd'] *= pick['odd']
 
     # --- LOGIC FOR OVERDRIVE ---
     # Filter: High Pace NBA
     candidates_over = []
+    over_legs = []
     for g in available_games:
         if "nba" in g.get('sport', '').lower():
             # Mock Pace check (assuming high pace teams)
@@ -90,9 +142,10 @@ def architect_parlays(available_games):
                     "odd": 1.90,
                     "reason": "Pace Combinado > 200. Defesas frágeis e transição rápida."
                 })
+                over_legs.append(_parlay_leg(g, 1.90))
     
-    # Select Top 3 for Overdrive
-    for pick in candidates_over[:3]:
+    # Select best 3 for Overdrive (max joint probability × odd)
+    for pick in _best_parlay(candidates_over, over_legs, objective="ev"):
         tickets['overdrive']['selections'].append(pick)
         tickets['overdrive']['total_odd'] *= pick['odd']
 
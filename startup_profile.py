@@ -0,0 +1,136 @@
+"""
+startup_profile.py — PERFIL DE BOOT DO APP (python -X importtime) ⏱️
+===================================================================
+Mede quanto custa importar o app.py num processo limpo e quais módulos
+pesados entraram, em dois cenários:
+
+  - boot   → só o import do app (WARMUP_ENABLED=0): o que todo processo paga
+  - worker → import + warmup.warm_up(), como o post_fork do gunicorn em
+             produção; aqui só pode aparecer o que o primeiro request usa
+             (FIRST_REQUEST_MODULES). Sem o cache do dia em arquivo o slate
+             dispara o refresh e o pipeline inteiro carrega — é o que o
+             primeiro /api/games esperaria de qualquer forma.
+
+USO:
+  python startup_profile.py            → relatório (top módulos por tempo acumulado)
+  python startup_profile.py --top 40   → mais linhas
+  python startup_profile.py --json     → saída para CI / comparação
+
+HEAVY_MODULES devem carregar só no primeiro uso (lazy_modules.py,
+ai_engine.__getattr__); o test_full_system falha se algum deles aparecer
+no boot, ou fora de FIRST_REQUEST_MODULES no worker aquecido.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = (
+    "numpy",
+    "bs4",
+    "mercadopago",
+    "ai_engine",
+    "specialized_modules",
+    "knowledge_base",
+    "auto_picks",
+    "data_fetcher",
+    "result_checker",
+    "history_index",
+    "self_learning",
+    "turbo_fetcher",
+)
+
+# What the warm-up may load: /api/games served from today's file cache
+FIRST_REQUEST_MODULES = ("data_fetcher", "self_learning", "turbo_fetcher")
+
+# Import without the side effects (the worker profile runs warm_up() itself, like post_fork)
+_PROFILE_ENV = {"WARMUP_ENABLED": "0", "SCHEDULER_ENABLED": "0", "PYTHONIOENCODING": "utf-8"}
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cum_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_import(target="app", warm=False):
+    """Imports `target` in a fresh interpreter (warm=True: then warmup.warm_up()); timings + heavy modules."""
+    heavy = f"sorted(m for m in {list(HEAVY_MODULES)!r} if m in sys.modules)"
+    if warm:
+        probe = (
+            f"import {target}, warmup, sys, json; state = warmup.warm_up(); "
+            f"print(json.dumps({{'heavy': {heavy}, 'warmup_s': state['warmup_s'], "
+            f"'slate': state['stages'].get('slate', {{}}).get('status')}}))"
+        )
+    else:
+        probe = f"import {target}, sys, json; print(json.dumps({{'heavy': {heavy}}}))"
+    env = dict(os.environ, **_PROFILE_ENV)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=BASE_DIR, env=env,
+                          capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    target_row = next((r for r in rows if r[0] == target and r[3] == 0), None)
+    probed = json.loads(proc.stdout.strip().splitlines()[-1])
+    result = {
+        "target": target,
+        "warm": warm,
+        "total_ms": round(target_row[2] / 1000, 1) if target_row else None,
+        "modules": len(rows),
+        "top": sorted(rows, key=lambda r: r[2], reverse=True),
+        "heavy_loaded": probed["heavy"],
+    }
+    if warm:
+        result["warmup_s"] = probed["warmup_s"]
+        result["slate"] = probed["slate"]
+        # A refreshing slate legitimately pulls the whole pipeline (the first request waits for it)
+        allowed = HEAVY_MODULES if probed["slate"] == "refreshing" else FIRST_REQUEST_MODULES
+        result["unexpected"] = [m for m in probed["heavy"] if m not in allowed]
+    return result
+
+
+def _print_report(result, top):
+    print(f"⏱️  import {result['target']}: {result['total_ms']} ms ({result['modules']} módulos)")
+    print(f"{'cumulativo ms':>14} {'próprio ms':>11}  módulo")
+    for name, self_us, cum_us, depth in result["top"][:top]:
+        print(f"{cum_us / 1000:14.1f} {self_us / 1000:11.1f}  {'  ' * depth}{name}")
+    if result["heavy_loaded"]:
+        print(f"\n⚠️  Módulos pesados no boot: {', '.join(result['heavy_loaded'])}")
+    else:
+        print("\n✅ Nenhum módulo pesado carregado no boot.")
+
+
+def _print_worker_report(result):
+    print(f"\n🔥 Worker aquecido (post_fork): warm-up {result['warmup_s']} s, slate {result['slate']}")
+    print(f"   Módulos pesados carregados: {', '.join(result['heavy_loaded']) or 'nenhum'}")
+    if result["unexpected"]:
+        print(f"⚠️  Além do primeiro request: {', '.join(result['unexpected'])}")
+    else:
+        print("✅ Só o que o primeiro request usa.")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    top = int(args[args.index("--top") + 1]) if "--top" in args else 25
+    result = profile_import()
+    worker = profile_import(warm=True)
+    if "--json" in args:
+        result["top"] = result["top"][:top]
+        worker.pop("top")
+        result["worker"] = worker
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result, top)
+        _print_worker_report(worker)
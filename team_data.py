@@ -4,7 +4,6 @@ Extracted from data_fetcher.py for modularity.
 Contains: logos, simulations, news, tactics, table analysis.
 """
 
-import numpy as np
 import random
 
 # --- TEAM LOGOS ---
@@ -76,6 +75,7 @@ def get_logo_url(team_name, sport='unknown'):
 
 def simulate_nba_game(home_team, away_team):
     """Simulates an NBA game 5,000 times using Monte Carlo logic."""
+    import numpy as np
     power_ratings = {
         "Pistons": 98, "Celtics": 93, "Knicks": 92, "Cavaliers": 91, 
         "Thunder": 93, "Rockets": 90, "Raptors": 89, "Sixers": 87, 
@@ -272,10 +272,9 @@ test("ResultScoutBot", lambda: isinstance(data_fetcher.ResultScoutBot().scout_to
 # 6. USER MANAGER
 # ═══════════════════════════════
 print("\n👤 6. TESTANDO USER MANAGER...")
-import user_manager
-
-test("get_db_connection", lambda: user_manager.get_db_connection() is not None)
-test("check_validity (inexistente)", lambda: user_manager.check_validity("nonexistent@test.com") == False)
+# Via __import__ (como na seção 1): módulo ausente = FAIL aqui, sem abortar as seções seguintes
+test("get_db_connection", lambda: __import__('user_manager').get_db_connection() is not None)
+test("check_validity (inexistente)", lambda: __import__('user_manager').check_validity("nonexistent@test.com") == False)
 
 
 # ═══════════════════════════════
@@ -286,6 +285,422 @@ test(".env existe", lambda: os.path.exists(os.path.join(os.path.dirname(__file__
 test(".gitignore existe", lambda: os.path.exists(os.path.join(os.path.dirname(__file__), '.gitignore')))
 
 
+# ═══════════════════════════════
+# 8. PERFORMANCE ENGINES
+# ═══════════════════════════════
+print("\n⚡ 8. TESTANDO PERFORMANCE ENGINES...")
+import threshold_lab
+
+test("threshold_lab.parse_grid_param", lambda: threshold_lab.parse_grid_param("60:70:5") == [60, 65, 70])
+
+
+def _grid_axis_too_big():
+    try:
+        threshold_lab.parse_grid_param("0:1e9:0.001")
+        return False
+    except ValueError:
+        return True
+
+
+test("threshold_lab eixo gigante recusado antes de montar a lista", _grid_axis_too_big)
+test("threshold_lab grid", lambda: len(threshold_lab.evaluate_threshold_grid(
+    min_probs=[60, 70], min_safety=[0, 50], max_odds=[1.5, 2.2]
+)["rows"]) == 8)
+
+import treble_optimizer
+_pool = [{"league": f"L{i % 3}", "best_tip": {"odd": 1.2 + i * 0.05, "prob": 90 - i}} for i in range(12)]
+test("treble_optimizer best prob", lambda: [p["best_tip"]["prob"] for p in
+    treble_optimizer.optimize_tickets(_pool, 2, objective="prob")[0]["picks"]] == [90, 89])
+test("treble_optimizer league cap", lambda: all(len({p["league"] for p in t["picks"]}) == 3 for t in
+    treble_optimizer.optimize_tickets(_pool, 3, max_per_league=1, top_k=3)))
+
+import joint_sim
+_legs = [{"prob": 0.8, "game": "a", "league": "L", "date": ""}, {"prob": 0.7, "game": "b", "league": "L", "date": ""},
+         {"prob": 0.7, "game": "c", "league": "M", "date": ""}]
+test("joint_sim same-league correlation", lambda: (lambda p: p[0] > p[1] > 0.5)(
+    joint_sim.combo_probabilities(_legs, [(0, 1), (0, 2)])[0]))
+_dpool = [{"home_team": f"h{i}", "away_team": f"a{i}", "league": f"L{i % 6}",
+           "best_tip": {"odd": 1.3, "prob": 95 if i == 0 else 70 - i * 0.2}} for i in range(60)]
+_dtickets = treble_optimizer.optimize_tickets(_dpool, 3, objective="prob", top_k=3,
+                                              rerank=joint_sim.ticket_reranker(_dpool, "prob", n_sims=2000))
+test("treble_optimizer rerank com perna dominante ainda entrega top_k", lambda: len(_dtickets) == 3
+     and len({id(p) for t in _dtickets for p in t["picks"]}) == 9)
+_sgames = [{"home_team": f"h{i}", "away_team": f"a{i}", "league": lg, "best_tip": {"odd": 1.5, "prob": 75}}
+           for i, lg in enumerate(["NBA", "NBA", "NBA", "L1", "L2"])]
+_srr = joint_sim.ticket_reranker(_sgames, "prob", n_sims=4000)
+test("ticket_reranker penaliza empilhar a mesma liga", lambda: (lambda s: s[0] < s[1])(_srr([
+     {"picks": _sgames[:3], "total_odd": 3.375}, {"picks": [_sgames[0], _sgames[3], _sgames[4]], "total_odd": 3.375}])))
+import specialized_modules
+_pcands = [{"odd": 1.3, "match": str(i)} for i in range(12)]
+_plegs = [{"prob": 0.8 if i < 4 else 0.78, "game": f"g{i}", "league": "NBA" if i < 4 else f"L{i}", "date": ""}
+          for i in range(12)]
+test("_best_parlay diversifica ligas (sem empilhar NBA)", lambda:
+     len({_plegs[int(c["match"])]["league"] for c in specialized_modules._best_parlay(_pcands, _plegs)}) == 3)
+
+import payload_cache
+_entry = payload_cache.publish("test_slate", {"games": [{"reason": "x" * 500}], "trebles": []})
+test("payload_cache gzip + etag", lambda: payload_cache.negotiate("gzip, deflate") == "gzip"
+     and len(_entry.variants["gzip"]) < len(_entry.body)
+     and payload_cache.etag_matches(_entry.variant_etag("gzip"), _entry))
+
+import slate_versions
+_v1 = slate_versions.record("test", {"games": [{"home_team": "A", "away_team": "B", "best_tip": {"prob": 70}}], "trebles": []})
+_v2 = slate_versions.record("test", {"games": [{"home_team": "A", "away_team": "B", "best_tip": {"prob": 75}}], "trebles": []})
+test("slate_versions delta", lambda: _v2 > _v1 and len(slate_versions.delta("test", _v1)["changed"]) == 1
+     and slate_versions.delta("test", 1) is None)
+
+import live_feed
+_scores = {"r": {"A": {"score": "0-0", "status": "1st", "completed": False}}}
+_feed = live_feed.LiveFeed(fetch_results=lambda: _scores["r"], fetch_history=lambda: [])
+_feed.poll_once()
+_scores["r"] = {"A": {"score": "1-0", "status": "Final", "completed": True}}
+test("live_feed diff → final event", lambda: _feed.poll_once() == 1 and _feed._events[-1][1] == "final")
+_catchup = "".join(_feed.catch_up(f"{live_feed.BOOT_ID}-0"))
+test("live_feed id de outro worker retoma sem reset + catch-up sem segurar thread", lambda:
+     live_feed._parse_event_id("deadbeef-7") is None and "reset" not in "".join(_feed.catch_up("deadbeef-7"))
+     and "event: final" in _catchup and f"retry: {live_feed.CATCHUP_RETRY_MS}" in _catchup
+     and "reset" in "".join(_feed.catch_up(f"{live_feed.BOOT_ID}-99")))
+
+
+def _live_slot_never_leaks():
+    feed = live_feed.LiveFeed(fetch_results=lambda: {}, fetch_history=lambda: [])
+    feed._ensure_poller = lambda: None
+    unused = [feed.stream() for _ in range(live_feed.MAX_STREAMS + 1)]  # built, never iterated
+    del unused
+    held = [feed.stream(max_seconds=0) for _ in range(live_feed.MAX_STREAMS)]
+    [next(g) for g in held]
+    over = "".join(feed.stream())  # cap reached → catch-up that closes at once
+    [g.close() for g in held]
+    return f"retry: {live_feed.CATCHUP_RETRY_MS}" in over and feed._subscribers == 0
+
+
+test("live_feed slot só é tomado ao iterar o stream (sem vazar)", _live_slot_never_leaks)
+
+import history_index
+_hidx = history_index.HistoryIndex([
+    {"date": "01/03", "time": "20:00", "home": "A", "away": "B", "league": "NBA", "selection": "A Vence", "odd": 1.5, "status": "WON"},
+    {"date": "02/03", "time": "21:00", "home": "C", "away": "D", "league": "NBA", "selection": "Over 220", "odd": 1.9, "status": "LOST"},
+    {"date": "02/03", "time": "18:00", "home": "E", "away": "F", "league": "La Liga", "selection": "E ou Empate", "odd": 1.3, "status": "ARCHIVE_WON"},
+])
+_hpage = _hidx.query(limit=2)
+test("history_index cursor", lambda: [e["home"] for e in _hpage["items"]] == ["C", "E"]
+     and [e["home"] for e in _hidx.query(limit=2, cursor=history_index.parse_cursor(_hpage["next_cursor"]))["items"]] == ["A"])
+test("history_index filters", lambda: _hidx.query(statuses=["WON"])["total"] == 2
+     and _hidx.query(leagues=["nba"], min_odd=1.6)["total"] == 1)
+_hdup = history_index.HistoryIndex([dict(home="X", away="Y", date="03/03", time="20:00", selection="X Vence",
+                                         tag=i) for i in range(5)])
+def _hdup_pages():
+    seen, cursor = [], None
+    while True:
+        page = _hdup.query(limit=2, cursor=history_index.parse_cursor(cursor))
+        seen += [e["tag"] for e in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return sorted(seen)
+test("history_index cursor não pula chaves iguais entre páginas", lambda: _hdup_pages() == [0, 1, 2, 3, 4])
+
+import threading
+import scheduler
+import datetime as _dt
+test("scheduler cron next run", lambda: scheduler.Cron("30 0 * * *").next_after(_dt.datetime(2026, 3, 1, 0, 30)) == _dt.datetime(2026, 3, 2, 0, 30))
+_sched = scheduler.Scheduler(lock=scheduler.LeaderLock(os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "test_scheduler.lock")))
+_sched.register("noop", lambda: None, leader_only=False)
+_sched.register("boom", lambda: 1 / 0, leader_only=False)
+test("scheduler throttled run", lambda: _sched.run_if_due("noop", 600) == "ok" and _sched.run_if_due("noop", 600) is None
+     and _sched.status()["jobs"]["noop"]["counts"]["ok"] == 1 and _sched.run_if_due("boom", 0) == "error")
+_sgate, _sdates = threading.Event(), []
+_sched.register("refresh", lambda d: (_sgate.wait(5), _sdates.append(d)), leader_only=False, overlap="skip")
+_sstates = [_sched.enqueue("refresh", "2026-03-01"), _sched.enqueue("refresh", "2026-03-01"),
+            _sched.enqueue("refresh", "2026-03-02")]
+_sgate.set()
+test("scheduler overlap por argumentos (outra data não é descartada)", lambda:
+     _sstates == ["started", "skipped", "coalesced"] and _sched.wait("refresh", 5)
+     and _sdates == ["2026-03-01", "2026-03-02"])
+test("scheduler wait idle job", lambda: _sched.wait("noop", 0.1) and not _sched.is_running("noop"))
+import warmup
+test("warmup readiness before boot", lambda: warmup.status()["ready"] and set(warmup.STAGES) <= set(warmup._STAGE_FUNCS) and "history" not in warmup.STAGES)
+import startup_profile
+test("startup_profile: app boot sem módulos pesados", lambda: startup_profile.profile_import("app")["heavy_loaded"] == [])
+test("startup_profile: worker aquecido só carrega o primeiro request", lambda: startup_profile.profile_import("app", warm=True)["unexpected"] == [])
+test("ai_engine lazy re-export (PEP 562)", lambda: ai_engine.architect_parlays.__module__ == "specialized_modules"
+     and len(ai_engine.SPORTS_KNOWLEDGE) > 0)
+import security
+_rl = security.RateLimiter(max_keys=64)
+test("RateLimiter sliding window", lambda: [_rl.is_rate_limited("k", 3, 60)[0] for _ in range(4)] == [False, False, False, True])
+for _i in range(5000):
+    _rl.is_rate_limited(f"ip{_i}", 5, 60)
+test("RateLimiter teto de memória", lambda: _rl.size() <= 64 and _rl.evictions > 0)
+import tempfile
+import security_store
+_sstore = security_store.SecurityStore(os.path.join(tempfile.mkdtemp(), "security_state.db"))
+_srl = security_store.SharedRateLimiter(_sstore)
+_sblk = security_store.SharedIPBlocker(_sstore)
+def _sstore_probe_fails():
+    saved, security_store._HIT_SQL = security_store._HIT_SQL, security_store._HIT_SQL.replace("RETURNING", "RETURNING nope,")
+    try:
+        security_store.SecurityStore(os.path.join(tempfile.mkdtemp(), "security_state.db"))
+        return False
+    except Exception:
+        return True
+    finally:
+        security_store._HIT_SQL = saved
+test("SecurityStore testa o upsert no boot (sem linha de sonda)", lambda: _sstore_probe_fails()
+     and _sstore.conn().execute("SELECT COUNT(*) FROM counters").fetchone()[0] == 0)
+test("SharedRateLimiter quota", lambda: [_srl.is_rate_limited("k", 2, 60)[0] for _ in range(3)] == [False, False, True])
+test("SharedIPBlocker strikes escalam", lambda: _sblk.block("9.9.9.9", 60)[0] == 60 and _sblk.block("9.9.9.9", 60)[0] == 120
+     and _sblk.is_blocked("9.9.9.9") and security_store.SharedIPBlocker(_sstore).get_blocked_count() == 1)
+def _sblk_purge():
+    blk = security_store.SharedIPBlocker(security_store.SecurityStore(os.path.join(tempfile.mkdtemp(), "s.db")), max_ips=2)
+    for i in range(4):
+        blk.block(f"7.7.7.{i}", 60)
+    conn = blk.store.conn()
+    conn.execute("UPDATE blocks SET until = until - 3600 WHERE ip IN ('7.7.7.0', '7.7.7.1', '7.7.7.2')")
+    blk._last_prune = 0.0
+    blk.block("7.7.7.9", 60)  # cadence due → purge() runs inside block()
+    left = {ip for (ip,) in conn.execute("SELECT ip FROM blocks")}
+    return left == {"7.7.7.3", "7.7.7.9"}
+
+
+test("SharedIPBlocker purge no ritmo do prune (sem crescer para sempre)", _sblk_purge)
+test("security UA: scanner x whitelist", lambda: security._is_scanner_ua("sqlmap/1.7")
+     and not security._is_scanner_ua("Mozilla/5.0 (compatible; Googlebot/2.1)"))
+test("security payload: pré-filtro", lambda: not security._has_attack_payload("/api/games?date=2026-03-01")
+     and security._has_attack_payload("/?q=1' OR '1'='1") and security._has_attack_payload("/%2e%2e%2fetc"))
+test("security extensão + honeypot", lambda: security._has_suspicious_extension("/x.PHP")
+     and security.is_honeypot_path("/wp-admin/") and not security.is_honeypot_path("/api/games"))
+_tp = security.LoginTarpit()
+test("LoginTarpit prazo sem sleep", lambda: _tp.retry_after("a") == 0 and _tp.hold("a", 3) > 0
+     and _tp.retry_after("a") == 3 and _tp.retry_after("b") == 0)
+_stp = security_store.SharedLoginTarpit(_sstore)
+test("SharedLoginTarpit", lambda: _stp.hold("a", 2) > 0 and security_store.SharedLoginTarpit(_sstore).retry_after("a") == 2)
+import types
+import user_cache
+_ucgen = os.path.join(tempfile.mkdtemp(), "user_cache.gen")
+_ucdb = {1: types.SimpleNamespace(id=1, email="a@b.c", role="user", subscription_end=None)}
+_uc_a, _uc_b = user_cache.UserCache(gen_file=_ucgen), user_cache.UserCache(gen_file=_ucgen)
+test("user_cache hit sem banco", lambda: _uc_a.get(1, _ucdb.get).email == "a@b.c" and _uc_a.get(1, None).id == 1
+     and _uc_a.stats()["hits"] == 1 and not _uc_a.get(1, None).is_active_subscriber)
+test("user_cache invalidação entre workers", lambda: _uc_b.get(1, _ucdb.get) is not None
+     and _uc_a.invalidate(1) is None and _uc_b.get(1, _ucdb.get) is not None and _uc_b.stats()["generation_flushes"] == 1)
+
+
+def _uc_invalidated_during_load():
+    uc = user_cache.UserCache(gen_file=os.path.join(tempfile.mkdtemp(), "user_cache.gen"))
+
+    def slow_loader(user_id):
+        stale = _ucdb[user_id]
+        uc.invalidate(user_id)  # renewal webhook lands while the DB row is being read
+        return stale
+    first = uc.get(1, slow_loader)
+    return first.id == 1 and uc.stats()["size"] == 0 and uc.get(1, _ucdb.get) is not None and uc.stats()["size"] == 1
+
+
+test("user_cache não guarda snapshot carregado durante invalidate", _uc_invalidated_during_load)
+import db_config
+from sqlalchemy import create_engine, text as _sqltext
+_dburl = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "users.db")
+_dbeng = create_engine(_dburl, **db_config.engine_options(_dburl))
+db_config.install(_dbeng)
+with _dbeng.connect() as _dbconn:
+    _dbmode = _dbconn.execute(_sqltext("PRAGMA journal_mode")).scalar()
+test("db_config SQLite WAL + métricas do pool", lambda: _dbmode == "wal" and db_config.stats()["checkouts"] >= 1
+     and db_config.stats()["queries"] >= 1 and "checkout_wait_ms_p95" in db_config.stats())
+from flask import Flask as _Flask
+import payment_system
+import webhook_queue
+_whapp = _Flask("webhook_test", instance_path=tempfile.mkdtemp())
+payment_system.init_payment_system(_whapp)
+with _whapp.app_context():
+    payment_system.db.session.add(payment_system.User(email="payer@x.com"))
+    payment_system.db.session.commit()
+
+
+class _StubMP:
+    """Local stand-in for PaymentManager.check_payment_status."""
+    def __init__(self, status):
+        self.status, self.calls = status, 0
+
+    def check_payment_status(self, payment_id):
+        self.calls += 1
+        if self.status is None:
+            raise ConnectionError("MP down")
+        return {"id": payment_id, "status": self.status, "transaction_amount": 29.9, "payer": {"email": "Payer@x.com"}}
+
+
+_whq = webhook_queue.WebhookQueue(os.path.join(tempfile.mkdtemp(), "webhook_queue.db"))
+
+
+def _webhook_flow():
+    _whq.enqueue("900"), _whq.enqueue("900"), _whq.enqueue("901")
+    down = _StubMP(None)
+    webhook_queue.drain(_whq, down, _whapp)  # both fail upstream → backoff, nothing applied
+    _whq.conn().execute("UPDATE notifications SET next_attempt = 0")
+    ok = _StubMP("approved")
+    done = webhook_queue.drain(_whq, ok, _whapp)
+    _whq.enqueue("900")  # Mercado Pago re-sends an already applied notification
+    dup = webhook_queue.drain(_whq, ok, _whapp)
+    with _whapp.app_context():
+        payments = payment_system.Payment.query.filter(payment_system.Payment.mp_payment_id.in_(["900", "901"])).count()
+        active = payment_system.User.query.filter_by(email="payer@x.com").first().is_active_subscriber
+    c = _whq.stats()["counters"]
+    return (down.calls == 2 and done == 2 and dup == 1 and payments == 2 and active
+            and c["coalesced"] == 1 and c["retries"] == 2 and c["applied"] == 2 and c["duplicates"] == 1)
+
+
+test("webhook_queue idempotente (stub MP)", _webhook_flow)
+
+
+def _webhook_cap_and_prune():
+    q = webhook_queue.WebhookQueue(os.path.join(tempfile.mkdtemp(), "webhook_queue.db"), max_pending=2)
+    q.enqueue("1"), q.enqueue("2")
+    q.enqueue("2")  # already pending → still coalesces at the cap
+    try:
+        q.enqueue("3")
+        return False
+    except webhook_queue.QueueFull:
+        pass
+    q.complete("1", "approved")
+    q.conn().execute("UPDATE notifications SET updated = 0 WHERE payment_id = '1'")
+    return q.prune() == 1 and q.stats()["states"] == {"pending": 1} and q.stats()["counters"]["rejected"] == 1
+
+
+test("webhook_queue teto de pendentes + limpeza de done/failed", _webhook_cap_and_prune)
+import admin_users
+
+
+def _admin_users_flow():
+    with _whapp.app_context():
+        first = admin_users.list_users(limit=1)
+        second = admin_users.list_users(cursor=first["next_cursor"], limit=1)
+        found = admin_users.list_users(q="PAYER@", status="active")["items"]
+        summary = admin_users.summary()
+    return (first["next_cursor"] is not None and second["items"][0]["id"] < first["items"][0]["id"]
+            and [u["email"] for u in found] == ["payer@x.com"]
+            and summary["total"] == 2 and summary["active"] == 2 and summary["expired"] == 0)
+
+
+user_cache.invalidate()
+test("admin_users cursor + busca + resumo agregado", _admin_users_flow)
+import build_assets
+from jinja2 import Environment as _JinjaEnv
+_ishell = build_assets.IndexShell(_JinjaEnv(), dist_dir=tempfile.mkdtemp())
+_ishell_user = _ishell.shell_for(types.SimpleNamespace(role="user")).body.decode()
+test("build_assets shell sem CSS/JS inline", lambda: "<style>" not in _ishell_user and "<script>" not in _ishell_user
+     and all(f"{build_assets.DIST_URL}{name}" in _ishell_user for name in _ishell.assets)
+     and _ishell.shell_for(types.SimpleNamespace(role="admin")).etag != _ishell.shells["user"].etag)
+import metrics
+metrics.observe_request("GET", "/api/games", 200, 0.004)
+metrics.observe_request("GET", "/api/games", 200, 0.3)
+metrics.observe_upstream("site.api.espn.com", 0.2, "2xx")
+metrics.register_collector("test_cache", lambda: {"hits": 3, "note": "skip"})
+_prom = metrics.render()
+test("metrics histograma + upstream + Prometheus", lambda:
+     'route="/api/games",le="0.005"} 1' in _prom and 'route="/api/games",le="+Inf"} 2' in _prom
+     and 'host="espn",kind="http",outcome="2xx"} 1' in _prom and 'component="test_cache",stat="hits"} 3' in _prom
+     and 'stat="note"' not in _prom and metrics.host_label("aws-0.pooler.supabase.com") == "supabase")
+import profiler
+_pdir = tempfile.mkdtemp()
+_pstate = profiler.ArmState(os.path.join(tempfile.mkdtemp(), "profiler.db"))
+_pstate.arm(pipeline_runs=2, slow_ms=100, minutes=1)
+_ptakes = [_pstate.take_pipeline_run() for _ in range(3)]
+_psampler = profiler.SlowRequestSampler()
+_psampler.begin("GET /slow")
+_psampler.sample_once()
+_psampler._traces[threading.get_ident()].start -= 1.0  # pretend the request took ~1 s
+_pmeta = _psampler.end(100, {"path": "/slow"}, artifact_dir=_pdir)
+for _i in range(3):
+    profiler._save("request", {"label": f"r{_i}"}, b"x 1\n", "folded", artifact_dir=_pdir)
+_pleft = profiler.prune(_pdir, max_artifacts=2) and profiler.list_artifacts(_pdir)
+test("profiler N execuções + amostra lenta + retenção", lambda: _ptakes == [True, True, False]
+     and _pmeta["samples"] == 1 and _pmeta["path"] == "/slow" and len(_pleft) == 2
+     and profiler.artifact_path("../x.json", _pdir) is None and profiler.artifact_path(_pleft[0]["files"][0], _pdir))
+import io
+import logging
+import queue
+import log_config
+_lbuf = io.StringIO()
+_lhandler = logging.StreamHandler(_lbuf)
+_lhandler.setFormatter(log_config.TextFormatter())
+_lhandler.addFilter(log_config._ContextFilter())
+_llogger = logging.getLogger("neural.test_log_config")
+_llogger.propagate = False
+_llogger.addHandler(_lhandler)
+_llog = log_config.StructuredLogger(_llogger, {})
+with log_config.run("picks", logger=_llog, date="2026-01-01") as _lrun:
+    _llog.debug("per-game chatter", game="A vs B")
+    _llog.warning("espn slow", duration_ms=812)
+    _lrun.count("games", 3)
+_ldropped = log_config._DroppingQueueHandler.dropped
+_lfull = log_config._DroppingQueueHandler(queue.Queue(1))
+_lfull.emit(logging.LogRecord("neural.x", logging.INFO, "", 0, "a", None, None))
+_lfull.emit(logging.LogRecord("neural.x", logging.INFO, "", 0, "b", None, None))
+_llines = _lbuf.getvalue().splitlines()
+test("log_config campos + resumo por execução + fila cheia descarta", lambda: len(_llines) == 2
+     and "espn slow" in _llines[0] and "duration_ms=812" in _llines[0] and f"run_id={_lrun.run_id}" in _llines[0]
+     and "picks run finished" in _llines[1] and "games=3" in _llines[1] and "warning=1" in _llines[1]
+     and "date=2026-01-01" in _llines[1] and log_config._DroppingQueueHandler.dropped == _ldropped + 1)
+from concurrent.futures import ThreadPoolExecutor
+with log_config.run("pool", logger=_llog) as _lprun, ThreadPoolExecutor(2) as _lpool:
+    _lpooled = log_config.submit(_lpool, log_config.current_run).result()
+    _lbare = _lpool.submit(log_config.current_run).result()
+test("log_config.submit leva o run para a thread do pool", lambda: _lpooled is _lprun and _lbare is None)
+import security_events
+_spath = os.path.join(tempfile.mkdtemp(), "security.log")
+_ssink = security_events.SecurityEventSink(_spath, ring_size=5, max_bytes=400, backups=2)
+for _i in range(12):
+    _ssink.emit("FAILED_LOGIN" if _i % 3 else "HONEYPOT_TRIGGER", f"10.0.0.{_i}", f"n={_i}")
+_ssink.flush()  # one batch of 12 lines > 400 bytes → rotated to .1
+_slast = _ssink.emit("SCAN_DETECTED", "10.0.0.99", "after rotation")
+_ssink.flush()
+_sstats = _ssink.stats()
+_sreseed = security_events.SecurityEventSink(_spath, ring_size=5).recent()
+test("security_events ring + lote + rotação + contadores", lambda: len(_ssink.recent(30)) == 5
+     and _ssink.recent(1) == [_slast] and _slast.endswith("IP=10.0.0.99 | after rotation")
+     and _ssink.counts() == {"HONEYPOT_TRIGGER": 4, "FAILED_LOGIN": 8, "SCAN_DETECTED": 1}
+     and _sstats["written"] == 13 and _sstats["batches"] == 2 and _sstats["rotations"] == 1
+     and os.path.exists(_spath + ".1") and _sreseed == [_slast])
+
+
+def _security_events_two_writers():
+    """Two sinks on one file (= two gunicorn workers) rotating concurrently."""
+    path = os.path.join(tempfile.mkdtemp(), "security.log")
+    sinks = [security_events.SecurityEventSink(path, max_bytes=300, backups=2) for _ in range(2)]
+
+    def hammer(sink):
+        for i in range(40):
+            sink._write([f"[x] [SCAN_DETECTED] IP=10.0.0.{i} | worker={id(sink)}"] * 3)
+    threads = [threading.Thread(target=hammer, args=(sink,)) for sink in sinks]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    lone = security_events.SecurityEventSink(os.path.join(tempfile.mkdtemp(), "gone.log"))
+    return (all(sink.stats()["write_errors"] == 0 for sink in sinks)
+            and sum(sink.stats()["rotations"] for sink in sinks) > 0 and lone._rotate() is False)
+
+
+test("security_events rotação entre workers sem erro (flock)", _security_events_two_writers)
+
+
+
+def _leverage_grid_shared():
+    bs = __import__("bankroll_sim")
+    bs._cache.clear()
+    return (bs.snap_plan(37, 1.27) == (50, 1.25) and bs.snap_plan(99999, 2.999) == (100000, 3.0)
+            and bs.get_leverage_simulation(37, 1.27, 9000, {"odds_range": {}})
+            == bs.get_leverage_simulation(50, 1.26, 9000, {"odds_range": {}}) and len(bs._cache) == 1)
+
+
+test("bankroll_sim grade fixa: parâmetros vizinhos dividem a simulação", _leverage_grid_shared)
+import bankroll_sim
+_sim = bankroll_sim.simulate_leverage(10, 1.25, 100, alpha=95, beta=5, n_paths=2000, horizon=40)
+import prop_engine
+_board = prop_engine.project_slate([{"game_key": "A|B", "team": "A", "starters": [
+    {"name": "Star", "avg_pts": 28, "avg_reb": 7, "avg_ast": 6, "position": "Forward"},
+    {"name": "Role", "avg_pts": 9, "avg_reb": 4, "avg_ast": 2, "position": "Guard"}],
+    "missing": [{"name": "Out", "avg_pts": 22, "position": "Guard"}]}], n_sims=2000)
+test("prop_engine slate board", lambda: _board.top(1)[0]["player"] == "Star" and 0 < _board.top(1)[0]["p_over"] < 1)
+test("bankroll_sim ruin/target", lambda: 0 < _sim["risk_of_ruin"] < 1 and _sim["prob_reach_target"] > 0.5)
+
+
 # ═══════════════════════════════
 # RESULTADO FINAL
 # ═══════════════════════════════
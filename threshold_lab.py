@@ -0,0 +1,357 @@
+"""
+threshold_lab.py — LABORATÓRIO DE THRESHOLDS (WHAT-IF) 🧪
+==========================================================
+Responde perguntas do tipo "e se o min prob do FORTRESS fosse 72 em vez de 68?"
+sem precisar de um replay completo do pipeline.
+
+COMO FUNCIONA:
+1. Converte o histórico resolvido (WON / ARCHIVE_WON / LOST) em colunas NumPy:
+   prob, odd, liga, mercado, faixa de odds, status e safety score
+   (reconstruídos só quando o history.json muda)
+2. Mercado e faixa de odds usam os MESMOS buckets do self_learning.study_results
+3. Safety score usa o MESMO _calc_safety_score do treble builder (auto_picks)
+4. Avalia uma GRADE inteira de thresholds numa única operação broadcast
+   (min_prob × min_safety × min_odd × max_odd × N picks)
+5. Retorna tabela + payload de heatmap para o painel admin
+
+INTEGRAÇÃO:
+  from threshold_lab import evaluate_threshold_grid
+
+  report = evaluate_threshold_grid(min_probs=[64, 68, 72], min_safety=[0, 48, 55])
+  report["heatmap"]   # accuracy / roi / volume por (min_prob, min_safety)
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from self_learning import _classify_market, _classify_odds_range
+
+# ═══════════════════════════════════════
+# CONSTANTS
+# ═══════════════════════════════════════
+HISTORY_FILE = "history.json"
+
+# Current FORTRESS filter in auto_picks.build_trebles (baseline row)
+FORTRESS_BASELINE = {"min_prob": 68, "min_safety": 0, "min_odd": 1.10, "max_odd": 2.20}
+
+DEFAULT_GRID = {
+    "min_prob": list(range(60, 82, 2)),
+    "min_safety": list(range(0, 75, 5)),
+    "min_odd": [FORTRESS_BASELINE["min_odd"]],
+    "max_odd": [FORTRESS_BASELINE["max_odd"]],
+}
+
+GRID_AXES = ("min_prob", "min_safety", "min_odd", "max_odd")
+GROUP_FIELDS = ("league", "market", "odds_range")
+
+# Guard rail: cells × picks in the broadcast tensor
+MAX_GRID_CELLS = 5000
+
+# Market text used by _calc_safety_score when the entry has no "market" field
+_MARKET_LABELS = {
+    "DC": "Dupla Chance",
+    "ML": "Vencedor",
+    "BTTS": "Gols",
+}
+
+
+# ═══════════════════════════════════════
+# COLUMN STORE
+# ═══════════════════════════════════════
+class HistoryColumns:
+    """Resolved history as parallel NumPy arrays (one row per resolved pick)."""
+
+    def __init__(self, entries):
+        from auto_picks import _calc_safety_score
+
+        probs, odds, won, safety = [], [], [], []
+        league_codes, market_codes, odds_codes = [], [], []
+        self.leagues, self.markets, self.odds_ranges = [], [], []
+        league_idx, market_idx, odds_idx = {}, {}, {}
+
+        for entry in entries:
+            status = entry.get("status", "PENDING")
+            if status not in ("WON", "ARCHIVE_WON", "LOST"):
+                continue
+            try:
+                odd = float(entry.get("odd", 1.5))
+                prob = float(entry.get("prob", 50))
+            except (TypeError, ValueError):
+                continue
+
+            league = entry.get("league", "Unknown")
+            market = _classify_market(entry.get("selection", ""))
+            odds_range = _classify_odds_range(odd)
+
+            probs.append(prob)
+            odds.append(odd)
+            won.append(status != "LOST")
+            safety.append(_calc_safety_score(_as_game(entry, market)))
+            league_codes.append(_code(league, league_idx, self.leagues))
+            market_codes.append(_code(market, market_idx, self.markets))
+            odds_codes.append(_code(odds_range, odds_idx, self.odds_ranges))
+
+        self.prob = np.asarray(probs, dtype=np.float64)
+        self.odd = np.asarray(odds, dtype=np.float64)
+        self.won = np.asarray(won, dtype=bool)
+        self.safety = np.asarray(safety, dtype=np.float64)
+        self.league = np.asarray(league_codes, dtype=np.int32)
+        self.market = np.asarray(market_codes, dtype=np.int32)
+        self.odds_range = np.asarray(odds_codes, dtype=np.int32)
+        # Flat-stake profit per pick (same convention as study_results ROI)
+        self.pnl = np.where(self.won, self.odd - 1.0, -1.0)
+
+    def __len__(self):
+        return int(self.prob.shape[0])
+
+    def labels(self, field):
+        return {"league": self.leagues, "market": self.markets, "odds_range": self.odds_ranges}[field]
+
+    def codes(self, field):
+        return getattr(self, field)
+
+    def subset_mask(self, leagues=None, markets=None, odds_ranges=None):
+        """Boolean row mask for optional league / market / odds-range filters."""
+        mask = np.ones(len(self), dtype=bool)
+        for field, wanted in (("league", leagues), ("market", markets), ("odds_range", odds_ranges)):
+            if not wanted:
+                continue
+            labels = self.labels(field)
+            codes = [labels.index(w) for w in wanted if w in labels]
+            mask &= np.isin(self.codes(field), codes)
+        return mask
+
+
+def _code(value, index, labels):
+    if value not in index:
+        index[value] = len(labels)
+        labels.append(value)
+    return index[value]
+
+
+def _as_game(entry, market):
+    """Shape a history entry like a processed game so _calc_safety_score accepts it."""
+    market_text = entry.get("market")
+    if not market_text:
+        selection = entry.get("selection", "").lower()
+        if market in ("OVER", "UNDER"):
+            if "pontos" in selection and not selection.startswith(("over", "under")):
+                market_text = "Mercado de Jogadores"
+            elif entry.get("league") == "NBA":
+                market_text = "Total de Pontos"
+            else:
+                market_text = "Gols"
+        else:
+            market_text = _MARKET_LABELS.get(market, "")
+    return {
+        "league": entry.get("league", "Unknown"),
+        "best_tip": {
+            "prob": entry.get("prob", 50),
+            "odd": entry.get("odd", 1.5),
+            "selection": entry.get("selection", ""),
+            "market": market_text,
+            "reason": entry.get("reason", ""),
+            "badge": entry.get("badge", ""),
+        },
+    }
+
+
+_columns_cache = {"columns": None, "mtime": None}
+_columns_lock = threading.Lock()
+
+
+def get_history_columns():
+    """Returns the column store, rebuilt only when history.json changes on disk."""
+    mtime = os.path.getmtime(HISTORY_FILE) if os.path.exists(HISTORY_FILE) else 0
+    with _columns_lock:
+        if _columns_cache["columns"] is not None and _columns_cache["mtime"] == mtime:
+            return _columns_cache["columns"]
+
+        try:
+            from turbo_fetcher import get_cached_history
+            history = get_cached_history()
+        except ImportError:
+            from self_learning import _load_history
+            history = _load_history()
+
+        columns = HistoryColumns(history)
+        _columns_cache["columns"] = columns
+        _columns_cache["mtime"] = mtime
+        return columns
+
+
+# ═══════════════════════════════════════
+# GRID EVALUATION (single broadcast pass)
+# ═══════════════════════════════════════
+def evaluate_threshold_grid(min_probs=None, min_safety=None, min_odds=None, max_odds=None,
+                            leagues=None, markets=None, odds_ranges=None, group_by=None,
+                            heatmap_axes=("min_prob", "min_safety"), columns=None):
+    """
+    Evaluates accuracy, ROI and volume for every threshold combination at once.
+
+    Args:
+        min_probs / min_safety / min_odds / max_odds: threshold values per axis
+            (defaults: DEFAULT_GRID, odds bounds = current FORTRESS filter)
+        leagues / markets / odds_ranges: optional pre-filters (market and odds
+            range use the self_learning bucket names, e.g. "DC", "ultra_safe")
+        group_by: optional "league" | "market" | "odds_range" breakdown per cell
+        heatmap_axes: two grid axes laid out as the heatmap (x, y)
+
+    Returns:
+        dict with "rows" (table), "heatmap" (2D matrices), "baseline" and "sample"
+    """
+    columns = columns if columns is not None else get_history_columns()
+    axes = {
+        "min_prob": _axis(min_probs, "min_prob"),
+        "min_safety": _axis(min_safety, "min_safety"),
+        "min_odd": _axis(min_odds, "min_odd"),
+        "max_odd": _axis(max_odds, "max_odd"),
+    }
+    shape = tuple(len(axes[a]) for a in GRID_AXES)
+    cells = int(np.prod(shape))
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(f"Grade muito grande ({cells} células, máx {MAX_GRID_CELLS})")
+    if group_by is not None and group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by inválido: {group_by}")
+
+    base = columns.subset_mask(leagues, markets, odds_ranges)
+    prob, safety, odd = columns.prob[base], columns.safety[base], columns.odd[base]
+    won, pnl = columns.won[base], columns.pnl[base]
+
+    # (P, S, Omin, Omax, N) selection tensor
+    selected = (
+        (prob >= axes["min_prob"][:, None, None, None, None])
+        & (safety >= axes["min_safety"][None, :, None, None, None])
+        & (odd >= axes["min_odd"][None, None, :, None, None])
+        & (odd <= axes["max_odd"][None, None, None, :, None])
+    )
+    weights = selected.astype(np.float64)
+    volume = weights.sum(axis=-1)
+    wins = weights @ won.astype(np.float64)
+    profit = weights @ pnl
+    accuracy = _safe_pct(wins, volume)
+    roi = _safe_pct(profit, volume)
+
+    groups = None
+    if group_by is not None:
+        labels = columns.labels(group_by)
+        onehot = (columns.codes(group_by)[base][None, :] == np.arange(len(labels))[:, None]).astype(np.float64)
+        g_volume = weights @ onehot.T
+        g_wins = weights @ (onehot * won).T
+        g_profit = weights @ (onehot * pnl).T
+        groups = (labels, g_volume, _safe_pct(g_wins, g_volume), _safe_pct(g_profit, g_volume))
+
+    rows = []
+    for idx in np.ndindex(shape):
+        row = {axis: _num(axes[axis][i]) for axis, i in zip(GRID_AXES, idx)}
+        row.update({
+            "volume": int(volume[idx]),
+            "won": int(wins[idx]),
+            "accuracy": round(float(accuracy[idx]), 1),
+            "roi": round(float(roi[idx]), 1),
+        })
+        if groups is not None:
+            labels, g_volume, g_acc, g_roi = groups
+            row["groups"] = {
+                label: {"volume": int(g_volume[idx][k]), "accuracy": round(float(g_acc[idx][k]), 1),
+                        "roi": round(float(g_roi[idx][k]), 1)}
+                for k, label in enumerate(labels) if g_volume[idx][k] > 0
+            }
+        rows.append(row)
+
+    return {
+        "sample": int(base.sum()),
+        "axes": {axis: [_num(v) for v in axes[axis]] for axis in GRID_AXES},
+        "rows": rows,
+        "heatmap": _heatmap(axes, heatmap_axes, volume, accuracy, roi),
+        "baseline": _baseline_row(prob, safety, odd, won, pnl),
+        "filters": {"leagues": leagues or [], "markets": markets or [], "odds_ranges": odds_ranges or []},
+    }
+
+
+def _axis(values, name):
+    if values is None:
+        values = DEFAULT_GRID[name]
+    arr = np.atleast_1d(np.asarray(values, dtype=np.float64))
+    if arr.size == 0:
+        raise ValueError(f"Eixo vazio: {name}")
+    return arr
+
+
+def _safe_pct(numerator, denominator):
+    return np.divide(numerator * 100.0, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _num(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def _heatmap(axes, heatmap_axes, volume, accuracy, roi):
+    """2D slice over heatmap_axes; the remaining axes are pinned at their first value."""
+    x_axis, y_axis = heatmap_axes
+    if x_axis not in GRID_AXES or y_axis not in GRID_AXES or x_axis == y_axis:
+        raise ValueError(f"heatmap_axes inválido: {heatmap_axes}")
+    index = tuple(slice(None) if a in (x_axis, y_axis) else 0 for a in GRID_AXES)
+    order = [a for a in GRID_AXES if a in (x_axis, y_axis)]
+    transpose = order != [y_axis, x_axis]
+
+    def matrix(values):
+        grid = values[index]
+        grid = grid.T if transpose else grid
+        return np.round(grid, 1).tolist()
+
+    return {
+        "x": x_axis, "y": y_axis,
+        "x_values": [_num(v) for v in axes[x_axis]],
+        "y_values": [_num(v) for v in axes[y_axis]],
+        "pinned": {a: _num(axes[a][0]) for a in GRID_AXES if a not in (x_axis, y_axis)},
+        "volume": matrix(volume),
+        "accuracy": matrix(accuracy),
+        "roi": matrix(roi),
+    }
+
+
+def _baseline_row(prob, safety, odd, won, pnl):
+    b = FORTRESS_BASELINE
+    mask = (prob >= b["min_prob"]) & (safety >= b["min_safety"]) & (odd >= b["min_odd"]) & (odd <= b["max_odd"])
+    volume = int(mask.sum())
+    wins = int(won[mask].sum())
+    profit = float(pnl[mask].sum())
+    return {
+        **b,
+        "volume": volume,
+        "won": wins,
+        "accuracy": round(wins / volume * 100, 1) if volume else 0.0,
+        "roi": round(profit / volume * 100, 1) if volume else 0.0,
+    }
+
+
+def parse_grid_param(raw):
+    """
+    Parses a grid axis from a query string.
+    "68,72,76" → [68, 72, 76] | "60:80:2" → [60, 62, ..., 80] (inclusive)
+    An axis longer than MAX_GRID_CELLS is rejected before any list is built.
+    """
+    if raw is None or raw == "":
+        return None
+    raw = raw.strip()
+    if ":" in raw:
+        parts = [float(p) for p in raw.split(":")]
+        if len(parts) != 3 or parts[2] <= 0:
+            raise ValueError(f"Intervalo inválido: {raw}")
+        start, stop, step = parts
+        if not all(np.isfinite(parts)):
+            raise ValueError(f"Intervalo inválido: {raw}")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count <= 0:
+            raise ValueError(f"Intervalo inválido: {raw}")
+        if count > MAX_GRID_CELLS:
+            raise ValueError(f"Eixo muito grande ({count} valores, máx {MAX_GRID_CELLS})")
+        return [round(start + i * step, 4) for i in range(count)]
+    values = [p for p in raw.split(",") if p.strip()]
+    if len(values) > MAX_GRID_CELLS:
+        raise ValueError(f"Eixo muito grande ({len(values)} valores, máx {MAX_GRID_CELLS})")
+    return [float(p) for p in values]
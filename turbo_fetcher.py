@@ -17,6 +17,8 @@ Performance: ~80s sequencial → ~8-12s paralelo (8-10x speedup)
 import time
 import datetime
 import requests
+import log_config
+import metrics
 import threading
 import sys
 import os
@@ -24,6 +26,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
 import json
 
+log = log_config.get_logger("turbo_fetcher")
+
 # Fix Windows terminal encoding
 os.environ["PYTHONIOENCODING"] = "utf-8"
 try:
@@ -179,7 +183,7 @@ def _fetch_single_league(league, espn_date):
             except:
                 continue
     except Exception as e:
-        print(f"[TURBO] ESPN error {league['name']}: {e}")
+        log.warning("[TURBO] ESPN error", league=league['name'], error=str(e))
     return games
 
 
@@ -191,7 +195,7 @@ def fetch_espn_schedule_parallel(target_date):
     cache_key = f"espn_schedule_{target_date}"
     cached = _cache.get(cache_key)
     if cached is not None:
-        print(f"[TURBO] ⚡ ESPN Schedule HIT cache ({len(cached)} games)")
+        log.debug("[TURBO] ⚡ ESPN Schedule HIT cache", games=len(cached))
         return cached
 
     espn_date = target_date.replace("-", "")
@@ -199,16 +203,17 @@ def fetch_espn_schedule_parallel(target_date):
     
     t0 = time.time()
     with ThreadPoolExecutor(max_workers=MAX_WORKERS_ESPN) as executor:
-        futures = {executor.submit(_fetch_single_league, lg, espn_date): lg for lg in LEAGUES}
+        futures = {log_config.submit(executor, _fetch_single_league, lg, espn_date): lg for lg in LEAGUES}
         for future in as_completed(futures):
             try:
                 games = future.result()
                 all_games.extend(games)
             except Exception as e:
-                print(f"[TURBO] League thread failed: {e}")
+                log.warning("[TURBO] League thread failed", error=str(e))
     
     elapsed = time.time() - t0
-    print(f"[TURBO] ⚡ ESPN Schedule: {len(all_games)} games in {elapsed:.1f}s (parallel)")
+    metrics.observe_stage("turbo.espn_schedule", elapsed)
+    log.info("[TURBO] ⚡ ESPN Schedule (parallel)", games=len(all_games), duration_ms=round(elapsed * 1000))
     
     _cache.set(cache_key, all_games, ttl_seconds=600)  # 10 min cache
     return all_games
@@ -224,7 +229,7 @@ def _fetch_single_intel(home, away, target_date, sport_365, get_lineup_func):
         intel = get_lineup_func(home, away, target_date, sport=sport_365)
         return (home, intel)
     except Exception as e:
-        print(f"[TURBO] 365S error for {home}: {e}")
+        log.warning("[TURBO] 365S error", game=f"{home} vs {away}", error=str(e))
         return (home, None)
 
 
@@ -248,7 +253,7 @@ def fetch_365_intelligence_parallel(games, target_date, get_lineup_func):
         for game in games:
             sport_365 = "basketball" if game.get("sport") == "basketball" else "football"
             futures.append(
-                executor.submit(_fetch_single_intel, game["home"], game["away"], target_date, sport_365, get_lineup_func)
+                log_config.submit(executor, _fetch_single_intel, game["home"], game["away"], target_date, sport_365, get_lineup_func)
             )
         for future in as_completed(futures):
             try:
@@ -259,7 +264,8 @@ def fetch_365_intelligence_parallel(games, target_date, get_lineup_func):
                 continue
     
     elapsed = time.time() - t0
-    print(f"[TURBO] ⚡ 365Scores Intel: {len(intel_map)} entries in {elapsed:.1f}s (parallel)")
+    metrics.observe_stage("turbo.intel_365", elapsed)
+    log.info("[TURBO] ⚡ 365Scores Intel (parallel)", entries=len(intel_map), duration_ms=round(elapsed * 1000))
     
     _cache.set(cache_key, intel_map, ttl_seconds=600)
     return intel_map
@@ -288,7 +294,7 @@ def fetch_news_parallel(teams_with_sport, search_func):
     cache_key = f"news_{hash(frozenset(t[0] for t in teams_with_sport))}"
     cached = _cache.get(cache_key)
     if cached is not None:
-        print(f"[TURBO] ⚡ News Agent HIT cache")
+        log.debug("[TURBO] ⚡ News Agent HIT cache")
         return cached
 
     news_map = {}
@@ -298,7 +304,7 @@ def fetch_news_parallel(teams_with_sport, search_func):
         futures = []
         for team_name, sport in teams_with_sport:
             futures.append(
-                executor.submit(_fetch_single_news, team_name, sport, search_func)
+                log_config.submit(executor, _fetch_single_news, team_name, sport, search_func)
             )
         for future in as_completed(futures):
             try:
@@ -308,7 +314,8 @@ def fetch_news_parallel(teams_with_sport, search_func):
                 continue
     
     elapsed = time.time() - t0
-    print(f"[TURBO] ⚡ News Agent: {len(news_map)} teams in {elapsed:.1f}s (parallel)")
+    metrics.observe_stage("turbo.news", elapsed)
+    log.info("[TURBO] ⚡ News Agent (parallel)", teams=len(news_map), duration_ms=round(elapsed * 1000))
     
     _cache.set(cache_key, news_map, ttl_seconds=900)  # 15 min for news
     return news_map
@@ -379,19 +386,20 @@ def _fetch_single_result_league(league_path, espn_date):
             except:
                 continue
     except Exception as e:
-        print(f"[TURBO] Results error {league_path}: {e}")
+        log.warning("[TURBO] Results error", league=league_path, error=str(e))
     return results
 
 
-def fetch_espn_results_parallel(target_date=None):
+def fetch_espn_results_parallel(target_date=None, use_cache=True):
     """
     Fetch results from ALL ESPN leagues in PARALLEL.
     Old: ~80s. New: ~6s.
+    use_cache=False forces an upstream fetch (live_feed poller) and refreshes the cache.
     """
     cache_key = f"espn_results_{target_date or 'today'}"
-    cached = _cache.get(cache_key)
+    cached = _cache.get(cache_key) if use_cache else None
     if cached is not None:
-        print(f"[TURBO] ⚡ ESPN Results HIT cache ({len(cached)} entries)")
+        log.debug("[TURBO] ⚡ ESPN Results HIT cache", entries=len(cached))
         return cached
 
     espn_date = target_date.replace("-", "") if target_date else ""
@@ -399,7 +407,7 @@ def fetch_espn_results_parallel(target_date=None):
     
     t0 = time.time()
     with ThreadPoolExecutor(max_workers=MAX_WORKERS_RESULTS) as executor:
-        futures = {executor.submit(_fetch_single_result_league, lp, espn_date): lp for lp in RESULT_LEAGUES}
+        futures = {log_config.submit(executor, _fetch_single_result_league, lp, espn_date): lp for lp in RESULT_LEAGUES}
         for future in as_completed(futures):
             try:
                 results = future.result()
@@ -408,7 +416,8 @@ def fetch_espn_results_parallel(target_date=None):
                 continue
     
     elapsed = time.time() - t0
-    print(f"[TURBO] ⚡ ESPN Results: {len(all_results)} entries in {elapsed:.1f}s (parallel)")
+    metrics.observe_stage("turbo.espn_results", elapsed)
+    log.info("[TURBO] ⚡ ESPN Results (parallel)", entries=len(all_results), duration_ms=round(elapsed * 1000))
     
     _cache.set(cache_key, all_results, ttl_seconds=300)  # 5 min cache for results
     return all_results
@@ -0,0 +1,166 @@
+"""
+user_cache.py — CACHE DE USUÁRIO DA SESSÃO (flask-login SEM IR AO BANCO) 👤
+=========================================================================
+Todo request autenticado rodava load_user → User.query.get(id), e no
+Postgres do Supabase essa ida ao banco dominava endpoints baratos como
+/api/today_scout. Aqui o load_user consulta um cache por processo:
+
+  - Chave: user id → CachedUser (id, email, role, subscription_end)
+  - TTL curto (USER_CACHE_TTL, 60 s); teto de USER_CACHE_MAX entradas (LRU)
+  - is_active_subscriber continua calculado na hora (utcnow), então uma
+    assinatura que vence no meio do TTL vence na hora certa
+
+INVALIDAÇÃO: mp_webhook, admin_renew_user e o reset de senha chamam
+invalidate(user_id). Como o cache é por worker, invalidate() também toca o
+arquivo de geração (cache/user_cache.gen); cada lookup faz um stat dele e,
+se a geração mudou, esvazia o cache local — o outro worker vê a assinatura
+nova no request seguinte, não só depois do TTL.
+
+MÉTRICAS: stats() → hits, misses, expired, invalidations, hit_rate, size.
+generation() expõe o carimbo para caches derivados (resumo do /admin).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask_login import UserMixin
+
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+USER_CACHE_MAX = 10000
+GEN_FILE = os.environ.get(
+    "USER_CACHE_GEN_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "user_cache.gen"),
+)
+
+
+class CachedUser(UserMixin):
+    """Read-only snapshot of payment_system.User for current_user (no DB session attached)."""
+
+    def __init__(self, id, email, role, subscription_end):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.subscription_end = subscription_end
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.email, user.role, user.subscription_end)
+
+    @property
+    def is_active_subscriber(self):
+        """Same rule as User.is_active_subscriber."""
+        if self.role == 'admin': return True
+        if not self.subscription_end: return False
+        return self.subscription_end > datetime.utcnow()
+
+
+class UserCache:
+    """TTL + LRU map of user id → CachedUser, cleared when the shared generation changes."""
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_entries=USER_CACHE_MAX, gen_file=GEN_FILE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.gen_file = gen_file
+        self._entries = OrderedDict()  # user id -> (expires_at, CachedUser)
+        self._gen = self._read_gen()
+        self._epoch = 0  # bumped by every local invalidation or generation flush
+        self._lock = threading.Lock()
+        self.stats_counters = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0, "generation_flushes": 0}
+
+    def _read_gen(self):
+        try:
+            return os.stat(self.gen_file).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _check_gen(self):
+        """Another worker invalidated a user → drop everything (invalidations are rare)."""
+        gen = self._read_gen()
+        if gen != self._gen:
+            self._gen = gen
+            self._epoch += 1
+            self._entries.clear()
+            self.stats_counters["generation_flushes"] += 1
+
+    def get(self, user_id, loader):
+        """Cached snapshot for `user_id`; `loader(user_id)` (→ User or None) on a miss."""
+        now = time.time()
+        with self._lock:
+            self._check_gen()
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(user_id)
+                    self.stats_counters["hits"] += 1
+                    return entry[1]
+                del self._entries[user_id]
+                self.stats_counters["expired"] += 1
+            self.stats_counters["misses"] += 1
+            epoch = self._epoch
+
+        user = loader(user_id)
+        if user is None:
+            return None
+        cached = CachedUser.from_model(user)
+        with self._lock:
+            self._check_gen()
+            if self._epoch != epoch:
+                # Invalidated while loading (e.g. a renewal webhook): the snapshot
+                # may predate it, so serve it once but don't cache it
+                return cached
+            self._entries[user_id] = (now + self.ttl, cached)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id=None):
+        """Drops one user (or all) here and bumps the shared generation for the other workers."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+            self._epoch += 1
+            self.stats_counters["invalidations"] += 1
+            try:
+                os.makedirs(os.path.dirname(self.gen_file) or ".", exist_ok=True)
+                with open(self.gen_file, "w") as f:
+                    f.write(str(time.time_ns()))
+                # Our own bump is already applied locally
+                self._gen = self._read_gen()
+            except OSError as e:
+                print(f"[USER_CACHE] ⚠️ Could not bump generation file: {e}")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.stats_counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        counters["size"] = size
+        counters["ttl_s"] = self.ttl
+        return counters
+
+
+_cache = UserCache()
+
+
+def load(user_id, loader):
+    return _cache.get(user_id, loader)
+
+
+def invalidate(user_id=None):
+    _cache.invalidate(user_id)
+
+
+def generation():
+    """Shared user-change stamp (bumped by invalidate() in any worker) for derived caches."""
+    return _cache._read_gen()
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,181 @@
+"""
+warmup.py — BOOT A QUENTE (CACHES DO DIA ANTES DO PRIMEIRO REQUEST) 🔥
+=====================================================================
+Depois de um deploy/restart no Railway o primeiro /api/games de cada worker
+rodava o get_auto_games inteiro (30 s+, às vezes estourando o timeout de
+120 s do gunicorn). Aqui cada worker aquece antes de receber tráfego
+(gunicorn.conf.py → post_fork; fora do gunicorn, thread no import do app):
+
+  1. modules      → importa o caminho de serviço (data_fetcher / turbo_fetcher);
+                    o pipeline analítico segue preguiçoso (lazy_modules.py)
+  2. slate        → cache de arquivo do dia (memória + payload_cache);
+                    sem arquivo → dispara o job "refresh_games" (coalescido:
+                    o /api/games espera esse refresh em vez de abrir outro)
+  3. learning     → snapshot do learning_state (thresholds / correções)
+  4. calibration  → tabelas de calibração (turbo_fetcher)
+  5. history      → history.json + history_index (numpy) — SÓ com
+                    WARMUP_HISTORY_INDEX=1; o primeiro request é o /api/games,
+                    então por padrão o índice é montado no primeiro /api/history
+
+Só o que o primeiro request usa entra antes do tráfego: com o cache do dia
+em arquivo o worker aquecido carrega data_fetcher / turbo_fetcher /
+self_learning e nada do pipeline analítico (python startup_profile.py mede
+os dois cenários: boot sem warm-up e worker aquecido como no post_fork).
+
+READINESS: /api/health responde 503 "warming" até todas as etapas terminarem
+(o slate conta como pronto quando o refresh publica o payload) e 200 "ready"
+depois. Etapas com erro não travam o worker; após WARMUP_MAX_SECONDS ele
+fica pronto mesmo degradado. WARMUP_ENABLED=0 desliga o aquecimento.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+import metrics
+
+WARMUP_MAX_SECONDS = int(os.environ.get("WARMUP_MAX_SECONDS", 90))
+
+WARMUP_HISTORY_INDEX = os.environ.get("WARMUP_HISTORY_INDEX", "0") == "1"
+
+STAGES = ("modules", "slate", "learning", "calibration") + (("history",) if WARMUP_HISTORY_INDEX else ())
+
+_state = {"started_at": None, "finished_at": None, "stages": {}}
+_lock = threading.Lock()
+
+
+def _today():
+    return datetime.datetime.now().strftime("%Y-%m-%d")
+
+
+def _set_stage(name, status, started, detail=None):
+    metrics.observe_stage(f"warmup.{name}", time.time() - started)
+    with _lock:
+        _state["stages"][name] = {
+            "status": status,
+            "duration_ms": round((time.time() - started) * 1000, 1),
+            "detail": detail,
+        }
+
+
+# ═══════════════════════════════════════
+# STAGES
+# ═══════════════════════════════════════
+def _warm_modules():
+    import data_fetcher  # noqa: F401 — serving path; auto_picks / ai_engine load on refresh
+    import turbo_fetcher  # noqa: F401
+    return None
+
+
+def _warm_slate():
+    """Today's file cache into memory; no file → coalesced background refresh."""
+    import data_fetcher
+    today = _today()
+    cache_file = os.path.join(data_fetcher.CACHE_DIR, f"games_{today}.json")
+    if os.path.exists(cache_file):
+        data = data_fetcher.get_games_for_date(today, skip_history=True)
+        return "ok", f"{len(data.get('games', []))} games from file cache"
+    from scheduler import get_scheduler
+    state = get_scheduler().enqueue("refresh_games", today)
+    return "refreshing", f"no file cache, refresh {state}"
+
+
+def _warm_history():
+    import history_index
+    index = history_index.get_history_index()
+    return f"{len(index)} entries indexed"
+
+
+def _warm_learning():
+    from self_learning import get_learning_summary
+    summary = get_learning_summary()
+    return f"{summary.get('corrections_active', 0)} corrections"
+
+
+def _warm_calibration():
+    from turbo_fetcher import get_calibration_adjustments_cached
+    cal = get_calibration_adjustments_cached()
+    return f"{len(cal.get('odds_range', {}))} odds buckets"
+
+
+_STAGE_FUNCS = {
+    "modules": _warm_modules,
+    "slate": _warm_slate,
+    "history": _warm_history,
+    "learning": _warm_learning,
+    "calibration": _warm_calibration,
+}
+
+
+def warm_up():
+    """Runs every stage in order (blocking). Safe to call more than once."""
+    with _lock:
+        if _state["started_at"] is not None:
+            return status()
+        _state["started_at"] = time.time()
+    print(f"[WARMUP] 🔥 Worker {os.getpid()} warming up...")
+    for name in STAGES:
+        started = time.time()
+        try:
+            result = _STAGE_FUNCS[name]()
+            stage_status, detail = result if isinstance(result, tuple) else ("ok", result)
+        except Exception as e:
+            stage_status, detail = "error", str(e)
+            print(f"[WARMUP] ⚠️ Stage '{name}' failed: {e}")
+        _set_stage(name, stage_status, started, detail)
+    with _lock:
+        _state["finished_at"] = time.time()
+    print(f"[WARMUP] ✅ Worker {os.getpid()} warm in {_state['finished_at'] - _state['started_at']:.1f}s")
+    return status()
+
+
+def warm_up_async():
+    """Background warm-up (outside gunicorn: python app.py, other WSGI servers)."""
+    with _lock:
+        if _state["started_at"] is not None:
+            return
+    threading.Thread(target=warm_up, daemon=True, name="warmup").start()
+
+
+def started():
+    with _lock:
+        return _state["started_at"] is not None
+
+
+def _slate_published():
+    try:
+        import payload_cache
+        return payload_cache.get(f"games_{_today()}") is not None
+    except Exception:
+        return False
+
+
+def status():
+    """Readiness snapshot for /api/health."""
+    with _lock:
+        stages = {k: dict(v) for k, v in _state["stages"].items()}
+        started_at = _state["started_at"]
+        finished_at = _state["finished_at"]
+
+    slate = stages.get("slate")
+    if slate and slate["status"] == "refreshing" and _slate_published():
+        slate["status"] = "ok"
+        with _lock:
+            _state["stages"]["slate"]["status"] = "ok"
+
+    now = time.time()
+    done = finished_at is not None and all(
+        stages.get(name, {}).get("status") in ("ok", "error") for name in STAGES)
+    timed_out = started_at is not None and now - started_at > WARMUP_MAX_SECONDS
+    # Warm-up disabled (WARMUP_ENABLED=0) → nothing to wait for
+    ready = started_at is None or done or (finished_at is not None and timed_out)
+    return {
+        "status": "ready" if ready else "warming",
+        "ready": ready,
+        "degraded": ready and any(s.get("status") != "ok" for s in stages.values()),
+        "pid": os.getpid(),
+        "uptime_s": round(now - started_at, 1) if started_at else 0.0,
+        "warmup_s": round(finished_at - started_at, 2) if finished_at else None,
+        "stages": stages,
+    }
@@ -0,0 +1,282 @@
+"""
+webhook_queue.py — FILA DURÁVEL DE WEBHOOKS DO MERCADO PAGO 💳
+=============================================================
+O mp_webhook validava o HMAC e, DENTRO do request, chamava
+mp_manager.check_payment_status na API do Mercado Pago e fazia o commit.
+Com o upstream lento o MP estourava o timeout e reenviava a notificação:
+processamento duplicado e webhooks em 500.
+
+Agora o webhook só grava a notificação aqui (SQLite WAL em
+instance/webhook_queue.db, chave = payment id) e responde 200 na hora.
+O job "mp_webhooks" do scheduler drena a fila:
+
+  - Claim atômico de um lote (BATCH_SIZE) com lease — dois workers nunca
+    processam a mesma notificação; lease vencido (crash) volta para a fila
+  - Consulta os pagamentos do lote em paralelo (FETCH_WORKERS) pelo client
+    injetado (PaymentManager em produção, stub local nos testes)
+  - IDEMPOTÊNCIA na tabela Payment (mp_payment_id único): status já
+    gravado → "duplicate", sem estender a assinatura de novo
+  - Status não final (pending / in_process) ou erro do upstream → retry
+    com backoff exponencial; após MAX_ATTEMPTS → "failed"
+  - Notificação repetida enquanto pendente é coalescida; notificação nova
+    para um pagamento já processado reabre a linha (o status pode ter mudado)
+  - TETO: com MAX_PENDING linhas pendentes um id novo levanta QueueFull (o
+    webhook responde 503 e o MP reenvia depois) — ids forjados não enchem a
+    fila nem geram MAX_ATTEMPTS consultas cada sem limite
+  - LIMPEZA: linhas done / failed mais velhas que RETENTION_SECONDS são
+    apagadas pelo próprio drain (a idempotência mora na tabela Payment)
+
+stats() → contagem por estado + counters (enqueued, coalesced, applied, retries…).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+DEFAULT_DB_PATH = os.environ.get(
+    "WEBHOOK_QUEUE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "webhook_queue.db"),
+)
+POLL_SECONDS = int(os.environ.get("WEBHOOK_POLL_SECONDS", 30))
+BATCH_SIZE = 20
+FETCH_WORKERS = 4
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 10
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+SUBSCRIPTION_DAYS = 7
+MAX_PENDING = int(os.environ.get("WEBHOOK_MAX_PENDING", 1000))
+RETENTION_SECONDS = int(os.environ.get("WEBHOOK_RETENTION_DAYS", 30)) * 86400
+PRUNE_EVERY_SECONDS = 3600
+
+# Mercado Pago statuses that will not change on their own
+FINAL_STATUSES = frozenset({"approved", "rejected", "cancelled", "refunded", "charged_back"})
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS notifications (
+    payment_id TEXT PRIMARY KEY, topic TEXT, state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0, received REAL NOT NULL,
+    updated REAL NOT NULL, result TEXT, last_error TEXT
+) WITHOUT ROWID"""
+_INDEX = "CREATE INDEX IF NOT EXISTS notifications_state ON notifications (state, updated)"
+
+# New id → pending; pending → coalesced (no change); done/failed → reopened
+_ENQUEUE_SQL = """
+INSERT INTO notifications (payment_id, topic, state, next_attempt, received, updated)
+VALUES (:pid, :topic, 'pending', :now, :now, :now)
+ON CONFLICT (payment_id) DO UPDATE SET
+    state = 'pending', attempts = 0, next_attempt = :now, updated = :now, last_error = NULL
+WHERE state != 'pending'
+RETURNING payment_id
+"""
+
+
+class RetryLater(Exception):
+    """Transient outcome (non-final status, missing data upstream): try the notification again."""
+
+
+class QueueFull(Exception):
+    """MAX_PENDING notifications already waiting: refuse new payment ids until the queue drains."""
+
+
+class WebhookQueue:
+    """Durable payment-notification queue (SQLite WAL); one connection per thread."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, max_pending=MAX_PENDING):
+        self.path = path
+        self._local = threading.local()
+        self.max_pending = max_pending
+        self.counters = {"enqueued": 0, "coalesced": 0, "rejected": 0, "applied": 0, "duplicates": 0,
+                         "retries": 0, "failed": 0, "batches": 0, "pruned": 0}
+        self._counters_lock = threading.Lock()
+        self._last_prune = 0.0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self.conn()
+        conn.execute(_SCHEMA)
+        conn.execute(_INDEX)
+
+    def conn(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    def _count(self, name, n=1):
+        with self._counters_lock:
+            self.counters[name] += n
+
+    def enqueue(self, payment_id, topic="payment"):
+        """Persists a notification. Returns False when it coalesced into a pending one; QueueFull at the cap."""
+        now = time.time()
+        conn = self.conn()
+        if self.pending_count() >= self.max_pending:
+            known = conn.execute("SELECT state FROM notifications WHERE payment_id = ?", (str(payment_id),)).fetchone()
+            if known is None or known[0] != "pending":
+                self._count("rejected")
+                raise QueueFull(f"{self.max_pending} notifications pending")
+        row = conn.execute(_ENQUEUE_SQL, {"pid": str(payment_id), "topic": topic, "now": now}).fetchone()
+        self._count("enqueued" if row else "coalesced")
+        return row is not None
+
+    def claim(self, limit=BATCH_SIZE, lease=LEASE_SECONDS):
+        """Atomically leases up to `limit` due notifications → [(payment_id, attempts)]."""
+        now = time.time()
+        return self.conn().execute(
+            "UPDATE notifications SET claimed_until = ? WHERE payment_id IN ("
+            "  SELECT payment_id FROM notifications WHERE state = 'pending' AND next_attempt <= ?"
+            "  AND claimed_until < ? ORDER BY next_attempt LIMIT ?) "
+            "RETURNING payment_id, attempts",
+            (now + lease, now, now, limit)).fetchall()
+
+    def complete(self, payment_id, result):
+        self.conn().execute(
+            "UPDATE notifications SET state = 'done', result = ?, claimed_until = 0, updated = ?, "
+            "last_error = NULL WHERE payment_id = ?", (result, time.time(), payment_id))
+
+    def retry(self, payment_id, attempts, error):
+        """Backs off exponentially; gives up (state 'failed') after MAX_ATTEMPTS."""
+        now = time.time()
+        attempts += 1
+        if attempts >= MAX_ATTEMPTS:
+            state, next_attempt = "failed", now
+            self._count("failed")
+            print(f"[WEBHOOK] ❌ Payment {payment_id} failed after {attempts} attempts: {error}")
+        else:
+            state = "pending"
+            next_attempt = now + min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+            self._count("retries")
+        self.conn().execute(
+            "UPDATE notifications SET state = ?, attempts = ?, next_attempt = ?, claimed_until = 0, "
+            "updated = ?, last_error = ? WHERE payment_id = ?",
+            (state, attempts, next_attempt, now, str(error)[:300], payment_id))
+
+    def prune(self, retention=RETENTION_SECONDS):
+        """Deletes done / failed rows not touched for `retention` seconds. Returns how many."""
+        cur = self.conn().execute("DELETE FROM notifications WHERE state IN ('done', 'failed') AND updated < ?",
+                                  (time.time() - retention,))
+        self._count("pruned", cur.rowcount)
+        return cur.rowcount
+
+    def maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_EVERY_SECONDS:
+            return 0
+        self._last_prune = now
+        return self.prune()
+
+    def pending_count(self):
+        return self.conn().execute("SELECT COUNT(*) FROM notifications WHERE state = 'pending'").fetchone()[0]
+
+    def stats(self):
+        by_state = dict(self.conn().execute("SELECT state, COUNT(*) FROM notifications GROUP BY state").fetchall())
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {"states": by_state, "counters": counters}
+
+
+# ═══════════════════════════════════════
+# PROCESSING
+# ═══════════════════════════════════════
+def apply_payment(payment_id, info):
+    """
+    Records one Mercado Pago payment (caller holds an app context). Idempotent on
+    Payment.mp_payment_id: a status already recorded returns "duplicate".
+    """
+    from payment_system import db, User, Payment
+
+    status = info.get("status")
+    if status not in FINAL_STATUSES:
+        raise RetryLater(f"status '{status}' not final")
+    existing = Payment.query.filter_by(mp_payment_id=payment_id).first()
+    if existing is not None and existing.status == status:
+        return "duplicate"
+
+    payer_email = ((info.get("payer") or {}).get("email") or "").strip().lower()
+    user = User.query.filter_by(email=payer_email).first() if payer_email else None
+    if user is None:
+        raise RetryLater(f"user not found for email {payer_email or '?'}")
+
+    if existing is None:
+        existing = Payment(user_id=user.id, mp_payment_id=payment_id)
+        db.session.add(existing)
+    previous = existing.status
+    existing.status = status
+    existing.amount = info.get("transaction_amount")
+    if status == "approved" and previous != "approved":
+        user.subscription_end = datetime.utcnow() + timedelta(days=SUBSCRIPTION_DAYS)
+    db.session.commit()
+    if status == "approved":
+        import user_cache
+        user_cache.invalidate(user.id)
+        print(f"[WEBHOOK] ✅ Subscription ACTIVATED for {user.email} (payment {payment_id})")
+    return status
+
+
+def _fetch(client, payment_id):
+    try:
+        return payment_id, client.check_payment_status(payment_id), None
+    except Exception as e:
+        return payment_id, None, e
+
+
+def process_batch(queue, client, app, limit=BATCH_SIZE):
+    """Claims one batch, fetches the payments in parallel, applies them. Returns the batch size."""
+    claimed = queue.claim(limit)
+    if not claimed:
+        return 0
+    queue._count("batches")
+    attempts = dict(claimed)
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(claimed))) as pool:
+        fetched = list(pool.map(lambda row: _fetch(client, row[0]), claimed))
+
+    from payment_system import db
+    with app.app_context():
+        for payment_id, info, error in fetched:
+            if error is not None:
+                queue.retry(payment_id, attempts[payment_id], f"upstream: {error}")
+                continue
+            try:
+                result = apply_payment(payment_id, info or {})
+            except RetryLater as e:
+                db.session.rollback()
+                queue.retry(payment_id, attempts[payment_id], e)
+                continue
+            except Exception as e:
+                db.session.rollback()
+                print(f"[WEBHOOK] ⚠️ Payment {payment_id} processing error: {e}")
+                queue.retry(payment_id, attempts[payment_id], e)
+                continue
+            queue._count("duplicates" if result == "duplicate" else "applied")
+            queue.complete(payment_id, result)
+    return len(claimed)
+
+
+def drain(queue, client, app, max_batches=50):
+    """Processes due notifications until the queue has none left (bounded). Returns how many."""
+    queue.maybe_prune()
+    total = 0
+    for _ in range(max_batches):
+        n = process_batch(queue, client, app)
+        if not n:
+            break
+        total += n
+    return total
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WebhookQueue()
+        return _queue